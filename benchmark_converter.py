@@ -0,0 +1,661 @@
+#!/usr/bin/env python3
+"""
+Benchmark script for FBX to MDL Converter
+Times the converter's hot paths on synthetic data, comparing them against
+the original per-element implementations. No FBX SDK is needed.
+
+Results can be saved as JSON (--json) and checked against a saved baseline
+(--compare), which fails when a stage got slower than --threshold allows.
+"""
+
+import io
+import os
+import sys
+import json
+import math
+import time
+import struct
+import platform
+import argparse
+import tempfile
+import contextlib
+
+import numpy as np
+
+def _import_converter():
+    """Import the converter module (the FBX SDK is only loaded for conversions)"""
+    sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+    import fbx_to_mdl_converter
+    return fbx_to_mdl_converter
+
+def _best_time(func, *args, repeat=3):
+    """Return the best wall time of several runs of func(*args)"""
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func(*args)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+def legacy_find_closest_normal_index(conv, normal):
+    """Original per-normal linear scan over ANORMS"""
+    best_dot = -2.0
+    best_index = 0
+
+    normal.normalize()
+
+    for i, anorm in enumerate(conv.ANORMS[:min(len(conv.ANORMS), 162)]):
+        anorm_vec = conv.Vector3(anorm[0], anorm[1], anorm[2])
+        dot = normal.dot(anorm_vec)
+        if dot > best_dot:
+            best_dot = dot
+            best_index = i
+
+    return best_index
+
+def bench_normals(sizes):
+    """Compare batched normal quantization against the linear scan"""
+    conv = _import_converter()
+    rng = np.random.default_rng(0)
+    results = []
+
+    print(f"{'normals':>10} {'scan (s)':>12} {'batched (s)':>12} {'speedup':>10}")
+    for size in sizes:
+        normals = rng.normal(size=(size, 3))
+
+        start = time.perf_counter()
+        expected = [legacy_find_closest_normal_index(conv, conv.Vector3(*n)) for n in normals]
+        scan_time = time.perf_counter() - start
+
+        batched_time = _best_time(conv.quantize_normals, normals)
+        assert conv.quantize_normals(normals).tolist() == expected
+
+        speedup = scan_time / batched_time
+        print(f"{size:>10} {scan_time:>12.4f} {batched_time:>12.4f} {speedup:>9.1f}x")
+        results.append({'size': size, 'scan': scan_time, 'batched': batched_time})
+
+    return results
+
+class _CountingFile:
+    """File wrapper that counts write() calls"""
+    def __init__(self, path, mode):
+        self._file = open(path, mode)
+        self.writes = 0
+
+    def write(self, data):
+        self.writes += 1
+        return self._file.write(data)
+
+    def seek(self, *args):
+        return self._file.seek(*args)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self._file.close()
+
+def _write_syscalls():
+    """Return the process's write syscall count (Linux only, else None)"""
+    try:
+        with open('/proc/self/io') as f:
+            for line in f:
+                if line.startswith('syscw:'):
+                    return int(line.split()[1])
+    except OSError:
+        pass
+    return None
+
+def legacy_write_mdl_binary(converter, f, skins, texcoords, triangles, frames, skin_width, skin_height):
+    """Original field-by-field MDL writer, writing to an open file"""
+    conv = _import_converter()
+    scale, translate = converter.scale_factor, converter.translate
+
+    bounding_radius = 50.0
+    if frames and len(frames[0].vertices):
+        max_dist = 0.0
+        for vertex in frames[0].vertices.tolist():
+            x = (vertex[0] - 128) * scale[0] + translate[0]
+            y = (vertex[1] - 128) * scale[1] + translate[1]
+            z = (vertex[2] - 128) * scale[2] + translate[2]
+            max_dist = max(max_dist, math.sqrt(x*x + y*y + z*z))
+        bounding_radius = max_dist
+
+    f.write(struct.pack('<I', conv.MDL_MAGIC))
+    f.write(struct.pack('<I', conv.MDL_VERSION))
+    f.write(struct.pack('<fff', *scale))
+    f.write(struct.pack('<fff', *translate))
+    f.write(struct.pack('<f', bounding_radius))
+    f.write(struct.pack('<fff', 0.0, 0.0, 24.0))
+    f.write(struct.pack('<I', len(skins)))
+    f.write(struct.pack('<I', skin_width))
+    f.write(struct.pack('<I', skin_height))
+    f.write(struct.pack('<I', len(texcoords)))
+    f.write(struct.pack('<I', len(triangles)))
+    f.write(struct.pack('<I', len(frames)))
+    f.write(struct.pack('<I', 0))
+    f.write(struct.pack('<I', 0))
+    f.write(struct.pack('<f', 1.0))
+
+    for skin in skins:
+        f.write(struct.pack('<I', skin.group))
+        f.write(skin.data)
+
+    for texcoord in texcoords:
+        f.write(struct.pack('<I', texcoord.on_seam))
+        f.write(struct.pack('<I', texcoord.s))
+        f.write(struct.pack('<I', texcoord.t))
+
+    for triangle in triangles:
+        f.write(struct.pack('<I', triangle.faces_front))
+        f.write(struct.pack('<I', triangle.vertex[0]))
+        f.write(struct.pack('<I', triangle.vertex[1]))
+        f.write(struct.pack('<I', triangle.vertex[2]))
+
+    for frame in frames:
+        f.write(struct.pack('<I', frame.type))
+        for corner in (frame.bbox_min, frame.bbox_max):
+            for value in corner.v + [corner.normal_index]:
+                f.write(struct.pack('<B', value))
+        f.write(frame.name.encode('ascii')[:16].ljust(16, b'\0'))
+        for vertex in frame.vertices.tolist():
+            for value in vertex:
+                f.write(struct.pack('<B', value))
+
+def make_synthetic_model(conv, vertex_count, frame_count=1, seed=0):
+    """Build writer inputs for a random mesh with the given vertex and frame counts"""
+    rng = np.random.default_rng(seed)
+    converter = conv.FBXToMDLConverter()
+    positions = rng.uniform(-64.0, 64.0, size=(vertex_count, 3))
+    converter.scale_factor, converter.translate = conv.compute_scale_translate(positions)
+
+    skins = [conv.MDLSkin(64, 64, rng.integers(0, 256, 64 * 64, dtype=np.uint8).tobytes())]
+    texcoords = [conv.MDLTexCoord(s, t) for s, t in rng.integers(0, 64, size=(vertex_count, 2))]
+    triangles = [conv.MDLTriangle(list(tri)) for tri in rng.integers(0, vertex_count, size=(vertex_count * 2, 3))]
+    frames = []
+    for i in range(frame_count):
+        jitter = rng.normal(scale=0.5, size=positions.shape)
+        compressed = conv.compress_positions(positions + jitter, converter.scale_factor, converter.translate)
+        normal_indices = rng.integers(0, 162, vertex_count)
+        frames.append(conv.MDLFrame(f"frame{i}", conv.pack_frame_vertices(compressed, normal_indices)))
+
+    return converter, skins, texcoords, triangles, frames
+
+def bench_writer(sizes):
+    """Compare the single-buffer MDL writer against the field-by-field writer"""
+    conv = _import_converter()
+    results = []
+
+    print(f"{'vertices':>10} {'writes':>16} {'syscalls':>16} {'legacy (s)':>12} {'bulk (s)':>10} {'speedup':>8}")
+    with tempfile.TemporaryDirectory() as tmp:
+        legacy_path = os.path.join(tmp, 'legacy.mdl')
+        bulk_path = os.path.join(tmp, 'bulk.mdl')
+
+        for size in sizes:
+            converter, skins, texcoords, triangles, frames = make_synthetic_model(conv, size, frame_count=4)
+            args = (skins, texcoords, triangles, frames, 64, 64)
+            # write_mdl_file hands the bulk writer structured arrays
+            bulk_args = (skins, conv.texcoords_to_array(texcoords), conv.triangles_to_array(triangles),
+                         frames, 64, 64)
+
+            syscalls = _write_syscalls()
+            start = time.perf_counter()
+            with _CountingFile(legacy_path, 'wb') as f:
+                legacy_write_mdl_binary(converter, f, *args)
+            legacy_time = time.perf_counter() - start
+            legacy_writes = f.writes
+            legacy_syscalls = _write_syscalls() - syscalls if syscalls is not None else None
+
+            opened = []
+            conv.open = lambda path, mode: opened.append(_CountingFile(path, mode)) or opened[-1]
+            try:
+                syscalls = _write_syscalls()
+                start = time.perf_counter()
+                converter._write_mdl_binary(bulk_path, *bulk_args)
+                bulk_time = time.perf_counter() - start
+                bulk_syscalls = _write_syscalls() - syscalls if syscalls is not None else None
+            finally:
+                del conv.open
+
+            with open(legacy_path, 'rb') as a, open(bulk_path, 'rb') as b:
+                assert a.read() == b.read(), "bulk writer output differs from legacy writer"
+
+            bulk_writes = opened[0].writes
+            print(f"{size:>10} {f'{legacy_writes} -> {bulk_writes}':>16} {f'{legacy_syscalls} -> {bulk_syscalls}':>16} "
+                  f"{legacy_time:>12.4f} {bulk_time:>10.4f} {legacy_time / bulk_time:>7.1f}x")
+            results.append({'size': size, 'legacy': legacy_time, 'bulk': bulk_time,
+                             'legacy_writes': legacy_writes, 'bulk_writes': bulk_writes,
+                             'legacy_syscalls': legacy_syscalls,
+                             'bulk_syscalls': bulk_syscalls})
+
+    return results
+
+def make_quad_grid(quad_count):
+    """Build a roughly square grid of quads as (positions, PolygonVertexIndex stream)"""
+    side = max(1, int(math.sqrt(quad_count)))
+    rows = -(-quad_count // side)
+    y, x = np.mgrid[0:rows + 1, 0:side + 1]
+    positions = np.stack([x.ravel(), y.ravel(), np.sin(x.ravel() * 0.1)], axis=1).astype(np.float64)
+    
+    quads = np.arange(rows * side)[:quad_count]
+    row, col = quads // side, quads % side
+    corner = row * (side + 1) + col
+    stream = np.stack([corner, corner + 1, corner + side + 2, ~(corner + side + 1)], axis=1)
+    return positions, stream.ravel().astype(np.int32)
+
+def legacy_triangulate(positions, polygon_vertex_index):
+    """Per-polygon Python fan triangulation, as a polygon-at-a-time SDK loop would do it"""
+    triangles, polygon = [], []
+    for index in polygon_vertex_index.tolist():
+        polygon.append(~index if index < 0 else index)
+        if index < 0:
+            triangles.extend([polygon[0], polygon[i], polygon[i + 1]] for i in range(1, len(polygon) - 1))
+            polygon = []
+    return np.array(triangles, dtype=np.int32)
+
+def bench_triangulate(sizes):
+    """Compare bulk quad triangulation against a per-polygon loop"""
+    from mesh_processing import polygon_layout, triangulate_polygons
+    results = []
+    
+    def triangulate(positions, stream):
+        corners, polygon_sizes = polygon_layout(stream)
+        return corners[triangulate_polygons(positions, corners, polygon_sizes)]
+    
+    print(f"{'quads':>10} {'loop (s)':>12} {'bulk (s)':>12} {'speedup':>10}")
+    for size in sizes:
+        positions, stream = make_quad_grid(size)
+        loop_time = _best_time(legacy_triangulate, positions, stream, repeat=1)
+        bulk_time = _best_time(triangulate, positions, stream)
+        assert np.array_equal(triangulate(positions, stream), legacy_triangulate(positions, stream))
+        
+        print(f"{size:>10} {loop_time:>12.4f} {bulk_time:>12.4f} {loop_time / bulk_time:>9.1f}x")
+        results.append({'size': size, 'loop': loop_time, 'bulk': bulk_time})
+    
+    return results
+
+def make_grid_mesh(quad_count):
+    """A triangulated quad grid as a merged mesh dict, UV-mapped by its X/Y extent"""
+    from mesh_processing import polygon_layout, triangulate_polygons
+    from scene_reader import rigid_skin
+    positions, stream = make_quad_grid(quad_count)
+    corners, polygon_sizes = polygon_layout(stream)
+    triangles = corners[triangulate_polygons(positions, corners, polygon_sizes)]
+    uvs = positions[:, :2] / positions[:, :2].max(axis=0)
+    return {
+        'name': 'grid', 'vertices': positions, 'normals': np.zeros((0, 3)), 'uvs': uvs,
+        'triangles': triangles.astype(np.int32), 'triangle_corners': np.arange(triangles.size).reshape(-1, 3),
+        'corner_normals': np.zeros((triangles.size, 3)), 'corner_uvs': uvs[triangles].reshape(-1, 2),
+        'materials': [], 'transform': np.eye(4), 'skin': rigid_skin(None, len(positions))
+    }
+
+def bench_decimate(sizes):
+    """Time quadric decimation of quad grids down to the MDL budget"""
+    conv = _import_converter()
+    from mesh_decimation import decimate_mesh, count_wedges
+    results = []
+    
+    print(f"{'triangles':>10} {'time (s)':>12} {'vertices':>10} {'kept':>10} {'error':>10}")
+    for size in sizes:
+        mesh = make_grid_mesh(size)
+        seconds = _best_time(decimate_mesh, mesh, conv.MAX_VERTICES, conv.MAX_TRIANGLES, repeat=1)
+        decimated, error = decimate_mesh(mesh, conv.MAX_VERTICES, conv.MAX_TRIANGLES)
+        vertex_count = count_wedges(decimated)
+        assert vertex_count <= conv.MAX_VERTICES and len(decimated['triangles']) <= conv.MAX_TRIANGLES
+        
+        print(f"{len(mesh['triangles']):>10} {seconds:>12.4f} {vertex_count:>10} "
+              f"{len(decimated['triangles']):>10} {error:>10.4f}")
+        results.append({'size': size, 'seconds': seconds, 'triangles': len(decimated['triangles']), 'error': error})
+    
+    return results
+
+def bench_weld(sizes):
+    """Time welding quad grid corners into MDL vertices"""
+    conv = _import_converter()
+    from mesh_processing import weld_vertices
+    results = []
+    
+    print(f"{'corners':>10} {'time (s)':>12} {'per corner (us)':>16} {'vertices':>10}")
+    for size in sizes:
+        mesh = make_grid_mesh(size)
+        normal_indices = conv.quantize_normals(mesh['corner_normals'])
+        seconds = _best_time(weld_vertices, mesh, normal_indices, 256, 256)
+        welded = weld_vertices(mesh, normal_indices, 256, 256)
+        corner_count = mesh['triangles'].size
+        
+        print(f"{corner_count:>10} {seconds:>12.4f} {seconds / corner_count * 1e6:>16.3f} {len(welded['vertices']):>10}")
+        results.append({'size': size, 'seconds': seconds, 'vertices': len(welded['vertices'])})
+    
+    return results
+
+def bench_quantize(sizes):
+    """Compare per-texture adaptive quantization against the shared-palette engine
+
+    Ten models share the same four 256x256 textures. The legacy path runs
+    Pillow's adaptive quantizer on every texture of every model; the engine
+    builds one shared palette per model, reusing cached results.
+    """
+    from PIL import Image
+    from texture_quantization import TextureQuantizer
+    rng = np.random.default_rng(0)
+    y, x = np.mgrid[0:256, 0:256]
+    textures = [np.clip(np.stack([x, y, (x + y) // 2], axis=-1) * (i + 1) // 4 + rng.integers(0, 16, (256, 256, 3)),
+                        0, 255).astype(np.uint8) for i in range(4)]
+    models = 10
+
+    with tempfile.TemporaryDirectory() as tmp:
+        paths = []
+        for i, texture in enumerate(textures):
+            paths.append(os.path.join(tmp, f'skin{i}.png'))
+            Image.fromarray(texture).save(paths[-1])
+
+        def legacy():
+            for _ in range(models):
+                for path in paths:
+                    with Image.open(path) as img:
+                        img.convert('P', palette=Image.ADAPTIVE, colors=256).tobytes()
+
+        def engine():
+            quantizer = TextureQuantizer()
+            for _ in range(models):
+                palette = quantizer.build_palette(paths)
+                for path in paths:
+                    quantizer.quantize(path, palette)
+            return quantizer
+
+        legacy_time = _best_time(legacy, repeat=1)
+        engine_time = _best_time(engine, repeat=1)
+        quantizer = engine()
+
+    print(f"{'models x skins':>16} {'adaptive (s)':>14} {'shared (s)':>12} {'speedup':>10} {'decoded':>8} {'mapped':>8}")
+    print(f"{f'{models} x {len(paths)}':>16} {legacy_time:>14.4f} {engine_time:>12.4f} "
+          f"{legacy_time / engine_time:>9.1f}x {quantizer.decoded:>8} {quantizer.mapped:>8}")
+    return [{'models': models, 'skins': len(paths), 'adaptive': legacy_time, 'shared': engine_time}]
+
+def bench_textures(sizes):
+    """Compare texture processing before the geometry against the background texture jobs
+
+    A 10000-quad grid (decimated to the MDL budget) is written with four
+    1024x1024 skins, which are scaled down, palettized and quantized.
+    """
+    conv = _import_converter()
+    from PIL import Image
+    from texture_quantization import TextureQuantizer
+    rng = np.random.default_rng(0)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        materials = []
+        for i in range(4):
+            path = os.path.join(tmp, f'skin{i}.png')
+            Image.fromarray(rng.integers(0, 256, (1024, 1024, 3), dtype=np.uint8)).save(path)
+            materials.append({'name': f'skin{i}', 'diffuse_texture': path})
+
+        def write(sequential):
+            converter = conv.FBXToMDLConverter()
+            converter.textures = TextureQuantizer()  # no cached textures between runs
+            converter.meshes, converter.materials = [make_grid_mesh(10000)], materials
+            if sequential:
+                for job in converter.start_texture_jobs().values():
+                    job.result()
+            with contextlib.redirect_stdout(io.StringIO()):
+                converter.write_mdl_file(os.path.join(tmp, 'model.mdl'))
+            return converter
+
+        sequential_time = _best_time(write, True, repeat=1)
+        pipelined_time = _best_time(write, False, repeat=1)
+        timings = write(False).texture_timings
+
+    print(f"{'skins':>8} {'sequential (s)':>16} {'pipelined (s)':>14} {'speedup':>10} {'decode (s)':>11} {'quantize (s)':>13}")
+    print(f"{len(materials):>8} {sequential_time:>16.4f} {pipelined_time:>14.4f} {sequential_time / pipelined_time:>9.2f}x "
+          f"{sum(t['decode'] for t in timings):>11.4f} {sum(t['quantize'] for t in timings):>13.4f}")
+    return [{'skins': len(materials), 'sequential': sequential_time, 'pipelined': pipelined_time}]
+
+def measure_import_time(module='fbx_to_mdl_converter'):
+    """Import a module in a fresh interpreter under -X importtime
+
+    Returns (cumulative microseconds per imported module, set of all
+    imported module names).
+    """
+    import subprocess
+    script_dir = os.path.dirname(os.path.abspath(__file__))
+    env = dict(os.environ)
+    env.pop('PYTHONDONTWRITEBYTECODE', None)
+
+    # Warm up once so bytecode is cached, as it is for installed copies
+    command = [sys.executable, '-X', 'importtime', '-c', f'import {module}']
+    subprocess.run(command, cwd=script_dir, env=env, capture_output=True, check=True)
+    proc = subprocess.run(command, cwd=script_dir, env=env, capture_output=True, text=True, check=True)
+
+    cumulative = {}
+    for line in proc.stderr.splitlines():
+        if not line.startswith('import time:') or '|' not in line:
+            continue
+        fields = line[len('import time:'):].split('|')
+        if fields[0].strip().isdigit():
+            cumulative[fields[2].strip()] = int(fields[1])
+    return cumulative, set(cumulative)
+
+# Import budget for the converter module itself, excluding numpy (ms)
+IMPORT_BUDGET_MS = 50.0
+
+def bench_import(sizes):
+    """Measure module import time and check heavy backends stay unloaded"""
+    cumulative, modules = measure_import_time()
+    total_ms = cumulative['fbx_to_mdl_converter'] / 1000.0
+    numpy_ms = cumulative.get('numpy', 0) / 1000.0
+    own_ms = total_ms - numpy_ms
+
+    print(f"{'import fbx_to_mdl_converter':<32} {total_ms:>8.1f} ms")
+    print(f"{'  of which numpy':<32} {numpy_ms:>8.1f} ms")
+    print(f"{'  converter itself':<32} {own_ms:>8.1f} ms (budget {IMPORT_BUDGET_MS:.0f} ms)")
+
+    heavy = sorted(m for m in modules if m.split('.')[0] in ('fbx', 'FbxCommon', 'pyfbx', 'PIL'))
+    assert not heavy, f"heavy backends imported eagerly: {', '.join(heavy)}"
+    assert own_ms <= IMPORT_BUDGET_MS, f"converter import took {own_ms:.1f} ms"
+    return [{'total_ms': total_ms, 'numpy_ms': numpy_ms, 'own_ms': own_ms}]
+
+# Scales of the scaling benchmark; the largest are skipped with --quick
+SCALING_VERTEX_COUNTS = (100, 1000, 10000, 100000, 200000)
+SCALING_FRAME_COUNTS = (1, 16, 64, 256)
+SCALING_TEXTURE_SIZES = (64, 256, 1024, 4096)
+
+# The per-normal find_closest_normal_index() is only timed up to this many normals
+SCALING_NORMAL_CALLS = 10000
+
+def make_synthetic_texture(path, size, seed=0):
+    """Save a size x size PNG of smooth gradients plus noise, like a painted skin"""
+    from PIL import Image
+    rng = np.random.default_rng(seed)
+    y, x = np.mgrid[0:size, 0:size] * (256.0 / size)
+    gradient = np.stack([x, y, (x + y) / 2], axis=-1)
+    pixels = np.clip(gradient + rng.integers(0, 24, (size, size, 3)), 0, 255).astype(np.uint8)
+    Image.fromarray(pixels).save(path)
+
+def bench_scaling(sizes):
+    """Time the converter's stages across vertex, frame and texture scales
+
+    Vertex counts run from 100 to 200k, frame counts from 1 to 256 (on a
+    1000-vertex model) and textures from 64 to 4096 pixels square. Each
+    result is {'stage', one scale key, 'seconds'}.
+    """
+    conv = _import_converter()
+    from texture_quantization import TextureQuantizer
+    quick = max(sizes) < 100000
+    vertex_counts = [n for n in SCALING_VERTEX_COUNTS if not quick or n <= 10000]
+    texture_sizes = [n for n in SCALING_TEXTURE_SIZES if not quick or n <= 1024]
+    rng = np.random.default_rng(0)
+    results = []
+
+    def record(stage, scale, count, seconds):
+        print(f"{stage:<24} {scale:>10} {count:>10} {seconds:>12.4f}")
+        results.append({'stage': stage, scale: count, 'seconds': seconds})
+
+    print(f"{'stage':<24} {'scale':>10} {'count':>10} {'time (s)':>12}")
+    for count in vertex_counts:
+        converter = conv.FBXToMDLConverter()
+        normals = rng.normal(size=(count, 3))
+        if count <= SCALING_NORMAL_CALLS:
+            vectors = [conv.Vector3(*n) for n in normals]
+
+            def find_closest():
+                return [converter.find_closest_normal_index(v) for v in vectors]
+            record('find_closest_normal', 'vertices', count, _best_time(find_closest, repeat=1))
+        record('quantize_normals', 'vertices', count, _best_time(conv.quantize_normals, normals))
+
+        positions = [conv.Vector3(*p) for p in rng.uniform(-64.0, 64.0, size=(count, 3))]
+        scale, translate = conv.Vector3(0.5, 0.5, 0.5), conv.Vector3(-64.0, -64.0, -64.0)
+
+        def build_vertices():
+            return [conv.MDLVertex(p, 0, scale, translate) for p in positions]
+        record('mdl_vertex', 'vertices', count, _best_time(build_vertices, repeat=1))
+        record('mdl_frame_objects', 'vertices', count, _best_time(conv.MDLFrame, 'frame', build_vertices()))
+
+        converter, skins, texcoords, triangles, frames = make_synthetic_model(conv, count)
+        record('mdl_frame', 'vertices', count, _best_time(conv.MDLFrame, 'frame', frames[0].vertices))
+        args = (skins, conv.texcoords_to_array(texcoords), conv.triangles_to_array(triangles), frames, 64, 64)
+        with tempfile.TemporaryDirectory() as tmp:
+            record('write_mdl_binary', 'vertices', count,
+                   _best_time(converter._write_mdl_binary, os.path.join(tmp, 'model.mdl'), *args))
+
+            converter = conv.FBXToMDLConverter()
+            converter.meshes = [make_grid_mesh(count)]  # about one vertex per quad
+
+            def write():
+                with contextlib.redirect_stdout(io.StringIO()):
+                    converter.write_mdl_file(os.path.join(tmp, 'grid.mdl'))
+            record('write_mdl_file', 'vertices', count, _best_time(write, repeat=1 if count > 10000 else 3))
+
+    with tempfile.TemporaryDirectory() as tmp:
+        for count in SCALING_FRAME_COUNTS:
+            converter, skins, texcoords, triangles, frames = make_synthetic_model(conv, 1000, frame_count=count)
+            args = (skins, conv.texcoords_to_array(texcoords), conv.triangles_to_array(triangles), frames, 64, 64)
+            record('write_mdl_binary', 'frames', count,
+                   _best_time(converter._write_mdl_binary, os.path.join(tmp, 'model.mdl'), *args))
+
+        for size in texture_sizes:
+            texture_path = os.path.join(tmp, f'skin{size}.png')
+            make_synthetic_texture(texture_path, size)
+            converter = conv.FBXToMDLConverter()
+
+            def convert():
+                converter.textures = TextureQuantizer()  # no cached decode or mapping between runs
+                converter.convert_texture_to_8bit_indexed(texture_path, os.path.join(tmp, 'skin.bmp'))
+            record('convert_texture', 'texture_size', size, _best_time(convert, repeat=1 if size > 1024 else 3))
+
+    return results
+
+BENCHMARKS = {
+    'decimate': bench_decimate,
+    'import': bench_import,
+    'normals': bench_normals,
+    'quantize': bench_quantize,
+    'scaling': bench_scaling,
+    'textures': bench_textures,
+    'triangulate': bench_triangulate,
+    'weld': bench_weld,
+    'writer': bench_writer,
+}
+
+# Result fields that identify an entry (its scale), and fields holding the
+# converter's own timings; other timings belong to the legacy reference
+# implementations and are not checked for regressions
+SCALE_KEYS = ('stage', 'size', 'vertices', 'frames', 'texture_size', 'models', 'skins')
+TIMING_KEYS = ('seconds', 'batched', 'bulk', 'shared', 'pipelined', 'own_ms')
+
+def compare_results(baseline, current, threshold=0.25, min_seconds=0.005):
+    """Compare two {benchmark: results} dicts entry by entry
+
+    Entries are matched by their SCALE_KEYS fields. Returns one row per
+    compared timing: {'benchmark', 'entry', 'metric', 'baseline',
+    'current', 'ratio', 'regressed'}; a timing regressed when it is more
+    than `threshold` (a fraction) slower than the baseline. Timings below
+    min_seconds in both runs are too noisy to compare and are skipped.
+    """
+    rows = []
+    for name, results in current.items():
+        previous = {tuple((k, r[k]) for k in SCALE_KEYS if k in r): r for r in baseline.get(name, [])}
+        for result in results:
+            entry = tuple((k, result[k]) for k in SCALE_KEYS if k in result)
+            if entry not in previous:
+                continue
+            for metric in TIMING_KEYS:
+                old, new = previous[entry].get(metric), result.get(metric)
+                if old is None or new is None:
+                    continue
+                unit = 1000.0 if metric.endswith('_ms') else 1.0
+                if max(old, new) / unit < min_seconds:
+                    continue
+                ratio = new / old if old > 0 else float('inf')
+                rows.append({'benchmark': name, 'entry': dict(entry), 'metric': metric, 'baseline': old,
+                             'current': new, 'ratio': ratio, 'regressed': ratio > 1.0 + threshold})
+    return rows
+
+def print_comparison(rows):
+    """Print compare_results() rows as a table"""
+    print(f"{'benchmark':<12} {'entry':<44} {'metric':<10} {'baseline':>10} {'current':>10} {'change':>8}")
+    for row in rows:
+        entry = ', '.join(f"{k}={v}" for k, v in row['entry'].items())
+        flag = '  SLOWER' if row['regressed'] else ''
+        print(f"{row['benchmark']:<12} {entry:<44} {row['metric']:<10} {row['baseline']:>10.4f} "
+              f"{row['current']:>10.4f} {(row['ratio'] - 1) * 100:>+7.1f}%{flag}")
+
+def main():
+    """Run the selected benchmarks"""
+    parser = argparse.ArgumentParser(description='Benchmark the FBX to MDL converter')
+    parser.add_argument('benchmarks', nargs='*', help=f"Benchmarks to run: {', '.join(sorted(BENCHMARKS))} "
+                                                      f"(default: all, or those in the --compare baseline)")
+    parser.add_argument('--quick', action='store_true', help='Skip the largest input sizes')
+    parser.add_argument('--json', metavar='PATH', help='Save the results as JSON')
+    parser.add_argument('--compare', metavar='BASELINE_JSON',
+                        help='Compare against results saved with --json; exit with 1 if a stage got slower')
+    parser.add_argument('--threshold', type=float, default=0.25,
+                        help='Slowdown counted as a regression by --compare, as a fraction (default: 0.25)')
+    parser.add_argument('--min-seconds', type=float, default=0.005,
+                        help='Timings below this in both runs are not compared (default: 0.005)')
+
+    args = parser.parse_args()
+    unknown = set(args.benchmarks) - set(BENCHMARKS)
+    if unknown:
+        parser.error(f"unknown benchmark(s): {', '.join(sorted(unknown))}")
+    baseline = None
+    if args.compare:
+        with open(args.compare, 'r', encoding='utf-8') as f:
+            baseline = json.load(f)
+        if baseline['meta'].get('quick') != args.quick:
+            print(f"Warning: the baseline was {'' if baseline['meta'].get('quick') else 'not '}run with --quick")
+    sizes = (1000, 10000) if args.quick else (1000, 10000, 100000)
+
+    names = args.benchmarks or (sorted(baseline['benchmarks']) if baseline else sorted(BENCHMARKS))
+    results = {}
+    for name in names:
+        print("\n" + "="*50)
+        print(f"Benchmark: {name}")
+        print("="*50)
+        results[name] = BENCHMARKS[name](sizes)
+
+    if args.json:
+        report = {
+            'meta': {'python': platform.python_version(), 'numpy': np.__version__, 'platform': platform.platform(),
+                     'cpus': os.cpu_count(), 'quick': args.quick, 'time': time.strftime('%Y-%m-%dT%H:%M:%S')},
+            'benchmarks': results
+        }
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=2)
+        print(f"\nResults written to: {args.json}")
+
+    if baseline:
+        rows = compare_results(baseline['benchmarks'], results, args.threshold, args.min_seconds)
+        print("\n" + "="*50)
+        print(f"Comparison with {args.compare} (threshold {args.threshold:.0%})")
+        print("="*50)
+        print_comparison(rows)
+        regressions = [row for row in rows if row['regressed']]
+        if regressions:
+            print(f"\n{len(regressions)} timing(s) regressed by more than {args.threshold:.0%}")
+            return 1
+        print(f"\nNo regressions in {len(rows)} timing(s)")
+
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,211 @@
+#!/usr/bin/env python3
+"""
+Content-addressed conversion cache for the FBX to MDL Converter
+Stores converted outputs keyed by a hash of the input FBX, the texture files
+it references and the converter options/version, so unchanged assets can be
+re-emitted without loading the FBX SDK.
+
+Layout of the cache directory:
+    inputs/<input key>.json         textures referenced by an FBX + options
+    objects/<kk>/<key>/entry.json   cached entry metadata (mtime = last use)
+    objects/<kk>/<key>/<files>      cached MDL and texture outputs
+
+The input key covers the FBX content, options and converter version. The
+textures an FBX references are only known after loading it, so they are
+recorded under the input key when an entry is stored; a lookup hashes the
+recorded textures to derive the full key.
+"""
+
+import os
+import json
+import time
+import shutil
+import hashlib
+import tempfile
+from typing import List, Dict, Any, Optional
+
+DEFAULT_CACHE_SIZE = 2 * 1024 * 1024 * 1024  # 2 GB
+
+def hash_file(path: str, chunk_size: int = 1024 * 1024) -> Optional[str]:
+    """Return the SHA-256 hex digest of a file, or None if it cannot be read"""
+    digest = hashlib.sha256()
+    try:
+        with open(path, 'rb') as f:
+            for chunk in iter(lambda: f.read(chunk_size), b''):
+                digest.update(chunk)
+    except OSError:
+        return None
+    return digest.hexdigest()
+
+class ConversionCache:
+    """On-disk LRU cache of conversion outputs"""
+
+    def __init__(self, cache_dir: str, max_bytes: int = DEFAULT_CACHE_SIZE):
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._file_hashes = {}
+        os.makedirs(os.path.join(cache_dir, 'inputs'), exist_ok=True)
+        os.makedirs(os.path.join(cache_dir, 'objects'), exist_ok=True)
+
+    def _hash(self, path: str) -> Optional[str]:
+        """hash_file() memoized on path, size and modification time"""
+        try:
+            stat = os.stat(path)
+        except OSError:
+            return None
+        signature = (os.path.abspath(path), stat.st_size, stat.st_mtime_ns)
+        if signature not in self._file_hashes:
+            self._file_hashes[signature] = hash_file(path)
+        return self._file_hashes[signature]
+
+    def input_key(self, fbx_path: str, options: Dict[str, Any]) -> Optional[str]:
+        """Hash the FBX content together with the converter options"""
+        fbx_hash = self._hash(fbx_path)
+        if fbx_hash is None:
+            return None
+        payload = json.dumps({'fbx': fbx_hash, 'options': options}, sort_keys=True)
+        return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+    def entry_key(self, input_key: str, dependencies: List[str]) -> str:
+        """Hash the input key together with the content of every dependency"""
+        digest = hashlib.sha256(input_key.encode('ascii'))
+        for path in sorted(set(dependencies)):
+            digest.update(f"\0{path}\0{self._hash(path) or 'missing'}".encode('utf-8'))
+        return digest.hexdigest()
+
+    def _entry_dir(self, key: str) -> str:
+        return os.path.join(self.cache_dir, 'objects', key[:2], key)
+
+    def _inputs_path(self, input_key: str) -> str:
+        return os.path.join(self.cache_dir, 'inputs', input_key + '.json')
+
+    def lookup(self, fbx_path: str, options: Dict[str, Any]) -> Optional[str]:
+        """Return the key of a usable cached entry for this input, or None"""
+        input_key = self.input_key(fbx_path, options)
+        if input_key is None:
+            return None
+        try:
+            with open(self._inputs_path(input_key), 'r', encoding='utf-8') as f:
+                dependencies = json.load(f)['dependencies']
+        except (OSError, ValueError, KeyError, TypeError):
+            return None
+
+        key = self.entry_key(input_key, dependencies)
+        if os.path.exists(os.path.join(self._entry_dir(key), 'entry.json')):
+            return key
+        return None
+
+    def restore(self, key: str, mdl_path: str) -> List[str]:
+        """Copy a cached entry's outputs next to mdl_path and mark it as used
+
+        Side outputs named after the cached MDL (model.bmp, model_1.bmp)
+        are renamed after mdl_path. Returns the written paths. Raises
+        OSError if the entry disappeared (for example, evicted by another
+        process).
+        """
+        entry_dir = self._entry_dir(key)
+        with open(os.path.join(entry_dir, 'entry.json'), 'r', encoding='utf-8') as f:
+            entry = json.load(f)
+
+        output_dir = os.path.dirname(mdl_path) or '.'
+        os.makedirs(output_dir, exist_ok=True)
+        old_stem = os.path.splitext(entry['mdl'])[0]
+        new_stem = os.path.splitext(os.path.basename(mdl_path))[0]
+        written = []
+        for name in entry['files']:
+            suffix = name[len(old_stem):]
+            if name.startswith(old_stem) and suffix[:1] in ('.', '_'):
+                name_out = new_stem + suffix
+            else:
+                name_out = name
+            target = mdl_path if name == entry['mdl'] else os.path.join(output_dir, name_out)
+            shutil.copyfile(os.path.join(entry_dir, name), target)
+            written.append(target)
+
+        os.utime(os.path.join(entry_dir, 'entry.json'))
+        return written
+
+    def store(self, fbx_path: str, options: Dict[str, Any], dependencies: List[str],
+              mdl_path: str, side_outputs: List[str]) -> Optional[str]:
+        """Add a conversion's outputs to the cache and return the entry key"""
+        input_key = self.input_key(fbx_path, options)
+        if input_key is None:
+            return None
+        key = self.entry_key(input_key, dependencies)
+        entry_dir = self._entry_dir(key)
+
+        if not os.path.exists(entry_dir):
+            os.makedirs(os.path.dirname(entry_dir), exist_ok=True)
+            staging = tempfile.mkdtemp(dir=os.path.dirname(entry_dir), prefix='.tmp-')
+            try:
+                files = []
+                for path in [mdl_path] + [p for p in side_outputs if p != mdl_path]:
+                    name = os.path.basename(path)
+                    if name not in files and os.path.exists(path):
+                        shutil.copyfile(path, os.path.join(staging, name))
+                        files.append(name)
+                entry = {'mdl': os.path.basename(mdl_path), 'files': files, 'created': time.time(),
+                         'size': sum(os.path.getsize(os.path.join(staging, name)) for name in files)}
+                with open(os.path.join(staging, 'entry.json'), 'w', encoding='utf-8') as f:
+                    json.dump(entry, f)
+                os.rename(staging, entry_dir)
+            except OSError:
+                # Another process stored the same entry first
+                shutil.rmtree(staging, ignore_errors=True)
+
+        self._write_json(self._inputs_path(input_key), {'dependencies': sorted(set(dependencies))})
+        return key
+
+    def _write_json(self, path: str, data: Dict[str, Any]):
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), prefix='.tmp-')
+        with os.fdopen(fd, 'w', encoding='utf-8') as f:
+            json.dump(data, f)
+        os.replace(tmp_path, path)
+
+    def entries(self) -> List[Dict[str, Any]]:
+        """List cached entries with their size and last-use time"""
+        entries = []
+        objects_dir = os.path.join(self.cache_dir, 'objects')
+        for prefix in os.listdir(objects_dir):
+            prefix_dir = os.path.join(objects_dir, prefix)
+            for key in os.listdir(prefix_dir) if os.path.isdir(prefix_dir) else []:
+                entry_path = os.path.join(prefix_dir, key, 'entry.json')
+                try:
+                    with open(entry_path, 'r', encoding='utf-8') as f:
+                        size = json.load(f)['size']
+                    entries.append({'key': key, 'size': size, 'last_used': os.path.getmtime(entry_path)})
+                except (OSError, ValueError, KeyError):
+                    continue
+        return entries
+
+    def evict(self) -> int:
+        """Remove least recently used entries until the cache fits max_bytes"""
+        entries = sorted(self.entries(), key=lambda e: e['last_used'])
+        total = sum(e['size'] for e in entries)
+        evicted = 0
+        for entry in entries:
+            if total <= self.max_bytes:
+                break
+            shutil.rmtree(self._entry_dir(entry['key']), ignore_errors=True)
+            total -= entry['size']
+            evicted += 1
+        self.evictions += evicted
+        return evicted
+
+    def record(self, hit: bool):
+        """Count a lookup outcome in the statistics"""
+        if hit:
+            self.hits += 1
+        else:
+            self.misses += 1
+
+    def print_stats(self):
+        """Print hit/miss statistics and the current cache size"""
+        lookups = self.hits + self.misses
+        rate = 100.0 * self.hits / lookups if lookups else 0.0
+        size_mb = sum(e['size'] for e in self.entries()) / (1024 * 1024)
+        print(f"Cache: {self.hits} hit(s), {self.misses} miss(es) ({rate:.1f}% hit rate), "
+              f"{self.evictions} evicted, {size_mb:.1f} MB of {self.max_bytes / (1024 * 1024):.0f} MB used")
@@ -0,0 +1,155 @@
+#!/usr/bin/env python3
+"""
+Per-stage profiling for the FBX to MDL Converter
+A ConversionProfiler wraps every stage of a conversion (reader init, load,
+each detect_* step, merging, decimation, welding, frame quantization,
+texture assembly and the binary write) and records its wall time, the peak
+of memory traced by tracemalloc while it ran, and element counts:
+
+    with profiler.stage('detect_meshes') as stage:
+        converter.detect_meshes()
+        stage['counts']['meshes'] = len(converter.meshes)
+
+Stages may nest; a nested stage's time and memory are included in its
+parents'. A disabled profiler records nothing and costs one context
+manager per stage. Reports are plain dicts, written as JSON with --profile;
+aggregate_reports() combines the reports of a batch run.
+
+tracemalloc.reset_peak() needs Python 3.9; on older versions a stage's
+peak is the highest traced memory since profiling started, not since the
+stage began.
+"""
+
+import json
+import time
+import tracemalloc
+import contextlib
+from typing import List, Dict, Any, Iterable, Iterator
+
+class ConversionProfiler:
+    """Wall time, peak traced memory and element counts of the stages of one conversion"""
+
+    def __init__(self, enabled: bool = True, trace_memory: bool = True):
+        self.enabled = enabled
+        self.trace_memory = trace_memory and enabled
+        self.stages = []
+        self._open = []
+        self._owns_trace = False
+        self._start = None
+        self._elapsed = 0.0
+
+    def start(self):
+        """Begin profiling, starting tracemalloc unless it is already tracing"""
+        if self.trace_memory and not tracemalloc.is_tracing():
+            tracemalloc.start()
+            self._owns_trace = True
+        self._start = time.perf_counter()
+
+    def stop(self):
+        """End profiling; tracemalloc is stopped if start() started it"""
+        if self._start is not None:
+            self._elapsed = time.perf_counter() - self._start
+            self._start = None
+        if self._owns_trace:
+            tracemalloc.stop()
+            self._owns_trace = False
+
+    def _fold_peak(self):
+        """Credit the traced peak since the last stage boundary to every open stage"""
+        if self.trace_memory and tracemalloc.is_tracing():
+            peak = tracemalloc.get_traced_memory()[1]
+            for record in self._open:
+                record['peak_bytes'] = max(record['peak_bytes'], peak)
+            if hasattr(tracemalloc, 'reset_peak'):
+                tracemalloc.reset_peak()
+
+    @contextlib.contextmanager
+    def stage(self, name: str, **counts) -> Iterator[Dict[str, Any]]:
+        """Time the enclosed block as a stage; yields its record so counts can be added"""
+        record = {'name': name, 'depth': len(self._open), 'seconds': 0.0, 'peak_bytes': 0, 'counts': dict(counts)}
+        if not self.enabled:
+            yield record
+            return
+
+        self._fold_peak()
+        self.stages.append(record)
+        self._open.append(record)
+        start = time.perf_counter()
+        try:
+            yield record
+        finally:
+            record['seconds'] = time.perf_counter() - start
+            self._fold_peak()
+            self._open.remove(record)
+
+    def timed(self, name: str, items: Iterable, count: str = 'items') -> Iterable:
+        """Yield from items, recording the time spent producing them as a stage
+
+        For generators consumed inside another stage (such as streamed
+        animation frames inside the binary write): the stage's seconds are
+        only those spent in the generator, and no memory peak is taken.
+        """
+        if not self.enabled:
+            return items
+        record = {'name': name, 'depth': len(self._open), 'seconds': 0.0, 'peak_bytes': 0, 'counts': {count: 0}}
+        self.stages.append(record)
+        return self._timed(record, iter(items), count)
+
+    @staticmethod
+    def _timed(record: Dict[str, Any], iterator: Iterator, count: str) -> Iterator:
+        while True:
+            start = time.perf_counter()
+            try:
+                item = next(iterator)
+            except StopIteration:
+                return
+            finally:
+                record['seconds'] += time.perf_counter() - start
+            record['counts'][count] += 1
+            yield item
+
+    def report(self, **info) -> Dict[str, Any]:
+        """Profile report: the given info, total seconds, overall peak and every stage"""
+        elapsed = self._elapsed if self._start is None else time.perf_counter() - self._start
+        return dict(info, seconds=elapsed, peak_bytes=max((s['peak_bytes'] for s in self.stages), default=0),
+                    stages=[dict(s, counts=dict(s['counts'])) for s in self.stages])
+
+def aggregate_reports(reports: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """Combine per-file reports: per stage, the number of files, total/mean/max seconds,
+    max peak memory and summed counts, in order of first appearance
+    """
+    stages = {}
+    for report in reports:
+        for record in report['stages']:
+            total = stages.setdefault(record['name'], {'name': record['name'], 'depth': record['depth'], 'files': 0,
+                                                       'seconds': 0.0, 'max_seconds': 0.0, 'peak_bytes': 0,
+                                                       'counts': {}})
+            total['files'] += 1
+            total['seconds'] += record['seconds']
+            total['max_seconds'] = max(total['max_seconds'], record['seconds'])
+            total['peak_bytes'] = max(total['peak_bytes'], record['peak_bytes'])
+            for key, value in record['counts'].items():
+                total['counts'][key] = total['counts'].get(key, 0) + value
+    for total in stages.values():
+        total['mean_seconds'] = total['seconds'] / total['files']
+    return {
+        'files': len(reports),
+        'seconds': sum(report['seconds'] for report in reports),
+        'peak_bytes': max((report['peak_bytes'] for report in reports), default=0),
+        'stages': list(stages.values()),
+        'reports': reports
+    }
+
+def print_report(report: Dict[str, Any]):
+    """Print a report's (or aggregate's) stages as a table"""
+    print(f"{'Stage':<24} {'Time (ms)':>10} {'Peak (MB)':>10}  Counts")
+    for record in report['stages']:
+        counts = ', '.join(f"{key}={value}" for key, value in record['counts'].items())
+        print(f"{'  ' * record['depth'] + record['name']:<24} {record['seconds'] * 1000:>10.1f} "
+              f"{record['peak_bytes'] / (1024 * 1024):>10.2f}  {counts}")
+    print(f"{'total':<24} {report['seconds'] * 1000:>10.1f} {report['peak_bytes'] / (1024 * 1024):>10.2f}")
+
+def write_report(report: Dict[str, Any], path: str):
+    """Write a report as indented JSON"""
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(report, f, indent=2)
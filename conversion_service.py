@@ -0,0 +1,418 @@
+#!/usr/bin/env python3
+"""
+Local conversion service for the FBX to MDL Converter
+Runs a pool of worker processes, each holding a warm converter (scene
+reader and FBX SDK manager initialized once, at worker startup), behind a
+small JSON-over-HTTP API on localhost or a Unix socket:
+
+    python conversion_service.py --listen 127.0.0.1:8765 -j 4
+    python conversion_service.py --listen unix:/tmp/fbx2mdl.sock
+
+    POST   /jobs        {"input": "a.fbx", "output": "a.mdl", "priority": 0}  -> 202, job
+    GET    /jobs        all jobs
+    GET    /jobs/<id>   one job; ?wait=<seconds> blocks until it finishes
+    DELETE /jobs/<id>   cancel a queued job (409 once it has started)
+    GET    /metrics     queue depth, job counts, cache statistics and latency percentiles
+
+Jobs wait in a priority queue (higher priority first, then submission
+order) and are only handed to a worker when one is free, so queued jobs
+can still be reordered or cancelled. A job's status is 'queued',
+'running', 'ok', 'failed' or 'cancelled'. ServiceClient talks to a
+running service from Python.
+"""
+
+import os
+import sys
+import json
+import time
+import heapq
+import socket
+import argparse
+import threading
+import http.client
+import socketserver
+from collections import deque
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlsplit, parse_qs
+from typing import List, Dict, Any, Optional, Tuple
+
+# Finished jobs kept for status queries, and completed jobs kept for latency metrics
+MAX_FINISHED_JOBS = 1000
+LATENCY_WINDOW = 1000
+
+FINISHED_STATUSES = ('ok', 'failed', 'cancelled')
+
+def _warm_worker(converter_options: Dict[str, Any]):
+    """Pool initializer: create this worker's converter and its scene reader up front"""
+    from fbx_to_mdl_converter import _get_worker_converter
+    converter = _get_worker_converter(converter_options)
+    if converter.reader is None:
+        converter.initialize_reader()
+
+def percentiles(values: List[float]) -> Dict[str, float]:
+    """Mean, median, 95th percentile and maximum of a list of seconds (zeros if empty)"""
+    if not values:
+        return {'mean': 0.0, 'p50': 0.0, 'p95': 0.0, 'max': 0.0}
+    ordered = sorted(values)
+    pick = lambda q: ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+    return {'mean': sum(ordered) / len(ordered), 'p50': pick(0.5), 'p95': pick(0.95), 'max': ordered[-1]}
+
+class ConversionService:
+    """Priority queue of conversion jobs in front of a pool of warm worker processes"""
+
+    def __init__(self, workers: Optional[int] = None, converter_options: Optional[Dict[str, Any]] = None,
+                 create_qc: bool = False, cache_dir: Optional[str] = None, cache_size: Optional[int] = None):
+        self.workers = workers or os.cpu_count() or 1
+        self.converter_options = converter_options or {}
+        # Workers store entries through their own ConversionCache; this one
+        # counts their hits and misses and trims the shared directory
+        self.cache = None
+        if cache_dir:
+            from conversion_cache import ConversionCache, DEFAULT_CACHE_SIZE
+            cache_size = cache_size or DEFAULT_CACHE_SIZE
+            self.cache = ConversionCache(cache_dir, cache_size)
+        # Worker settings, as for batch_convert's workers (see _run_batch_job)
+        self.settings = {'create_qc': create_qc, 'verbose': False, 'cache_dir': cache_dir, 'cache_size': cache_size,
+                         'converter_options': self.converter_options}
+        self.jobs = {}
+        self._queue = []  # (-priority, sequence, job id)
+        self._finished = deque()
+        self._latencies = deque(maxlen=LATENCY_WINDOW)
+        self._sequence = 0
+        self._running = 0
+        self._restarts = 0
+        self._condition = threading.Condition()
+        self._evict_lock = threading.Lock()
+        self._stopping = False
+        self._executor = None
+        self._dispatcher = None
+
+    def start(self):
+        """Start the worker processes and the dispatcher thread"""
+        self._executor = self._create_executor()
+        self._dispatcher = threading.Thread(target=self._dispatch, name='dispatcher', daemon=True)
+        self._dispatcher.start()
+
+    def _create_executor(self):
+        from concurrent.futures import ProcessPoolExecutor
+        return ProcessPoolExecutor(max_workers=self.workers, initializer=_warm_worker,
+                                   initargs=(self.converter_options,))
+
+    def submit(self, fbx_path: str, mdl_path: Optional[str] = None, priority: int = 0) -> Dict[str, Any]:
+        """Queue a conversion; returns a copy of the new job"""
+        priority = int(priority)  # raises before a job id is taken
+        if not mdl_path:
+            mdl_path = os.path.splitext(fbx_path)[0] + '.mdl'
+        with self._condition:
+            self._sequence += 1
+            job = {'id': str(self._sequence), 'input': fbx_path, 'output': mdl_path, 'priority': priority,
+                   'status': 'queued', 'error': None, 'cache': None, 'submitted': time.time(),
+                   'started': None, 'finished': None, 'queue_seconds': None, 'seconds': None}
+            self.jobs[job['id']] = job
+            heapq.heappush(self._queue, (-job['priority'], self._sequence, job['id']))
+            self._condition.notify_all()
+            return dict(job)
+
+    def cancel(self, job_id: str) -> Optional[Dict[str, Any]]:
+        """Cancel a queued job; returns the job, or None if there is no such job
+
+        Jobs that are already running are not interrupted; their status
+        stays 'running'.
+        """
+        with self._condition:
+            job = self.jobs.get(job_id)
+            if job is None:
+                return None
+            if job['status'] == 'queued':
+                # Its queue entry is skipped when it comes up
+                self._finish(job, 'cancelled')
+            return dict(job)
+
+    def status(self, job_id: str, wait: float = 0.0) -> Optional[Dict[str, Any]]:
+        """Return a copy of a job, waiting up to wait seconds for it to finish"""
+        deadline = time.monotonic() + wait
+        with self._condition:
+            job = self.jobs.get(job_id)
+            while job is not None and job['status'] not in FINISHED_STATUSES:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                self._condition.wait(remaining)
+            return dict(job) if job is not None else None
+
+    def list_jobs(self) -> List[Dict[str, Any]]:
+        with self._condition:
+            return [dict(job) for job in self.jobs.values()]
+
+    def metrics(self) -> Dict[str, Any]:
+        """Queue depth, job counts by status, cache statistics and queue/run/total latency over recent jobs"""
+        with self._condition:
+            counts = {status: 0 for status in ('queued', 'running') + FINISHED_STATUSES}
+            for job in self.jobs.values():
+                counts[job['status']] += 1
+            latencies = list(self._latencies)
+            return {
+                'workers': self.workers,
+                'queue_depth': counts['queued'],
+                'running': self._running,
+                'jobs': counts,
+                'submitted': self._sequence,
+                'worker_restarts': self._restarts,
+                'cache': {'hits': self.cache.hits, 'misses': self.cache.misses,
+                          'evictions': self.cache.evictions} if self.cache else None,
+                'latency': {name: percentiles([entry[i] for entry in latencies])
+                            for i, name in enumerate(('queue_seconds', 'run_seconds', 'total_seconds'))}
+            }
+
+    def _finish(self, job: Dict[str, Any], status: str, error: Optional[str] = None):
+        """Mark a job finished (lock held) and forget the oldest finished jobs beyond MAX_FINISHED_JOBS"""
+        job['status'] = status
+        job['error'] = error
+        job['finished'] = time.time()
+        self._finished.append(job['id'])
+        while len(self._finished) > MAX_FINISHED_JOBS:
+            self.jobs.pop(self._finished.popleft(), None)
+        self._condition.notify_all()
+
+    def _dispatch(self):
+        """Hand the highest-priority queued job to the pool whenever a worker is free"""
+        from fbx_to_mdl_converter import _run_batch_job
+        while True:
+            with self._condition:
+                while not self._stopping and (self._running >= self.workers or not self._queue):
+                    self._condition.wait()
+                if self._stopping:
+                    return
+                _, _, job_id = heapq.heappop(self._queue)
+                job = self.jobs.get(job_id)
+                if job is None or job['status'] != 'queued':
+                    continue  # cancelled while queued
+                job['status'] = 'running'
+                job['started'] = time.time()
+                job['queue_seconds'] = job['started'] - job['submitted']
+                self._running += 1
+                executor = self._executor
+            try:
+                future = executor.submit(_run_batch_job, job['input'], job['output'], self.settings)
+            except RuntimeError as e:  # the pool broke or is shutting down
+                self._completed(job, executor, None, e)
+                continue
+            future.add_done_callback(lambda future, job=job, executor=executor:
+                                     self._completed(job, executor, future, None))
+
+    def _completed(self, job: Dict[str, Any], executor, future, error: Optional[Exception]):
+        """Record a finished job; a crashed worker pool is replaced"""
+        from concurrent.futures.process import BrokenProcessPool
+        result = None
+        broken = future is None  # submit() failed
+        if future is not None:
+            try:
+                result = future.result()
+            except BrokenProcessPool:
+                error = RuntimeError('worker process crashed')
+                broken = True
+            except Exception as e:
+                error = e
+        with self._condition:
+            self._running -= 1
+            if result is not None:
+                job['cache'] = result.get('cache')
+                if self.cache and job['cache']:
+                    self.cache.record(job['cache'] == 'hit')
+                self._finish(job, result['status'], result['error'])
+            else:
+                self._finish(job, 'failed', str(error) or type(error).__name__)
+            job['seconds'] = job['finished'] - job['started']
+            self._latencies.append((job['queue_seconds'], job['seconds'], job['finished'] - job['submitted']))
+
+            if broken and executor is self._executor and not self._stopping:
+                self._executor = self._create_executor()
+                self._restarts += 1
+                executor.shutdown(wait=False)
+
+        # A stored entry may have taken the cache over its size cap
+        if self.cache and job['cache'] == 'miss':
+            with self._evict_lock:
+                self.cache.evict()
+
+    def shutdown(self):
+        """Stop dispatching, cancel queued jobs and stop the workers after their current jobs"""
+        with self._condition:
+            self._stopping = True
+            for job in self.jobs.values():
+                if job['status'] == 'queued':
+                    self._finish(job, 'cancelled')
+            self._condition.notify_all()
+        if self._dispatcher:
+            self._dispatcher.join()
+        if self._executor:
+            self._executor.shutdown(wait=True)
+
+class ServiceRequestHandler(BaseHTTPRequestHandler):
+    """JSON API of a ConversionService (see the module docstring)"""
+
+    server_version = 'fbx2mdl'
+
+    def _send(self, status: int, body):
+        data = json.dumps(body).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def _job_id(self) -> Optional[str]:
+        parts = urlsplit(self.path).path.strip('/').split('/')
+        return parts[1] if len(parts) == 2 and parts[0] == 'jobs' else None
+
+    def do_GET(self):
+        service = self.server.service
+        url = urlsplit(self.path)
+        if url.path == '/metrics':
+            return self._send(200, service.metrics())
+        if url.path.rstrip('/') == '/jobs':
+            return self._send(200, service.list_jobs())
+        job_id = self._job_id()
+        if job_id is not None:
+            try:
+                wait = float(parse_qs(url.query).get('wait', ['0'])[0])
+            except ValueError:
+                return self._send(400, {'error': 'wait must be a number of seconds'})
+            job = service.status(job_id, wait)
+            return self._send(200, job) if job else self._send(404, {'error': f'no job {job_id}'})
+        self._send(404, {'error': f'unknown path {url.path}'})
+
+    def do_POST(self):
+        if urlsplit(self.path).path.rstrip('/') != '/jobs':
+            return self._send(404, {'error': f'unknown path {self.path}'})
+        try:
+            request = json.loads(self.rfile.read(int(self.headers.get('Content-Length', 0))) or b'{}')
+            job = self.server.service.submit(request['input'], request.get('output'), request.get('priority', 0))
+        except (ValueError, KeyError, TypeError) as e:
+            return self._send(400, {'error': f'expected {{"input", "output", "priority"}}: {e}'})
+        self._send(202, job)
+
+    def do_DELETE(self):
+        job_id = self._job_id()
+        job = self.server.service.cancel(job_id) if job_id else None
+        if job is None:
+            return self._send(404, {'error': f'no job {job_id}'})
+        self._send(200 if job['status'] == 'cancelled' else 409, job)
+
+    def address_string(self) -> str:
+        return self.client_address[0] if self.client_address else 'unix'
+
+    def log_message(self, format, *args):
+        if self.server.verbose:
+            super().log_message(format, *args)
+
+# Listen backlog; socketserver's default of 5 refuses bursts of concurrent
+# clients on Unix sockets (connect() fails with EAGAIN instead of waiting)
+REQUEST_QUEUE_SIZE = 128
+
+class TCPHTTPServer(ThreadingHTTPServer):
+    request_queue_size = REQUEST_QUEUE_SIZE
+
+class UnixHTTPServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    """ThreadingHTTPServer's counterpart on a Unix socket"""
+    daemon_threads = True
+    request_queue_size = REQUEST_QUEUE_SIZE
+
+def create_server(address: str, service: ConversionService, verbose: bool = False):
+    """Bind the HTTP API to 'host:port' or 'unix:/path/to/socket'"""
+    if address.startswith('unix:'):
+        path = address[len('unix:'):]
+        if os.path.exists(path):
+            os.unlink(path)
+        server = UnixHTTPServer(path, ServiceRequestHandler)
+    else:
+        host, _, port = address.rpartition(':')
+        server = TCPHTTPServer((host or '127.0.0.1', int(port)), ServiceRequestHandler)
+    server.service = service
+    server.verbose = verbose
+    return server
+
+class _UnixHTTPConnection(http.client.HTTPConnection):
+    def __init__(self, path: str, timeout: Optional[float] = None):
+        super().__init__('localhost', timeout=timeout)
+        self._path = path
+
+    def connect(self):
+        self.sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self.sock.settimeout(self.timeout)
+        self.sock.connect(self._path)
+
+class ServiceClient:
+    """Client of a running conversion service at 'host:port' or 'unix:/path'"""
+
+    def __init__(self, address: str, timeout: float = 60.0):
+        self.address = address
+        self.timeout = timeout
+
+    def _request(self, method: str, path: str, body=None) -> Tuple[int, Any]:
+        if self.address.startswith('unix:'):
+            connection = _UnixHTTPConnection(self.address[len('unix:'):], self.timeout)
+        else:
+            host, _, port = self.address.rpartition(':')
+            connection = http.client.HTTPConnection(host or '127.0.0.1', int(port), timeout=self.timeout)
+        try:
+            data = json.dumps(body).encode('utf-8') if body is not None else None
+            connection.request(method, path, body=data, headers={'Content-Type': 'application/json'})
+            response = connection.getresponse()
+            return response.status, json.loads(response.read() or b'null')
+        finally:
+            connection.close()
+
+    def submit(self, fbx_path: str, mdl_path: Optional[str] = None, priority: int = 0) -> Dict[str, Any]:
+        return self._request('POST', '/jobs', {'input': fbx_path, 'output': mdl_path, 'priority': priority})[1]
+
+    def status(self, job_id: str, wait: float = 0.0) -> Dict[str, Any]:
+        return self._request('GET', f'/jobs/{job_id}?wait={wait}')[1]
+
+    def cancel(self, job_id: str) -> Dict[str, Any]:
+        return self._request('DELETE', f'/jobs/{job_id}')[1]
+
+    def metrics(self) -> Dict[str, Any]:
+        return self._request('GET', '/metrics')[1]
+
+def main():
+    """Run the conversion service until interrupted"""
+    parser = argparse.ArgumentParser(description='Serve FBX to MDL conversions from a pool of warm workers')
+    parser.add_argument('--listen', default='127.0.0.1:8765',
+                        help="Address to serve on: host:port or unix:/path/to/socket (default: 127.0.0.1:8765)")
+    parser.add_argument('--jobs', '-j', type=int, default=None, help='Worker processes (default: CPU count)')
+    parser.add_argument('--fps', type=float, default=None, help='Animation sampling rate (converter default if unset)')
+    parser.add_argument('--backend', choices=['auto', 'sdk', 'binary'], default='auto',
+                        help='Scene reader backend (default: auto)')
+    parser.add_argument('--create-qc', action='store_true', help='Create a sample QC file next to each output')
+    parser.add_argument('--cache-dir', help='Reuse outputs of unchanged inputs from this conversion cache')
+    parser.add_argument('--cache-size', type=int, default=2048, help='Conversion cache size cap in MB (default: 2048)')
+    parser.add_argument('--incremental', action='store_true',
+                        help='Only recompute the MDL sections whose inputs changed since the last conversion')
+    parser.add_argument('--verbose', '-v', action='store_true', help='Log every request')
+
+    args = parser.parse_args()
+    converter_options = {'backend': args.backend, 'incremental': args.incremental}
+    if args.fps is not None:
+        converter_options['fps'] = args.fps
+    if args.cache_dir:
+        converter_options['texture_cache_dir'] = os.path.join(args.cache_dir, 'textures')
+
+    service = ConversionService(args.jobs, converter_options, args.create_qc, args.cache_dir,
+                                args.cache_size * 1024 * 1024)
+    service.start()
+    server = create_server(args.listen, service, args.verbose)
+    print(f"Serving conversions on {args.listen} with {service.workers} worker(s) (Ctrl+C to stop)")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        print("\nShutting down")
+    finally:
+        server.server_close()
+        service.shutdown()
+        if args.listen.startswith('unix:') and os.path.exists(args.listen[len('unix:'):]):
+            os.unlink(args.listen[len('unix:'):])
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
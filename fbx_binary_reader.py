@@ -0,0 +1,545 @@
+#!/usr/bin/env python3
+"""
+Binary FBX scene reader for the FBX to MDL Converter
+Reads binary FBX files (versions 7.x) without the Autodesk FBX SDK. The file
+is memory-mapped and its node-record tree indexed by offset; a record's
+properties are only decoded when asked for. Array properties, raw or
+zlib-compressed, are decoded straight into NumPy arrays with np.frombuffer,
+so vertex, index, normal and UV data never pass through Python lists, and
+memory use follows the meshes exported rather than the file size.
+
+Only what the converter exports is interpreted: mesh geometry and its
+normal/UV layers, model transforms, skin clusters, limb nodes, materials
+with their diffuse textures and animation stack time spans. Animation curves
+are not evaluated; use the SDK backend to sample animations.
+"""
+
+import os
+import math
+import mmap
+import zlib
+import struct
+from typing import List, Dict, Any, Tuple, Optional
+
+import numpy as np
+
+from scene_reader import SceneReader, SceneWalker, MaterialRegistry, normalize_influences, rigid_skin
+from mesh_processing import polygon_layout, triangulate_polygons, corner_attribute, triangle_material_slots
+
+FBX_BINARY_MAGIC = b'Kaydara FBX Binary  \x00'
+FBX_HEADER_SIZE = 27  # magic, 0x1a 0x00, uint32 version
+
+# FBX time values (KTime) count 1/46186158000ths of a second
+KTIME_PER_SECOND = 46186158000
+
+# Node record header: end offset, property count, property list length, name
+# length. Files from version 7500 on use 64-bit offsets and counts.
+FBX_RECORD_HEADER = struct.Struct('<IIIB')
+FBX_RECORD_HEADER_64 = struct.Struct('<QQQB')
+FBX_ARRAY_HEADER = struct.Struct('<III')  # element count, encoding, byte length
+FBX_LENGTH = struct.Struct('<I')
+
+FBX_SCALAR_TYPES = {
+    ord('Y'): struct.Struct('<h'), ord('C'): struct.Struct('<?'), ord('I'): struct.Struct('<i'),
+    ord('F'): struct.Struct('<f'), ord('D'): struct.Struct('<d'), ord('L'): struct.Struct('<q'),
+}
+FBX_ARRAY_TYPES = {
+    ord('f'): np.dtype('<f4'), ord('d'): np.dtype('<f8'), ord('l'): np.dtype('<i8'),
+    ord('i'): np.dtype('<i4'), ord('b'): np.dtype('u1'),
+}
+
+# EFbxRotationOrder: the first axis named is applied first
+FBX_ROTATION_ORDERS = ('XYZ', 'XZY', 'YZX', 'YXZ', 'ZXY', 'ZYX')
+
+# Model subclasses that are skeleton nodes
+SKELETON_MODEL_TYPES = ('LimbNode', 'Limb', 'Root')
+
+class FBXNode:
+    """A node record, indexed by offset and decoded on first access
+
+    Indexing a record only reads its header. Its properties are decoded
+    when .properties is first read and its child records are indexed when
+    .children is first read, so records nobody asks for (animation curves,
+    embedded media) never have their arrays decompressed or copied.
+    """
+    __slots__ = ('name', '_data', '_header', '_property_offset', '_property_count',
+                 '_children_offset', '_end', '_properties', '_children')
+
+    def __init__(self, name: str, data: memoryview, header: struct.Struct, property_offset: int,
+                 property_count: int, children_offset: int, end: int):
+        self.name = name
+        self._data = data
+        self._header = header
+        self._property_offset = property_offset
+        self._property_count = property_count
+        self._children_offset = children_offset
+        self._end = end
+        self._properties = None
+        self._children = None
+
+    @property
+    def properties(self) -> List[Any]:
+        if self._properties is None:
+            properties = []
+            offset = self._property_offset
+            for _ in range(self._property_count):
+                value, offset = _parse_property(self._data, offset)
+                properties.append(value)
+            self._properties = properties
+        return self._properties
+
+    @property
+    def children(self) -> List['FBXNode']:
+        if self._children is None:
+            self._children = _index_records(self._data, self._children_offset, self._end, self._header)
+        return self._children
+
+    def find(self, name: str) -> Optional['FBXNode']:
+        """Return the first child record with the given name"""
+        for child in self.children:
+            if child.name == name:
+                return child
+        return None
+
+    def find_all(self, name: str) -> List['FBXNode']:
+        """Return every child record with the given name"""
+        return [child for child in self.children if child.name == name]
+
+    def get(self, name: str, default=None):
+        """Return the first property of the first child record with the given name"""
+        child = self.find(name)
+        return child.properties[0] if child is not None and child.properties else default
+
+def is_binary_fbx(path: str) -> bool:
+    """Check whether a file starts with the binary FBX magic"""
+    try:
+        with open(path, 'rb') as f:
+            return f.read(len(FBX_BINARY_MAGIC)) == FBX_BINARY_MAGIC
+    except OSError:
+        return False
+
+def _parse_property(data: memoryview, offset: int) -> Tuple[Any, int]:
+    """Decode the property at offset and return it with the next offset"""
+    code = data[offset]
+    offset += 1
+
+    scalar = FBX_SCALAR_TYPES.get(code)
+    if scalar is not None:
+        return scalar.unpack_from(data, offset)[0], offset + scalar.size
+
+    dtype = FBX_ARRAY_TYPES.get(code)
+    if dtype is not None:
+        count, encoding, length = FBX_ARRAY_HEADER.unpack_from(data, offset)
+        offset += FBX_ARRAY_HEADER.size
+        if encoding == 1:
+            array = np.frombuffer(zlib.decompress(data[offset:offset + length]), dtype, count)
+        else:
+            array = np.frombuffer(data, dtype, count, offset)
+        return array, offset + length
+
+    if code in (ord('S'), ord('R')):
+        length = FBX_LENGTH.unpack_from(data, offset)[0]
+        offset += FBX_LENGTH.size
+        raw = bytes(data[offset:offset + length])
+        return (raw.decode('utf-8', 'replace') if code == ord('S') else raw), offset + length
+
+    raise ValueError(f"Unknown FBX property type {chr(code)!r} at offset {offset - 1}")
+
+def _index_records(data: memoryview, offset: int, end: int, header: struct.Struct) -> List[FBXNode]:
+    """Index the sibling records between offset and end, up to a null record
+
+    Only record headers and names are read; property lists and child
+    records are skipped using the offsets in each header.
+    """
+    nodes = []
+    while offset + header.size <= end:
+        record_end, property_count, property_length, name_length = header.unpack_from(data, offset)
+        if record_end == 0:
+            break
+        name_offset = offset + header.size
+        property_offset = name_offset + name_length
+        name = bytes(data[name_offset:property_offset]).decode('ascii', 'replace')
+        nodes.append(FBXNode(name, data, header, property_offset, property_count,
+                             property_offset + property_length, record_end))
+        offset = record_end
+    return nodes
+
+def parse_fbx(data) -> Tuple[int, List[FBXNode]]:
+    """Index a binary FBX document into (version, top-level node records)
+
+    data may be bytes or an mmap. Records decode lazily from it, and
+    uncompressed array properties are views into it, so it must stay alive
+    (and unmodified) as long as records or arrays are used.
+    """
+    data = memoryview(data)
+    if bytes(data[:len(FBX_BINARY_MAGIC)]) != FBX_BINARY_MAGIC:
+        raise ValueError("Not a binary FBX file (ASCII FBX needs the SDK backend)")
+
+    version = FBX_LENGTH.unpack_from(data, len(FBX_BINARY_MAGIC) + 2)[0]
+    if version < 7000:
+        raise ValueError(f"Unsupported binary FBX version {version} (7.x is supported)")
+    header = FBX_RECORD_HEADER_64 if version >= 7500 else FBX_RECORD_HEADER
+    return version, _index_records(data, FBX_HEADER_SIZE, len(data), header)
+
+def euler_to_matrix(angles, order: int = 0) -> np.ndarray:
+    """Build a 3x3 rotation matrix from Euler angles in degrees (EFbxRotationOrder)"""
+    x, y, z = np.radians(np.asarray(angles, dtype=np.float64))
+    axes = {
+        'X': np.array([[1, 0, 0], [0, math.cos(x), -math.sin(x)], [0, math.sin(x), math.cos(x)]]),
+        'Y': np.array([[math.cos(y), 0, math.sin(y)], [0, 1, 0], [-math.sin(y), 0, math.cos(y)]]),
+        'Z': np.array([[math.cos(z), -math.sin(z), 0], [math.sin(z), math.cos(z), 0], [0, 0, 1]]),
+    }
+    sequence = FBX_ROTATION_ORDERS[order] if 0 <= order < len(FBX_ROTATION_ORDERS) else 'XYZ'
+    matrix = np.eye(3)
+    for axis in sequence:
+        matrix = axes[axis] @ matrix
+    return matrix
+
+def decompose_matrix(matrix: np.ndarray) -> Dict[str, List[float]]:
+    """Split a 4x4 transform into translation, XYZ Euler rotation (degrees) and scaling"""
+    basis = matrix[:3, :3]
+    scaling = np.linalg.norm(basis, axis=0)
+    if np.linalg.det(basis) < 0:
+        scaling[0] = -scaling[0]
+    rotation = basis / np.where(scaling != 0, scaling, 1.0)
+
+    sin_y = -rotation[2, 0]
+    if abs(sin_y) < 1.0 - 1e-9:
+        angles = (math.atan2(rotation[2, 1], rotation[2, 2]), math.asin(sin_y),
+                  math.atan2(rotation[1, 0], rotation[0, 0]))
+    else:  # gimbal lock: fold Z into X
+        angles = (math.atan2(-rotation[1, 2], rotation[1, 1]), math.copysign(math.pi / 2, sin_y), 0.0)
+
+    return {
+        'translation': [float(v) for v in matrix[:3, 3]],
+        'rotation': [math.degrees(a) for a in angles],
+        'scaling': [float(v) for v in scaling]
+    }
+
+def _translation(vector) -> np.ndarray:
+    matrix = np.eye(4)
+    matrix[:3, 3] = vector
+    return matrix
+
+def _scaling(vector) -> np.ndarray:
+    return np.diag([vector[0], vector[1], vector[2], 1.0])
+
+def _rotation(angles, order: int = 0) -> np.ndarray:
+    matrix = np.eye(4)
+    matrix[:3, :3] = euler_to_matrix(angles, order)
+    return matrix
+
+class BinaryFBXSceneReader(SceneReader):
+    """Scene reader that parses binary FBX files directly"""
+    name = 'binary'
+    supports_animation = False
+
+    def __init__(self):
+        self.version = None
+        self.filepath = None
+        self._data = None
+        self._objects = {}
+        self._sources = {}
+        self._global_settings = {}
+        self._models = None
+        self._nodes = []
+        self._materials = MaterialRegistry()
+
+    def load(self, filepath: str):
+        """Map the file into memory and index its objects and connections
+
+        Only the records needed to resolve objects and connections are
+        decoded here; geometry arrays are decoded when a mesh is read, and
+        pages of the file that are never read are never loaded.
+        """
+        self.unload()
+        with open(filepath, 'rb') as f:
+            try:
+                self._data = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            except ValueError:  # empty files cannot be mapped
+                self._data = b''
+        self.version, nodes = parse_fbx(self._data)
+        self.filepath = filepath
+
+        top_level = {node.name: node for node in nodes}
+        objects = top_level.get('Objects')
+        self._objects = {node.properties[0]: node for node in objects.children
+                         if node.properties} if objects else {}
+
+        # Objects connect as source -> destination; 0 is the scene root
+        self._sources = {}
+        connections = top_level.get('Connections')
+        for connection in connections.find_all('C') if connections else []:
+            source, destination = connection.properties[1:3]
+            attribute = connection.properties[3] if len(connection.properties) > 3 else None
+            self._sources.setdefault(destination, []).append((source, attribute))
+
+        settings = top_level.get('GlobalSettings')
+        self._global_settings = self._properties(settings) if settings else {}
+
+    def unload(self):
+        self.version = None
+        self.filepath = None
+        self._objects = {}
+        self._sources = {}
+        self._global_settings = {}
+        self._models = None
+        self._nodes = []
+        self._materials = MaterialRegistry()
+        if isinstance(self._data, mmap.mmap):
+            try:
+                self._data.close()
+            except BufferError:
+                pass  # arrays still view the mapping; it closes once they are freed
+        self._data = None
+
+    @staticmethod
+    def _name(node: FBXNode) -> str:
+        """Object name without the '\\x00\\x01Class' suffix binary FBX appends"""
+        return node.properties[1].split('\x00\x01')[0]
+
+    @staticmethod
+    def _properties(node: FBXNode) -> Dict[str, List[Any]]:
+        """Properties70 values by name (each 'P' record is name, type, label, flags, values...)"""
+        properties = node.find('Properties70')
+        if properties is None:
+            return {}
+        return {p.properties[0]: p.properties[4:] for p in properties.find_all('P') if p.properties}
+
+    def _connected(self, object_id, record: str, subclass: Optional[str] = None,
+                   attribute: Optional[str] = None) -> List[Tuple[int, FBXNode]]:
+        """Objects of a record type connected into object_id, in connection order"""
+        connected = []
+        for source, source_attribute in self._sources.get(object_id, []):
+            node = self._objects.get(source)
+            if node is None or node.name != record:
+                continue
+            if subclass is not None and (len(node.properties) < 3 or node.properties[2] != subclass):
+                continue
+            if attribute is not None and source_attribute != attribute:
+                continue
+            connected.append((source, node))
+        return connected
+
+    def _attribute_type(self, model_id) -> Optional[str]:
+        """Node table attribute type of a model, from its Model subclass"""
+        node = self._objects[model_id]
+        subclass = node.properties[2] if len(node.properties) > 2 else None
+        if subclass == 'Mesh':
+            return 'mesh'
+        return 'skeleton' if subclass in SKELETON_MODEL_TYPES else None
+
+    def _walk_models(self) -> List[Tuple[int, Optional[int]]]:
+        """List (model id, parent model id) depth-first from the scene root
+
+        The hierarchy is walked once per loaded file; the node table is
+        recorded on the same pass.
+        """
+        if self._models is None:
+            order = []
+            walker = SceneWalker(children=lambda model_id: [child for child, _ in self._connected(model_id, 'Model')],
+                                 name=lambda model_id: self._name(self._objects[model_id]),
+                                 attribute=self._attribute_type)
+            walker.register(lambda model_id, index: order.append(model_id))
+            self._nodes = walker.walk(model_id for model_id, _ in self._connected(0, 'Model'))
+            self._models = [(model_id, order[node['parent']] if node['parent'] >= 0 else None)
+                            for model_id, node in zip(order, self._nodes)]
+        return self._models
+
+    def read_nodes(self) -> List[Dict[str, Any]]:
+        self._walk_models()
+        return self._nodes
+
+    def _local_transform(self, node: FBXNode) -> np.ndarray:
+        """Model-to-parent matrix from the Lcl properties, rotation and scaling pivots"""
+        props = self._properties(node)
+        vector = lambda name, default: np.array(props.get(name, default)[:3], dtype=np.float64)
+        order = int(props.get('RotationOrder', [0])[0])
+
+        rotation = _rotation(vector('Lcl Rotation', (0, 0, 0)), order)
+        if props.get('RotationActive', [0])[0]:
+            rotation = (_rotation(vector('PreRotation', (0, 0, 0)))
+                        @ rotation @ np.linalg.inv(_rotation(vector('PostRotation', (0, 0, 0)))))
+
+        rotation_pivot = vector('RotationPivot', (0, 0, 0))
+        scaling_pivot = vector('ScalingPivot', (0, 0, 0))
+        return (_translation(vector('Lcl Translation', (0, 0, 0)))
+                @ _translation(vector('RotationOffset', (0, 0, 0)))
+                @ _translation(rotation_pivot) @ rotation @ _translation(-rotation_pivot)
+                @ _translation(vector('ScalingOffset', (0, 0, 0)))
+                @ _translation(scaling_pivot) @ _scaling(vector('Lcl Scaling', (1, 1, 1)))
+                @ _translation(-scaling_pivot))
+
+    def _global_transforms(self) -> Dict[int, np.ndarray]:
+        """Global matrices (column vectors) of every model in the hierarchy"""
+        transforms = {}
+        for model_id, parent_id in self._walk_models():
+            local = self._local_transform(self._objects[model_id])
+            transforms[model_id] = local if parent_id is None else transforms[parent_id] @ local
+        return transforms
+
+    def read_meshes(self) -> List[Dict[str, Any]]:
+        meshes = []
+        transforms = self._global_transforms()
+        for model_id, _ in self._walk_models():
+            for geometry_id, geometry in self._connected(model_id, 'Geometry', 'Mesh'):
+                meshes.append(self._read_mesh(geometry_id, geometry, model_id, transforms[model_id]))
+        return meshes
+
+    def _read_mesh(self, geometry_id, geometry: FBXNode, model_id, transform: np.ndarray) -> Dict[str, Any]:
+        """Build a mesh dict from a Geometry record"""
+        mesh_data = {
+            'name': self._name(self._objects[model_id]),
+            'vertices': np.zeros((0, 3)),
+            'normals': np.zeros((0, 3)),
+            'uvs': np.zeros((0, 2)),
+            'triangles': np.zeros((0, 3), dtype=np.int32),
+            'materials': []
+        }
+
+        vertices = geometry.get('Vertices')
+        if vertices is not None and len(vertices):
+            mesh_data['vertices'] = vertices.astype(np.float64, copy=False).reshape(-1, 3)
+
+        corners, sizes = polygon_layout(geometry.get('PolygonVertexIndex', np.zeros(0, dtype=np.int32)))
+        triangle_corners = triangulate_polygons(mesh_data['vertices'], corners, sizes)
+        mesh_data['triangles'] = corners[triangle_corners].astype(np.int32)
+        mesh_data['triangle_corners'] = triangle_corners
+        mesh_data['corner_normals'] = np.zeros((0, 3))
+        mesh_data['corner_uvs'] = np.zeros((0, 2))
+
+        layer = geometry.find('LayerElementNormal')
+        normals = layer.get('Normals') if layer is not None else None
+        if normals is not None and len(normals):
+            mesh_data['normals'] = normals.astype(np.float64, copy=False).reshape(-1, 3)
+            mesh_data['corner_normals'] = corner_attribute(
+                mesh_data['normals'], 3, layer.get('MappingInformationType', 'ByControlPoint'),
+                layer.get('ReferenceInformationType', 'Direct'), corners, sizes, layer.get('NormalsIndex'))
+
+        layer = geometry.find('LayerElementUV')
+        uvs = layer.get('UV') if layer is not None else None
+        if uvs is not None and len(uvs):
+            uv_array = uvs.astype(np.float64).reshape(-1, 2)
+            uv_array[:, 1] = 1.0 - uv_array[:, 1]  # Flip V coordinate
+            mesh_data['uvs'] = uv_array
+            mesh_data['corner_uvs'] = corner_attribute(
+                uv_array, 2, layer.get('MappingInformationType', 'ByPolygonVertex'),
+                layer.get('ReferenceInformationType', 'IndexToDirect'), corners, sizes, layer.get('UVIndex'))
+
+        mesh_data['materials'] = self._material_indices(model_id)
+        layer = geometry.find('LayerElementMaterial')
+        slots = triangle_material_slots(
+            layer.get('Materials') if layer is not None else None,
+            layer.get('MappingInformationType', 'AllSame') if layer is not None else 'AllSame',
+            triangle_corners, sizes, len(mesh_data['materials']))
+        mesh_data['triangle_materials'] = np.array(mesh_data['materials'] + [-1], dtype=np.int64)[slots]
+
+        mesh_data['transform'] = transform
+        mesh_data['skin'] = self._read_skin(geometry_id, model_id, len(mesh_data['vertices']))
+        return mesh_data
+
+    def _read_skin(self, geometry_id, model_id, vertex_count: int) -> Dict[str, Any]:
+        """Read skin clusters as link model ids, bind matrices and influences"""
+        links, bind_matrices = [], []
+        vertex_ids, cluster_ids, weights = [], [], []
+
+        for skin_id, _ in self._connected(geometry_id, 'Deformer', 'Skin'):
+            for cluster_id, cluster in self._connected(skin_id, 'Deformer', 'Cluster'):
+                link = self._connected(cluster_id, 'Model')
+                indexes, cluster_weights = cluster.get('Indexes'), cluster.get('Weights')
+                if not link or indexes is None or not len(indexes):
+                    continue
+
+                transform = cluster.get('Transform', np.eye(4).ravel()).reshape(4, 4).T
+                transform_link = cluster.get('TransformLink', np.eye(4).ravel()).reshape(4, 4).T
+                bind_matrices.append(np.linalg.inv(transform_link) @ transform)
+
+                vertex_ids.append(indexes.astype(np.int64))
+                weights.append(cluster_weights.astype(np.float64) if cluster_weights is not None
+                               else np.ones(len(indexes)))
+                cluster_ids.append(np.full(len(indexes), len(links), dtype=np.int64))
+                links.append(link[0][0])
+
+        if not links:
+            return rigid_skin(model_id, vertex_count)
+
+        vertex_ids = np.concatenate(vertex_ids)
+        valid = (vertex_ids >= 0) & (vertex_ids < vertex_count)
+        return {
+            'links': links,
+            'bind_matrices': np.array(bind_matrices),
+            'influences': normalize_influences(vertex_ids[valid], np.concatenate(cluster_ids)[valid],
+                                               np.concatenate(weights)[valid], vertex_count)
+        }
+
+    def read_bones(self) -> List[Dict[str, Any]]:
+        bones = []
+        transforms = self._global_transforms()
+        for model_id, parent_id in self._walk_models():
+            node = self._objects[model_id]
+            if self._attribute_type(model_id) == 'skeleton':
+                bones.append({
+                    'name': self._name(node),
+                    'parent': self._name(self._objects[parent_id]) if parent_id is not None else 'RootNode',
+                    'transform': decompose_matrix(transforms[model_id])
+                })
+        return bones
+
+    def read_animations(self) -> List[Dict[str, Any]]:
+        animations = []
+        for node in self._objects.values():
+            if node.name != 'AnimationStack':
+                continue
+            props = self._properties(node)
+            start = props.get('LocalStart', self._global_settings.get('TimeSpanStart', [0]))[0]
+            stop = props.get('LocalStop', self._global_settings.get('TimeSpanStop', [0]))[0]
+            animations.append({
+                'name': self._name(node),
+                'start_time': start / KTIME_PER_SECOND,
+                'end_time': stop / KTIME_PER_SECOND,
+                'frames': []
+            })
+        return animations
+
+    def read_materials(self) -> List[Dict[str, Any]]:
+        for model_id, _ in self._walk_models():
+            self._material_indices(model_id)
+        return self._materials.materials
+
+    def _material_indices(self, model_id) -> List[int]:
+        """Registry indices of a model's materials, in slot order"""
+        return [self._materials.index(material_id, lambda: self._read_material(material_id, material))
+                for material_id, material in self._connected(model_id, 'Material')]
+
+    def _read_material(self, material_id, material: FBXNode) -> Dict[str, Any]:
+        """Build a material dict from a Material record and its diffuse texture"""
+        material_data = {
+            'name': self._name(material),
+            'diffuse_color': [1.0, 1.0, 1.0],
+            'diffuse_texture': None,
+            'transparency': 1.0
+        }
+
+        props = self._properties(material)
+        diffuse = props.get('DiffuseColor', props.get('Diffuse'))
+        if diffuse and len(diffuse) >= 3:
+            material_data['diffuse_color'] = [float(c) for c in diffuse[:3]]
+
+        textures = self._connected(material_id, 'Texture', attribute='DiffuseColor')
+        if textures:
+            texture_id, texture = textures[0]
+            material_data['diffuse_texture'] = self._materials.texture_path(
+                texture_id, lambda: self._texture_path(texture))
+
+        return material_data
+
+    def _texture_path(self, texture: FBXNode) -> Optional[str]:
+        """Texture file name, falling back to the path relative to the FBX file"""
+        filename = texture.get('FileName') or None
+        relative = texture.get('RelativeFilename')
+        relative = relative.replace('\\', '/') if relative else None
+        if relative and not (filename and os.path.exists(filename)):
+            candidate = os.path.join(os.path.dirname(os.path.abspath(self.filepath)), relative)
+            if os.path.exists(candidate) or not filename:
+                return candidate
+        return filename
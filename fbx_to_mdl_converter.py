@@ -6,7 +6,8 @@ from FBX files to Source Engine MDL format compatible with CS 1.6.
 
 Requirements:
 - Python 3.7+
-- FBX SDK (Python bindings)
+- FBX SDK (Python bindings), or the built-in binary FBX reader
+  (fbx_binary_reader.py) for binary FBX 7.x files
 - numpy
 - PIL (for texture processing)
 
@@ -15,45 +16,70 @@ License: MIT
 """
 
 import os
+import io
 import sys
+import time
 import struct
 import math
 import json
 import argparse
-from pathlib import Path
-from typing import List, Dict, Any, Tuple, Optional
+import itertools
+import contextlib
+from typing import List, Dict, Any, Tuple, Optional, Iterable, Iterator
 import numpy as np
 
-try:
-    # Try to import FBX SDK - multiple import patterns for compatibility
-    try:
-        import fbx
-        import FbxCommon
-        from fbx import *
-    except ImportError:
+from scene_reader import SceneReader, SceneWalker, MaterialRegistry, normalize_influences, rigid_skin
+from mesh_processing import (triangulate_polygons, corner_attribute, triangle_material_slots, merge_meshes,
+                             weld_vertices)
+from mesh_decimation import decimate_mesh
+from texture_quantization import TextureQuantizer, palette_bytes, palette_digest
+from texture_atlas import plan_atlas, remap_atlas_uvs
+from conversion_profiler import ConversionProfiler, aggregate_reports, print_report, write_report
+
+# The FBX SDK and Pillow are slow to import and only needed for an actual
+# conversion, so they are loaded on first use by load_fbx_sdk() / load_pil().
+# This keeps the MDL data classes, writer and batch tooling importable in
+# milliseconds (see the 'import' benchmark in benchmark_converter.py).
+fbx = None
+FbxCommon = None
+Image = None
+
+FBX_SDK_MISSING = """FBX SDK not found. Please install Autodesk FBX SDK for Python.
+Download from: https://www.autodesk.com/developer-network/platform-technologies/fbx-sdk-2020-0
+Alternative: Try installing with: pip install pyfbx-stub"""
+
+def load_fbx_sdk():
+    """Import the FBX SDK bindings on first use and return the fbx module"""
+    global fbx, FbxCommon
+    if fbx is None:
+        # Try to import FBX SDK - multiple import patterns for compatibility
         try:
-            # Alternative import pattern
-            from pyfbx import *
-            import pyfbx as fbx
+            import fbx as fbx_module
+            import FbxCommon as common_module
         except ImportError:
             try:
-                # Another alternative
-                import FbxCommon
-                import fbx
-                from fbx import FbxManager, FbxImporter, FbxScene, FbxSurfaceMaterial
+                # Alternative import pattern
+                import pyfbx as fbx_module
+                common_module = getattr(fbx_module, 'FbxCommon', None)
             except ImportError:
-                raise ImportError("FBX SDK not found")
-except ImportError:
-    print("ERROR: FBX SDK not found. Please install Autodesk FBX SDK for Python.")
-    print("Download from: https://www.autodesk.com/developer-network/platform-technologies/fbx-sdk-2020-0")
-    print("Alternative: Try installing with: pip install pyfbx-stub")
-    sys.exit(1)
-
-try:
-    from PIL import Image
-except ImportError:
-    print("ERROR: PIL (Pillow) not found. Install with: pip install Pillow")
-    sys.exit(1)
+                raise ImportError(FBX_SDK_MISSING) from None
+        fbx, FbxCommon = fbx_module, common_module
+    return fbx
+
+def load_pil():
+    """Import Pillow on first use and return its Image module"""
+    global Image
+    if Image is None:
+        try:
+            from PIL import Image as image_module
+        except ImportError:
+            raise ImportError("PIL (Pillow) not found. Install with: pip install Pillow") from None
+        Image = image_module
+    return Image
+
+# Converter version; part of the conversion cache key, so bump it whenever
+# the generated output changes
+__version__ = '1.5.0'
 
 # Constants for MDL format (Quake/GoldSrc engine)
 MDL_MAGIC = 1330660425  # "IDPO"
@@ -63,6 +89,23 @@ MAX_VERTICES = 1024
 MAX_FRAMES = 256
 MAX_SKINS = 32
 
+# Size of the checkerboard skin written when no texture is readable
+DEFAULT_SKIN_WIDTH = 64
+DEFAULT_SKIN_HEIGHT = 64
+
+# Default rate at which animation stacks are sampled into MDL frames
+DEFAULT_SAMPLE_FPS = 10.0
+
+# Binary layouts of the MDL file sections (little-endian)
+MDL_HEADER = struct.Struct('<II3f3ff3fIIIIIIIIf')  # 84 bytes
+MDL_SKIN_GROUP = struct.Struct('<I')
+MDL_FRAME_HEADER = struct.Struct('<I4B4B16s')  # type, bbox min, bbox max, name
+MDL_TEXCOORD_DTYPE = np.dtype([('on_seam', '<i4'), ('s', '<i4'), ('t', '<i4')])
+MDL_TRIANGLE_DTYPE = np.dtype([('faces_front', '<i4'), ('vertex', '<i4', (3,))])
+
+# Streamed MDL output is flushed to disk whenever this many bytes are pending
+MDL_WRITE_CHUNK = 4 * 1024 * 1024
+
 # Normal vectors for MDL format (162 precalculated normals from anorms.h)
 ANORMS = [
     [-0.525731, 0.000000, 0.850651], [-0.442863, 0.238856, 0.864188],
@@ -158,6 +201,9 @@ ANORMS = [
     [-0.587785, -0.425325, -0.688191], [-0.688191, -0.587785, -0.425325]
 ]
 
+# Precomputed (162, 3) matrix of the normals actually addressable by MDL vertices
+ANORMS_ARRAY = np.array(ANORMS[:162], dtype=np.float64)
+
 class Vector3:
     """3D Vector class for handling positions and normals"""
     def __init__(self, x=0.0, y=0.0, z=0.0):
@@ -220,21 +266,32 @@ class MDLSkin:
         self.height = height
         self.data = data
 
+def ascii_frame_name(name: str) -> str:
+    """Frame name with every character outside printable ASCII replaced by '_'
+    
+    The MDL stores frame names as 16 ASCII bytes, so the name must be
+    cleaned before it is truncated to fit.
+    """
+    return ''.join(c if ' ' <= c <= '~' else '_' for c in name)
+
 class MDLFrame:
     """MDL animation frame structure"""
-    def __init__(self, name: str, vertices: List[MDLVertex]):
+    def __init__(self, name: str, vertices):
         self.type = 0  # Simple frame
-        self.name = name[:16].ljust(16, '\0')  # Ensure 16 chars
-        self.vertices = vertices
+        self.name = ascii_frame_name(name)[:16].ljust(16, '\0')  # Ensure 16 chars
+        
+        # Vertices are kept packed as an (N, 4) uint8 array of compressed
+        # x, y, z and normal index; a list of MDLVertex is still accepted
+        if isinstance(vertices, np.ndarray):
+            self.vertices = np.ascontiguousarray(vertices, dtype=np.uint8).reshape(-1, 4)
+        else:
+            self.vertices = np.array([list(v.v) + [v.normal_index] for v in vertices],
+                                     dtype=np.uint8).reshape(-1, 4)
         
         # Calculate bounding box
-        if vertices:
-            min_x = min(v.v[0] for v in vertices)
-            min_y = min(v.v[1] for v in vertices)
-            min_z = min(v.v[2] for v in vertices)
-            max_x = max(v.v[0] for v in vertices)
-            max_y = max(v.v[1] for v in vertices)
-            max_z = max(v.v[2] for v in vertices)
+        if len(self.vertices):
+            min_x, min_y, min_z = (int(c) for c in self.vertices[:, :3].min(axis=0))
+            max_x, max_y, max_z = (int(c) for c in self.vertices[:, :3].max(axis=0))
             
             self.bbox_min = MDLVertex(Vector3(min_x-128, min_y-128, min_z-128), 0)
             self.bbox_max = MDLVertex(Vector3(max_x-128, max_y-128, max_z-128), 0)
@@ -242,40 +299,165 @@ class MDLFrame:
             self.bbox_min = MDLVertex(Vector3(), 0)
             self.bbox_max = MDLVertex(Vector3(), 0)
 
-class FBXToMDLConverter:
-    """Main converter class for FBX to MDL conversion"""
+def compute_bounds(positions: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """Return the (min, max) corners of an (N, 3) position array"""
+    return positions.min(axis=0), positions.max(axis=0)
+
+def compute_scale_translate(positions: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """Calculate the MDL scale and translate that map positions onto 0-255"""
+    min_pos, max_pos = compute_bounds(positions)
+    extent = max_pos - min_pos
+    scale = np.where(extent != 0, extent / 255.0, 1.0)
+    return scale, min_pos.copy()
+
+def compress_positions(positions: np.ndarray, scale: np.ndarray, translate: np.ndarray) -> np.ndarray:
+    """Quantize an (N, 3) position array to unsigned char values (0-255)"""
+    compressed = np.trunc((positions - translate) / scale)
+    return np.clip(compressed, 0, 255).astype(np.uint8)
+
+def quantize_normals(normals: np.ndarray, chunk_size: int = 4096) -> np.ndarray:
+    """Map an (N, 3) normal array to the indices of the closest ANORMS entries
+    
+    Normals are normalized and dotted against ANORMS_ARRAY with the same
+    operation order as a per-normal scan, and argmax keeps the first of equal
+    maxima, so ties resolve exactly as they always have. Rows are processed
+    in chunks to bound the (chunk, 162) temporaries.
+    """
+    normals = np.asarray(normals, dtype=np.float64).reshape(-1, 3)
+    indices = np.empty(len(normals), dtype=np.uint8)
+    ax, ay, az = ANORMS_ARRAY[:, 0], ANORMS_ARRAY[:, 1], ANORMS_ARRAY[:, 2]
+    
+    for start in range(0, len(normals), chunk_size):
+        block = normals[start:start + chunk_size]
+        x, y, z = block[:, 0:1], block[:, 1:2], block[:, 2:3]
+        length = np.sqrt(x*x + y*y + z*z)
+        length = np.where(length > 0, length, 1.0)
+        x, y, z = x / length, y / length, z / length
+        dots = x * ax + y * ay + z * az
+        indices[start:start + chunk_size] = dots.argmax(axis=1)
+    
+    return indices
+
+def texcoords_to_array(texcoords) -> np.ndarray:
+    """Return texture coordinates as an MDL_TEXCOORD_DTYPE array"""
+    if isinstance(texcoords, np.ndarray):
+        return texcoords.astype(MDL_TEXCOORD_DTYPE, copy=False)
+    return np.array([(tc.on_seam, tc.s, tc.t) for tc in texcoords], dtype=MDL_TEXCOORD_DTYPE)
+
+def triangles_to_array(triangles) -> np.ndarray:
+    """Return triangles as an MDL_TRIANGLE_DTYPE array"""
+    if isinstance(triangles, np.ndarray):
+        return triangles.astype(MDL_TRIANGLE_DTYPE, copy=False)
+    return np.array([(tri.faces_front, tri.vertex[:3]) for tri in triangles], dtype=MDL_TRIANGLE_DTYPE)
+
+def pack_frame_vertices(compressed: np.ndarray, normal_indices: np.ndarray) -> np.ndarray:
+    """Pack compressed positions and normal indices into (N, 4) uint8 frame vertices"""
+    packed = np.empty((len(compressed), 4), dtype=np.uint8)
+    packed[:, :3] = compressed
+    packed[:, 3] = normal_indices
+    return packed
+
+def fbx_matrix_to_array(matrix) -> np.ndarray:
+    """Convert an FbxAMatrix to a 4x4 array acting on column vectors"""
+    return np.array([[matrix.Get(row, col) for col in range(4)] for row in range(4)], dtype=np.float64).T
+
+def plan_sample_times(spans: List[Tuple[float, float]], fps: float, max_frames: int = MAX_FRAMES) -> List[np.ndarray]:
+    """Choose sample times (seconds) for each (start, end) animation span
+    
+    Spans are sampled at fps. If that would exceed max_frames in total, every
+    span gets proportionally fewer samples spread evenly over it, and spans
+    beyond the budget get none.
+    """
+    counts = [int(math.floor(max(0.0, end - start) * fps + 1e-6)) + 1 for start, end in spans]
+    limited = sum(counts) > max_frames
+    if limited:
+        ratio = max_frames / sum(counts)
+        counts = [max(1, int(count * ratio)) for count in counts]
+        remaining = max_frames
+        for i, count in enumerate(counts):
+            counts[i] = min(count, remaining)
+            remaining -= counts[i]
+    
+    times = []
+    for (start, end), count in zip(spans, counts):
+        if limited and count > 1:
+            times.append(np.linspace(start, end, count))
+        else:
+            times.append(start + np.arange(count) / fps)
+    return times
+
+def blend_skin_matrices(influences: Tuple[np.ndarray, np.ndarray, np.ndarray],
+                        cluster_matrices: np.ndarray, vertex_count: int) -> np.ndarray:
+    """Linear-blend the (C, 4, 4) cluster matrices into (N, 3, 4) per-vertex matrices
+    
+    Vertices without influences keep the identity transform.
+    """
+    vertex_ids, cluster_ids, weights = influences
+    rows = cluster_matrices[cluster_ids, :3, :].reshape(-1, 12) * weights[:, None]
+    blended = np.empty((vertex_count, 12))
+    for j in range(12):
+        blended[:, j] = np.bincount(vertex_ids, weights=rows[:, j], minlength=vertex_count)
+    
+    unweighted = np.bincount(vertex_ids, weights=weights, minlength=vertex_count) <= 0
+    blended[unweighted] = np.eye(4)[:3].ravel()
+    return blended.reshape(vertex_count, 3, 4)
+
+def deform_vertices(positions: np.ndarray, normals: np.ndarray, blended: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """Apply per-vertex (N, 3, 4) matrices to positions and their leading normals"""
+    deformed = np.einsum('nij,nj->ni', blended[:, :, :3], positions) + blended[:, :, 3]
+    deformed_normals = np.einsum('nij,nj->ni', blended[:len(normals), :, :3], normals)
+    return deformed, deformed_normals
+
+def _sdk_layer_mapping(element) -> Tuple[str, str, Optional[np.ndarray]]:
+    """Return an SDK layer element's (mapping, reference, index array) for corner_attribute"""
+    layer = fbx.FbxLayerElement
+    mapping = {layer.eByControlPoint: 'ByControlPoint', layer.eByPolygonVertex: 'ByPolygonVertex',
+               layer.eByPolygon: 'ByPolygon', layer.eAllSame: 'AllSame'}.get(element.GetMappingMode(),
+                                                                              'ByControlPoint')
+    if element.GetReferenceMode() == layer.eDirect:
+        return mapping, 'Direct', None
+    index_array = element.GetIndexArray()
+    return mapping, 'IndexToDirect', np.fromiter(map(index_array.GetAt, range(index_array.GetCount())),
+                                                 dtype=np.int64)
+
+class FBXSDKSceneReader(SceneReader):
+    """Scene reader backed by the Autodesk FBX SDK Python bindings"""
+    name = 'sdk'
     
     def __init__(self):
         self.fbx_manager = None
         self.scene = None
-        self.meshes = []
-        self.materials = []
-        self.bones = []
-        self.animations = []
-        self.scale_factor = Vector3(1.0, 1.0, 1.0)
-        self.translate = Vector3(0.0, 0.0, 0.0)
-        
-    def initialize_fbx_sdk(self):
+        self._anim_stacks = []
+        self._scene_walk = None
+        self._materials = MaterialRegistry()
+    
+    def initialize(self):
         """Initialize FBX SDK"""
         print("Initializing FBX SDK...")
+        load_fbx_sdk()
         self.fbx_manager, self.scene = FbxCommon.InitializeSdkObjects()
         if not self.fbx_manager or not self.scene:
             raise Exception("Failed to initialize FBX SDK")
-        return True
     
-    def cleanup_fbx_sdk(self):
+    def shutdown(self):
         """Cleanup FBX SDK resources"""
         if self.fbx_manager:
             self.fbx_manager.Destroy()
+        self.fbx_manager = None
+        self.scene = None
     
-    def load_fbx_file(self, filepath: str) -> bool:
-        """Load FBX file"""
-        print(f"Loading FBX file: {filepath}")
-        
-        if not os.path.exists(filepath):
-            raise FileNotFoundError(f"FBX file not found: {filepath}")
-        
-        importer = FbxImporter.Create(self.scene, "")
+    def unload(self):
+        """Replace the scene with a fresh one; the manager is kept alive"""
+        self._anim_stacks = []
+        self._scene_walk = None
+        self._materials = MaterialRegistry()
+        if self.fbx_manager and self.scene:
+            self.scene.Destroy()
+            self.scene = fbx.FbxScene.Create(self.fbx_manager, "")
+    
+    def load(self, filepath: str):
+        """Import an FBX file into the scene"""
+        importer = fbx.FbxImporter.Create(self.scene, "")
         
         if not importer.Initialize(filepath, -1, self.fbx_manager.GetIOSettings()):
             error = importer.GetStatus().GetErrorString()
@@ -286,102 +468,165 @@ class FBXToMDLConverter:
             raise Exception(f"Failed to import FBX file: {error}")
         
         importer.Destroy()
-        print("FBX file loaded successfully")
-        return True
+        self._scene_walk = None
+        self._materials = MaterialRegistry()
     
-    def detect_meshes(self):
-        """Automatically detect and extract mesh data from FBX scene"""
-        print("Detecting meshes...")
+    @staticmethod
+    def _attribute_type(node) -> Optional[str]:
+        """Node table attribute type of a node ('mesh', 'skeleton' or None)"""
+        attribute = node.GetNodeAttribute()
+        if not attribute:
+            return None
+        return {fbx.FbxNodeAttribute.eMesh: 'mesh',
+                fbx.FbxNodeAttribute.eSkeleton: 'skeleton'}.get(attribute.GetAttributeType())
+    
+    def _walk_scene(self) -> Dict[str, List[Dict[str, Any]]]:
+        """Meshes, bones, materials and the node table, gathered in one pass over the scene
         
-        root_node = self.scene.GetRootNode()
-        if not root_node:
-            return
+        Every SDK call crosses the binding boundary, so the tree is walked
+        once per loaded file and the results are kept until the next load().
+        """
+        if self._scene_walk is not None:
+            return self._scene_walk
         
-        self._traverse_nodes_for_meshes(root_node)
-        print(f"Found {len(self.meshes)} mesh(es)")
-    
-    def _traverse_nodes_for_meshes(self, node):
-        """Recursively traverse scene nodes to find meshes"""
-        # Check if this node has a mesh
-        mesh_attr = node.GetMesh()
-        if mesh_attr:
-            mesh_data = self._extract_mesh_data(mesh_attr, node)
+        walk = {'meshes': [], 'bones': [], 'materials': self._materials.materials}
+        walker = SceneWalker(children=lambda node: [node.GetChild(i) for i in range(node.GetChildCount())],
+                             name=lambda node: node.GetName(), attribute=self._attribute_type)
+        
+        def visit_mesh(node, index):
+            mesh_data = self._extract_mesh_data(node.GetMesh(), node)
             if mesh_data:
-                self.meshes.append(mesh_data)
+                walk['meshes'].append(mesh_data)
+        
+        def visit_skeleton(node, index):
+            parent = walker.nodes[index]['parent']
+            walk['bones'].append({
+                'name': walker.nodes[index]['name'],
+                'parent': walker.nodes[parent]['name'] if parent >= 0 else None,
+                'transform': self._get_node_transform(node)
+            })
+        
+        def visit_materials(node, index):
+            if walker.nodes[index]['attribute'] != 'mesh':  # visit_mesh registered them already
+                self._material_indices(node)
         
-        # Traverse child nodes
-        for i in range(node.GetChildCount()):
-            self._traverse_nodes_for_meshes(node.GetChild(i))
+        walker.register(visit_mesh, 'mesh')
+        walker.register(visit_skeleton, 'skeleton')
+        walker.register(visit_materials)
+        root_node = self.scene.GetRootNode()
+        walk['nodes'] = walker.walk([root_node] if root_node else [])
+        self._scene_walk = walk
+        return walk
+    
+    def read_meshes(self) -> List[Dict[str, Any]]:
+        return self._walk_scene()['meshes']
+    
+    def read_nodes(self) -> List[Dict[str, Any]]:
+        return self._walk_scene()['nodes']
     
     def _extract_mesh_data(self, mesh, node):
         """Extract mesh data from FBX mesh"""
         mesh_data = {
             'name': node.GetName(),
-            'vertices': [],
-            'normals': [],
-            'uvs': [],
-            'triangles': [],
+            'vertices': np.zeros((0, 3)),
+            'normals': np.zeros((0, 3)),
+            'uvs': np.zeros((0, 2)),
+            'triangles': np.zeros((0, 3), dtype=np.int32),
             'materials': []
         }
         
         # Get vertices
         control_points = mesh.GetControlPoints()
-        for i in range(mesh.GetControlPointsCount()):
-            point = control_points[i]
-            mesh_data['vertices'].append(Vector3(point[0], point[1], point[2]))
+        count = mesh.GetControlPointsCount()
+        if count:
+            mesh_data['vertices'] = np.array(
+                [(p[0], p[1], p[2]) for p in control_points[:count]], dtype=np.float64)
+        
+        # Get polygons in bulk and triangulate them
+        corners = np.asarray(mesh.GetPolygonVertices() or [], dtype=np.int64)
+        sizes = np.fromiter(map(mesh.GetPolygonSize, range(mesh.GetPolygonCount())), dtype=np.int64)
+        triangle_corners = triangulate_polygons(mesh_data['vertices'], corners, sizes)
+        mesh_data['triangles'] = corners[triangle_corners].astype(np.int32)
+        mesh_data['triangle_corners'] = triangle_corners
+        mesh_data['corner_normals'] = np.zeros((0, 3))
+        mesh_data['corner_uvs'] = np.zeros((0, 2))
         
         # Get normals
         normal_element = mesh.GetElementNormal()
         if normal_element:
             normals = normal_element.GetDirectArray()
-            for i in range(normals.GetCount()):
-                normal = normals.GetAt(i)
-                mesh_data['normals'].append(Vector3(normal[0], normal[1], normal[2]))
+            if normals.GetCount():
+                mesh_data['normals'] = np.array(
+                    [(n[0], n[1], n[2]) for n in map(normals.GetAt, range(normals.GetCount()))],
+                    dtype=np.float64)
+                mesh_data['corner_normals'] = corner_attribute(
+                    mesh_data['normals'], 3, *_sdk_layer_mapping(normal_element), corners, sizes)
         
         # Get UVs
         uv_element = mesh.GetElementUV()
         if uv_element:
             uvs = uv_element.GetDirectArray()
-            for i in range(uvs.GetCount()):
-                uv = uvs.GetAt(i)
-                mesh_data['uvs'].append([uv[0], 1.0 - uv[1]])  # Flip V coordinate
-        
-        # Get triangles
-        for i in range(mesh.GetPolygonCount()):
-            if mesh.GetPolygonSize(i) == 3:  # Only triangles
-                triangle = []
-                for j in range(3):
-                    triangle.append(mesh.GetPolygonVertex(i, j))
-                mesh_data['triangles'].append(triangle)
+            if uvs.GetCount():
+                uv_array = np.array([(uv[0], uv[1]) for uv in map(uvs.GetAt, range(uvs.GetCount()))],
+                                    dtype=np.float64)
+                uv_array[:, 1] = 1.0 - uv_array[:, 1]  # Flip V coordinate
+                mesh_data['uvs'] = uv_array
+                mesh_data['corner_uvs'] = corner_attribute(
+                    uv_array, 2, *_sdk_layer_mapping(uv_element), corners, sizes)
+        
+        # Get the node's materials and each triangle's material
+        mesh_data['materials'] = self._material_indices(node)
+        material_element = mesh.GetElementMaterial()
+        mapping, slots = 'AllSame', None
+        if material_element:
+            mapping, _, slots = _sdk_layer_mapping(material_element)
+        slots = triangle_material_slots(slots, mapping, triangle_corners, sizes, len(mesh_data['materials']))
+        mesh_data['triangle_materials'] = np.array(mesh_data['materials'] + [-1], dtype=np.int64)[slots]
+        
+        # Get node transform and skin deformation for animation sampling
+        mesh_data['transform'] = fbx_matrix_to_array(node.EvaluateGlobalTransform())
+        mesh_data['skin'] = self._extract_skin_data(mesh, node, len(mesh_data['vertices']))
         
         return mesh_data
     
-    def detect_bones(self):
-        """Automatically detect bone/skeleton data"""
-        print("Detecting bones...")
+    def _extract_skin_data(self, mesh, node, vertex_count):
+        """Extract skin clusters as link nodes, bind matrices and influences"""
+        links, bind_matrices = [], []
+        vertex_ids, cluster_ids, weights = [], [], []
         
-        root_node = self.scene.GetRootNode()
-        if not root_node:
-            return
+        for d in range(mesh.GetDeformerCount(fbx.FbxDeformer.eSkin)):
+            skin = mesh.GetDeformer(d, fbx.FbxDeformer.eSkin)
+            for c in range(skin.GetClusterCount()):
+                cluster = skin.GetCluster(c)
+                count = cluster.GetControlPointIndicesCount()
+                if not cluster.GetLink() or not count:
+                    continue
+                
+                transform, transform_link = fbx.FbxAMatrix(), fbx.FbxAMatrix()
+                cluster.GetTransformMatrix(transform)
+                cluster.GetTransformLinkMatrix(transform_link)
+                bind_matrices.append(np.linalg.inv(fbx_matrix_to_array(transform_link))
+                                     @ fbx_matrix_to_array(transform))
+                
+                vertex_ids.append(np.asarray(cluster.GetControlPointIndices()[:count], dtype=np.int64))
+                weights.append(np.asarray(cluster.GetControlPointWeights()[:count], dtype=np.float64))
+                cluster_ids.append(np.full(count, len(links), dtype=np.int64))
+                links.append(cluster.GetLink())
         
-        self._traverse_nodes_for_bones(root_node)
-        print(f"Found {len(self.bones)} bone(s)")
-    
-    def _traverse_nodes_for_bones(self, node):
-        """Recursively traverse scene nodes to find bones/skeletons"""
-        # Check if this node is a skeleton
-        skeleton_attr = node.GetSkeleton()
-        if skeleton_attr:
-            bone_data = {
-                'name': node.GetName(),
-                'parent': node.GetParent().GetName() if node.GetParent() else None,
-                'transform': self._get_node_transform(node)
-            }
-            self.bones.append(bone_data)
+        if not links:
+            return rigid_skin(node, vertex_count)
         
-        # Traverse child nodes
-        for i in range(node.GetChildCount()):
-            self._traverse_nodes_for_bones(node.GetChild(i))
+        vertex_ids = np.concatenate(vertex_ids)
+        valid = (vertex_ids >= 0) & (vertex_ids < vertex_count)
+        return {
+            'links': links,
+            'bind_matrices': np.array(bind_matrices),
+            'influences': normalize_influences(vertex_ids[valid], np.concatenate(cluster_ids)[valid],
+                                               np.concatenate(weights)[valid], vertex_count)
+        }
+    
+    def read_bones(self) -> List[Dict[str, Any]]:
+        return self._walk_scene()['bones']
     
     def _get_node_transform(self, node):
         """Get transformation matrix from FBX node"""
@@ -396,50 +641,48 @@ class FBXToMDLConverter:
             'scaling': [scaling[0], scaling[1], scaling[2]]
         }
     
-    def detect_animations(self):
-        """Automatically detect animation data"""
-        print("Detecting animations...")
-        
-        anim_stack_count = self.scene.GetAnimationEvaluator().GetAnimationStackCount()
+    def read_animations(self) -> List[Dict[str, Any]]:
+        animations = []
+        self._anim_stacks = []
+        stack_type = fbx.FbxCriteria.ObjectType(fbx.FbxAnimStack.ClassId)
         
-        for i in range(anim_stack_count):
-            anim_stack = self.scene.GetAnimationEvaluator().GetAnimationStack(i)
+        for i in range(self.scene.GetSrcObjectCount(stack_type)):
+            anim_stack = self.scene.GetSrcObject(stack_type, i)
             if anim_stack:
-                anim_data = {
+                animations.append({
                     'name': anim_stack.GetName(),
                     'start_time': anim_stack.GetLocalTimeSpan().GetStart().GetSecondDouble(),
                     'end_time': anim_stack.GetLocalTimeSpan().GetStop().GetSecondDouble(),
                     'frames': []
-                }
-                self.animations.append(anim_data)
-        
-        print(f"Found {len(self.animations)} animation(s)")
+                })
+                self._anim_stacks.append(anim_stack)
+        return animations
     
-    def detect_materials(self):
-        """Automatically detect and extract material data"""
-        print("Detecting materials...")
+    def sample_cluster_matrices(self, mesh, anim_index: int, times: List[float]) -> np.ndarray:
+        skin = mesh['skin']
+        self.scene.SetCurrentAnimationStack(self._anim_stacks[anim_index])
         
-        root_node = self.scene.GetRootNode()
-        if not root_node:
-            return
+        matrices = np.empty((len(times), len(skin['links']), 4, 4))
+        fbx_time = fbx.FbxTime()
+        for f, seconds in enumerate(times):
+            fbx_time.SetSecondDouble(float(seconds))
+            for c, link in enumerate(skin['links']):
+                matrices[f, c] = fbx_matrix_to_array(link.EvaluateGlobalTransform(fbx_time))
         
-        self._traverse_nodes_for_materials(root_node)
-        print(f"Found {len(self.materials)} material(s)")
+        return np.linalg.inv(mesh['transform']) @ matrices @ skin['bind_matrices']
+    
+    def read_materials(self) -> List[Dict[str, Any]]:
+        return self._walk_scene()['materials']
     
-    def _traverse_nodes_for_materials(self, node):
-        """Recursively traverse scene nodes to find materials"""
-        # Check if this node has materials
-        material_count = node.GetMaterialCount()
-        for i in range(material_count):
+    def _material_indices(self, node) -> List[int]:
+        """Registry indices of a node's materials in slot order, -1 for an empty slot"""
+        indices = []
+        for i in range(node.GetMaterialCount()):
             material = node.GetMaterial(i)
-            if material:
-                material_data = self._extract_material_data(material)
-                if material_data and material_data not in self.materials:
-                    self.materials.append(material_data)
-        
-        # Traverse child nodes
-        for i in range(node.GetChildCount()):
-            self._traverse_nodes_for_materials(node.GetChild(i))
+            indices.append(self._materials.index(material.GetUniqueID(),
+                                                 lambda: self._extract_material_data(material))
+                           if material else -1)
+        return indices
     
     def _extract_material_data(self, material):
         """Extract material data from FBX material"""
@@ -451,71 +694,402 @@ class FBXToMDLConverter:
         }
         
         # Get diffuse properties
-        diffuse_prop = material.FindProperty(FbxSurfaceMaterial.sDiffuse)
+        diffuse_prop = material.FindProperty(fbx.FbxSurfaceMaterial.sDiffuse)
         if diffuse_prop.IsValid():
             diffuse_color = diffuse_prop.Get()
             material_data['diffuse_color'] = [diffuse_color[0], diffuse_color[1], diffuse_color[2]]
         
         # Get diffuse texture
-        diffuse_texture = material.FindProperty(FbxSurfaceMaterial.sDiffuse)
+        diffuse_texture = material.FindProperty(fbx.FbxSurfaceMaterial.sDiffuse)
         if diffuse_texture.IsValid() and diffuse_texture.GetSrcObjectCount() > 0:
             texture = diffuse_texture.GetSrcObject(0)
             if texture and hasattr(texture, 'GetFileName'):
-                material_data['diffuse_texture'] = texture.GetFileName()
+                material_data['diffuse_texture'] = self._materials.texture_path(
+                    texture.GetUniqueID(), texture.GetFileName)
         
         return material_data
+
+def _binary_scene_reader() -> SceneReader:
+    from fbx_binary_reader import BinaryFBXSceneReader
+    return BinaryFBXSceneReader()
+
+# Scene reader factories by backend name; other backends can register here
+SCENE_READERS = {
+    'sdk': FBXSDKSceneReader,
+    'binary': _binary_scene_reader,
+}
+
+def resolve_backend(backend: str = 'auto') -> str:
+    """The backend create_scene_reader() would pick, without importing the FBX SDK
     
-    def find_closest_normal_index(self, normal: Vector3) -> int:
-        """Find the closest normal vector index from the precalculated normals"""
-        best_dot = -2.0
-        best_index = 0
+    'auto' resolves to 'sdk' when its bindings are installed (or already
+    loaded) and to 'binary' otherwise; other names are returned unchanged.
+    """
+    if backend != 'auto':
+        return backend
+    if fbx is not None:
+        return 'sdk'
+    import importlib.util
+    installed = ((importlib.util.find_spec('fbx') and importlib.util.find_spec('FbxCommon'))
+                 or importlib.util.find_spec('pyfbx'))
+    return 'sdk' if installed else 'binary'
+
+def create_scene_reader(backend: str = 'auto') -> SceneReader:
+    """Create the scene reader for a backend name
+    
+    'auto' picks the FBX SDK when its bindings can be imported and the
+    pure-Python binary FBX reader otherwise.
+    """
+    if backend == 'auto':
+        try:
+            load_fbx_sdk()
+            backend = 'sdk'
+        except ImportError:
+            backend = 'binary'
+    if backend not in SCENE_READERS:
+        raise ValueError(f"Unknown scene reader backend: {backend} (choose from auto, {', '.join(SCENE_READERS)})")
+    return SCENE_READERS[backend]()
+
+class FBXToMDLConverter:
+    """Main converter class for FBX to MDL conversion"""
+    
+    def __init__(self, keep_reader: bool = False, fps: float = DEFAULT_SAMPLE_FPS, backend: str = 'auto',
+                 mesh_names: Optional[List[str]] = None, palette=None, texture_cache_dir: Optional[str] = None,
+                 profile: bool = False, incremental: bool = False):
+        # With keep_reader the scene reader (and an FBX SDK manager behind
+        # it) created by the first conversion is kept alive for later ones
+        # until cleanup_reader() is called
+        self.keep_reader = keep_reader
+        self.fps = fps
+        self.backend = backend
+        # Names of the meshes merged into the output; None merges all of them
+        self.mesh_names = mesh_names
+        # Fixed (K, 3) palette for every skin (see build_batch_palette); by
+        # default each model gets one palette shared by its own skins
+        self.palette = None if palette is None else np.asarray(palette, dtype=np.uint8).reshape(-1, 3)
+        # Decoded and quantized textures, cached by content across conversions
+        self.textures = TextureQuantizer(cache_dir=texture_cache_dir)
+        # Atlas layout and background texture jobs of the current file (see
+        # start_texture_jobs)
+        self.atlas = None
+        self.texture_jobs = None
+        self.texture_timings = []
+        # Stage timings of the current conversion (see conversion_profiler);
+        # with profile set, convert() leaves its report in profile_report
+        self.profile = profile
+        self.profiler = ConversionProfiler(enabled=False)
+        self.profile_report = None
+        # With incremental, a sidecar manifest next to each output records
+        # what it was built from, so the next conversion can reuse the
+        # sections whose inputs did not change (see convert_incremental)
+        self.incremental = incremental
+        self.incremental_result = None
+        self.reused_skins = None
+        self.manifest_textures = None
+        self.reader = None
+        self.meshes = []
+        self.materials = []
+        self.bones = []
+        self.nodes = []
+        self.animations = []
+        self.output_files = []
+        self.scale_factor = np.ones(3)
+        self.translate = np.zeros(3)
         
-        normal.normalize()
+    def initialize_reader(self):
+        """Create and initialize the scene reader for the configured backend"""
+        self.reader = create_scene_reader(self.backend)
+        self.reader.initialize()
+        return True
+    
+    def cleanup_reader(self):
+        """Release the scene reader and any SDK resources behind it"""
+        if self.reader:
+            self.reader.shutdown()
+        self.reader = None
+    
+    def reset(self):
+        """Clear per-file state so the converter can be reused for another file
+        
+        The scene reader is kept alive; only its loaded file is dropped.
+        """
+        self.meshes = []
+        self.materials = []
+        self.bones = []
+        self.nodes = []
+        self.animations = []
+        self.output_files = []
+        self.scale_factor = np.ones(3)
+        self.translate = np.zeros(3)
+        self.atlas = None
+        self.texture_jobs = None
+        self.texture_timings = []
+        self.profile_report = None
+        self.incremental_result = None
+        self.reused_skins = None
+        self.manifest_textures = None
+        
+        if self.reader:
+            self.reader.unload()
+    
+    def cache_options(self) -> Dict[str, Any]:
+        """Options that affect the generated output, for conversion cache keys
+        
+        'auto' is resolved to the backend that would actually convert, so
+        installing or removing the FBX SDK invalidates cached outputs.
+        """
+        backend = self.reader.name if self.reader else resolve_backend(self.backend)
+        return {'version': __version__, 'fps': self.fps, 'backend': backend, 'meshes': self.mesh_names,
+                'palette': palette_digest(self.palette) if self.palette is not None else None}
+    
+    def texture_dependencies(self) -> List[str]:
+        """Texture files referenced by the detected materials
+        
+        When an incremental conversion skipped loading an unchanged scene,
+        these are the textures recorded in the previous output's manifest.
+        """
+        if self.manifest_textures is not None:
+            return list(self.manifest_textures)
+        return [m['diffuse_texture'] for m in self.materials if m.get('diffuse_texture')]
+    
+    def load_fbx_file(self, filepath: str) -> bool:
+        """Load FBX file"""
+        print(f"Loading FBX file: {filepath}")
+        
+        if not os.path.exists(filepath):
+            raise FileNotFoundError(f"FBX file not found: {filepath}")
+        
+        self.reader.load(filepath)
+        print("FBX file loaded successfully")
+        return True
+    
+    def detect_meshes(self):
+        """Automatically detect and extract mesh data from FBX scene"""
+        print("Detecting meshes...")
+        self.meshes = self.reader.read_meshes()
+        self.nodes = self.reader.read_nodes()
+        print(f"Found {len(self.meshes)} mesh(es)")
+    
+    def detect_bones(self):
+        """Automatically detect bone/skeleton data"""
+        print("Detecting bones...")
+        self.bones = self.reader.read_bones()
+        print(f"Found {len(self.bones)} bone(s)")
+    
+    def detect_animations(self):
+        """Automatically detect animation data"""
+        print("Detecting animations...")
+        self.animations = self.reader.read_animations()
+        
+        if self.animations and not self.reader.supports_animation:
+            print(f"Warning: the {self.reader.name} scene reader cannot sample animations; "
+                  f"exporting the bind pose")
+        else:
+            # Plan sample times for every stack within the MAX_FRAMES budget
+            spans = [(anim['start_time'], anim['end_time']) for anim in self.animations]
+            for anim, times in zip(self.animations, plan_sample_times(spans, self.fps)):
+                anim['frames'] = times.tolist()
+        
+        print(f"Found {len(self.animations)} animation(s), "
+              f"{sum(len(anim['frames']) for anim in self.animations)} frame(s) at {self.fps:g} fps")
+    
+    def _sample_cluster_matrices(self, mesh, anim_index: int, times: List[float]) -> np.ndarray:
+        """Evaluate a mesh's (F, C, 4, 4) cluster matrices at the given times
+        
+        Matrices map bind-pose control points into the mesh node's default
+        (unanimated) space, matching the static export.
+        """
+        return self.reader.sample_cluster_matrices(mesh, anim_index, times)
+    
+    def _sample_merged_cluster_matrices(self, merged, anim_index: int, times: List[float]) -> np.ndarray:
+        """Evaluate the (F, C, 4, 4) cluster matrices of a merge_meshes() result
+        
+        Each part's matrices act in its own node space; conjugating them with
+        the part's node transform moves them into the merged (world) space.
+        """
+        matrices = []
+        for part in merged['parts']:
+            transform = part.get('transform', np.eye(4))
+            matrices.append(transform @ self._sample_cluster_matrices(part, anim_index, times) @ np.linalg.inv(transform))
+        return np.concatenate(matrices, axis=1)
+    
+    def _iter_animation_frames(self, mesh) -> Iterator[MDLFrame]:
+        """Sample every animation stack of a merged mesh into MDL frames, one frame at a time
+        
+        Cluster matrices for all samples are evaluated by the scene reader up
+        front (they are small: one 4x4 per cluster and frame). A first pass
+        then skins every frame only to find the shared bounds, running the
+        stacks in parallel threads; scale/translate are set from those
+        bounds before the first frame is yielded. The second pass skins,
+        quantizes and yields frames one by one, so only a single frame of
+        vertex data is alive at a time.
+        """
+        positions, normals = mesh['vertices'], mesh['normals'][:len(mesh['vertices'])]
+        influences = mesh['skin']['influences']
+        sampled = [(anim, self._sample_merged_cluster_matrices(mesh, i, anim['frames']))
+                   for i, anim in enumerate(self.animations) if anim['frames']]
+        
+        def deform_frame(cluster_matrices):
+            blended = blend_skin_matrices(influences, cluster_matrices, len(positions))
+            return deform_vertices(positions, normals, blended)
         
-        for i, anorm in enumerate(ANORMS[:min(len(ANORMS), 162)]):
-            anorm_vec = Vector3(anorm[0], anorm[1], anorm[2])
-            dot = normal.dot(anorm_vec)
-            if dot > best_dot:
-                best_dot = dot
-                best_index = i
+        def stack_bounds(matrices):
+            bounds = [compute_bounds(deform_frame(cluster_matrices)[0]) for cluster_matrices in matrices]
+            return np.min([b[0] for b in bounds], axis=0), np.max([b[1] for b in bounds], axis=0)
         
-        return best_index
+        from concurrent.futures import ThreadPoolExecutor
+        with ThreadPoolExecutor(max_workers=min(len(sampled), os.cpu_count() or 1)) as executor:
+            bounds = list(executor.map(stack_bounds, [matrices for _, matrices in sampled]))
+        
+        # Shared scale/translate across all frames keeps quantization consistent
+        corners = np.array([corner for stack in bounds for corner in stack])
+        self.scale_factor, self.translate = compute_scale_translate(corners)
+        
+        for anim, matrices in sampled:
+            for f, cluster_matrices in enumerate(matrices):
+                frame_positions, frame_normals = deform_frame(cluster_matrices)
+                normal_indices = np.zeros(len(positions), dtype=np.uint8)
+                normal_indices[:len(normals)] = quantize_normals(frame_normals)
+                
+                suffix = str(f + 1)
+                yield MDLFrame(ascii_frame_name(anim['name'])[:16 - len(suffix)] + suffix, pack_frame_vertices(
+                    compress_positions(frame_positions, self.scale_factor, self.translate), normal_indices))
+    
+    def detect_materials(self):
+        """Automatically detect and extract material data"""
+        print("Detecting materials...")
+        self.materials = self.reader.read_materials()
+        print(f"Found {len(self.materials)} material(s)")
+        # Incremental conversions first check whether the previous skin can
+        # be reused; write_mdl_file() starts the jobs if it is still needed
+        if not self.incremental:
+            self.start_texture_jobs()
+    
+    def plan_texture_atlas(self, paths: Optional[List[str]] = None) -> List[str]:
+        """Lay out the readable textures of the materials (or the given paths) in one atlas skin
+        
+        Only each texture's size is read, from the file headers (see
+        texture_atlas.plan_atlas). Sets self.atlas to {'width', 'height',
+        'textures', 'rects'}, or None if no texture is readable, and returns
+        the readable paths in cell order.
+        """
+        self.atlas = None
+        readable, sizes = [], []
+        for path in dict.fromkeys(self.texture_dependencies() if paths is None else paths):
+            if not os.path.exists(path):
+                print(f"Warning: Texture not found: {path}")
+                continue
+            try:
+                with load_pil().open(path) as img:
+                    sizes.append(img.size)
+                readable.append(path)
+            except Exception as e:
+                print(f"Warning: Failed to read texture {path}: {e}")
+        if readable:
+            width, height, rects = plan_atlas(sizes)
+            self.atlas = {'width': width, 'height': height, 'textures': readable, 'rects': rects}
+        return readable
     
-    def convert_texture_to_8bit_indexed(self, texture_path: str, output_path: str) -> Tuple[int, int, bytes]:
-        """Convert texture to 8-bit indexed color format for MDL"""
+    def start_texture_jobs(self, paths: Optional[List[str]] = None) -> Dict[str, Any]:
+        """Lay out the materials' textures in one atlas skin and process them in background threads
+        
+        The atlas layout only needs each texture's size (see
+        plan_texture_atlas), so it is known right away. The pixel work is
+        queued on a thread pool, so Pillow (which releases the GIL while
+        decoding and resizing) and the NumPy quantizer run
+        while the geometry is processed; write_mdl_file() only waits on it
+        when it assembles the skin. Every texture is decoded at its cell
+        size, then one palette is built from all of them (unless a fixed
+        palette was given), then each texture is mapped onto it; a job only
+        ever waits on jobs queued before it.
+        
+        Returns {texture path: future of (palette, cell indices)}. The
+        seconds each texture spent decoding and quantizing are appended to
+        texture_timings as they finish.
+        """
+        from concurrent.futures import ThreadPoolExecutor, wait
+        
+        self.texture_jobs = {}
+        self.texture_timings = []
+        paths = self.plan_texture_atlas(paths)
+        if not paths:
+            return self.texture_jobs
+        
+        cell_sizes = {path: (int(w), int(h)) for path, (_, _, w, h) in zip(paths, self.atlas['rects'])}
+        
+        textures, fixed_palette, finished = self.textures, self.palette, self.texture_timings
+        timings = {path: {'texture': path, 'decode': 0.0, 'quantize': 0.0} for path in paths}
+        
+        def decode(path):
+            start = time.perf_counter()
+            try:
+                return textures.load(path, cell_sizes[path])
+            finally:
+                timings[path]['decode'] = time.perf_counter() - start
+        
+        def shared_palette(decoding):
+            wait(decoding)
+            return textures.build_palette(paths, sizes=[cell_sizes[path] for path in paths])
+        
+        def quantize(path, palette_job):
+            palette = fixed_palette if palette_job is None else palette_job.result()
+            if palette is None:
+                raise ValueError("unreadable image")
+            start = time.perf_counter()
+            try:
+                return palette, textures.quantize(path, palette, cell_sizes[path])
+            finally:
+                timings[path]['quantize'] = time.perf_counter() - start
+                finished.append(timings[path])
+        
+        executor = ThreadPoolExecutor(max_workers=min(len(paths), os.cpu_count() or 1),
+                                      thread_name_prefix='texture')
+        decoding = [executor.submit(decode, path) for path in paths]
+        palette_job = executor.submit(shared_palette, decoding) if fixed_palette is None else None
+        for path in paths:
+            self.texture_jobs[path] = executor.submit(quantize, path, palette_job)
+        executor.shutdown(wait=False)  # queued jobs still run; the threads exit when done
+        return self.texture_jobs
+    
+    def find_closest_normal_index(self, normal: Vector3) -> int:
+        """Find the closest normal vector index from the precalculated normals"""
+        normal.normalize()
+        return int(quantize_normals(np.array([[normal.x, normal.y, normal.z]]))[0])
+    
+    def convert_texture_to_8bit_indexed(self, texture_path: str, output_path: str,
+                                        palette: Optional[np.ndarray] = None) -> Tuple[int, int, bytes]:
+        """Convert texture to 8-bit indexed color format for MDL
+        
+        Pixels are mapped onto palette, or onto a palette built from this
+        texture alone if none is given.
+        """
         if not os.path.exists(texture_path):
             print(f"Warning: Texture not found: {texture_path}")
-            # Create a default 64x64 texture
+            # Create the default checkerboard texture
             return self._create_default_texture()
         
         try:
-            # Load and convert image
-            img = Image.open(texture_path)
-            
-            # Resize if too large (MDL typically uses smaller textures)
-            max_size = 256
-            if img.width > max_size or img.height > max_size:
-                img.thumbnail((max_size, max_size), Image.Resampling.LANCZOS)
-            
-            # Convert to indexed color (256 colors max)
-            img = img.convert('P', palette=Image.ADAPTIVE, colors=256)
-            
-            # Get palette and image data
-            palette = img.getpalette()
-            image_data = img.tobytes()
-            
-            # Save converted texture
-            img.save(output_path)
-            
-            return img.width, img.height, image_data
+            if palette is None:
+                palette = self.textures.build_palette([texture_path])
+                if palette is None:
+                    raise ValueError("unreadable image")
+            return self._save_skin(self.textures.quantize(texture_path, palette), palette, output_path)
             
         except Exception as e:
             print(f"Warning: Failed to convert texture {texture_path}: {e}")
             return self._create_default_texture()
     
-    def _create_default_texture(self) -> Tuple[int, int, bytes]:
-        """Create a default 64x64 checkerboard texture"""
-        width, height = 64, 64
+    def _save_skin(self, indices: np.ndarray, palette: np.ndarray, output_path: str) -> Tuple[int, int, bytes]:
+        """Save (H, W) palette indices as an 8-bit BMP next to the model; returns (width, height, data)"""
+        img = load_pil().fromarray(indices, 'P')
+        img.putpalette(palette_bytes(palette))
+        img.save(output_path)
+        self.output_files.append(output_path)
+        return img.width, img.height, indices.tobytes()
+    
+    def _create_default_texture(self, width: int = DEFAULT_SKIN_WIDTH,
+                                height: int = DEFAULT_SKIN_HEIGHT) -> Tuple[int, int, bytes]:
+        """Create a default checkerboard texture (DEFAULT_SKIN_WIDTH x DEFAULT_SKIN_HEIGHT unless given)"""
         data = bytearray()
         
         for y in range(height):
@@ -528,6 +1102,17 @@ class FBXToMDLConverter:
         
         return width, height, bytes(data)
     
+    def select_meshes(self) -> List[Dict[str, Any]]:
+        """Detected meshes named by mesh_names, in scene order (all of them by default)"""
+        if self.mesh_names is None:
+            return self.meshes
+        
+        available = [mesh['name'] for mesh in self.meshes]
+        missing = [name for name in self.mesh_names if name not in available]
+        if missing:
+            raise ValueError(f"Mesh(es) not found: {', '.join(missing)} (available: {', '.join(available)})")
+        return [mesh for mesh in self.meshes if mesh['name'] in self.mesh_names]
+    
     def write_mdl_file(self, output_path: str):
         """Write the converted data to MDL file format"""
         print(f"Writing MDL file: {output_path}")
@@ -535,203 +1120,399 @@ class FBXToMDLConverter:
         if not self.meshes:
             raise Exception("No meshes found to convert")
         
-        # Use the first mesh for now (could be extended to handle multiple meshes)
-        mesh = self.meshes[0]
+        profiler = self.profiler
+        
+        # Textures are processed in the background while the geometry is built
+        if self.texture_jobs is None:
+            self.start_texture_jobs()
+        
+        # Merge the selected meshes into one world-space mesh
+        with profiler.stage('merge') as stage:
+            selected = self.select_meshes()
+            mesh = merge_meshes(selected)
+            stage['counts'].update(meshes=len(selected), vertices=len(mesh['vertices']),
+                                   triangles=len(mesh['triangles']))
+        if len(selected) > 1:
+            print(f"Merged {len(selected)} meshes: {mesh['name']}")
+        
+        if self.atlas:
+            # All material textures share one atlas skin; move each triangle's
+            # UVs into its material's cell before decimation and welding see them
+            skin_width, skin_height = self.atlas['width'], self.atlas['height']
+            with profiler.stage('atlas_uvs', corners=len(mesh['corner_uvs'])):
+                cells = {path: i for i, path in enumerate(self.atlas['textures'])}
+                material_cells = np.array([cells.get(material.get('diffuse_texture'), -1)
+                                           for material in self.materials] + [-1])
+                mesh['corner_uvs'] = remap_atlas_uvs(mesh['corner_uvs'], material_cells[mesh['triangle_materials']],
+                                                     self.atlas['rects'], skin_width, skin_height)
+            print(f"Packed {len(cells)} texture(s) into a {skin_width}x{skin_height} skin")
+        else:
+            # Texture coordinates address the default checkerboard skin; welding
+            # pairs seam vertices half of this width apart, as the engine does
+            skin_width = DEFAULT_SKIN_WIDTH
+            skin_height = DEFAULT_SKIN_HEIGHT
+        
+        # Simplify the mesh if it exceeds the MDL vertex/triangle budget
+        with profiler.stage('decimate') as stage:
+            decimated, error = decimate_mesh(mesh, MAX_VERTICES, MAX_TRIANGLES)
+            stage['counts'].update(triangles=len(decimated['triangles']))
+        if decimated is not mesh:
+            print(f"Decimated {len(mesh['triangles'])} triangles to {len(decimated['triangles'])}, "
+                  f"max error {error:.4g} units")
+            mesh = decimated
+        
+        # One MDL vertex per distinct (position, normal index, texcoord) corner
+        with profiler.stage('weld') as stage:
+            mesh = weld_vertices(mesh, quantize_normals(mesh['corner_normals']), skin_width, skin_height)
+            stage['counts'].update(vertices=len(mesh['vertices']), triangles=len(mesh['triangles']))
+        if len(mesh['vertices']) > MAX_VERTICES or len(mesh['triangles']) > MAX_TRIANGLES:
+            print(f"Warning: {len(mesh['vertices'])} vertices / {len(mesh['triangles'])} triangles exceed "
+                  f"the MDL limits of {MAX_VERTICES} / {MAX_TRIANGLES}; UV seam and border junctions "
+                  f"cannot be decimated")
         
         # Prepare data structures
-        vertices = []
-        triangles = []
-        texcoords = []
-        skins = []
         frames = []
         
-        # Calculate scale and translate for compression first
-        if mesh['vertices']:
-            # Find bounding box
-            min_pos = Vector3(float('inf'), float('inf'), float('inf'))
-            max_pos = Vector3(float('-inf'), float('-inf'), float('-inf'))
-            
-            for vertex in mesh['vertices']:
-                min_pos.x = min(min_pos.x, vertex.x)
-                min_pos.y = min(min_pos.y, vertex.y)
-                min_pos.z = min(min_pos.z, vertex.z)
-                max_pos.x = max(max_pos.x, vertex.x)
-                max_pos.y = max(max_pos.y, vertex.y)
-                max_pos.z = max(max_pos.z, vertex.z)
-            
-            # Calculate scale and translate
-            self.scale_factor = Vector3(
-                (max_pos.x - min_pos.x) / 255.0 if max_pos.x != min_pos.x else 1.0,
-                (max_pos.y - min_pos.y) / 255.0 if max_pos.y != min_pos.y else 1.0,
-                (max_pos.z - min_pos.z) / 255.0 if max_pos.z != min_pos.z else 1.0
-            )
-            self.translate = min_pos
-        
-        # Process vertices and normals
-        for i, vertex in enumerate(mesh['vertices']):
-            normal_index = 0
-            if i < len(mesh['normals']):
-                normal_index = self.find_closest_normal_index(mesh['normals'][i])
-            
-            mdl_vertex = MDLVertex(vertex, normal_index, self.scale_factor, self.translate)
-            vertices.append(mdl_vertex)
+        positions = mesh['vertices']
         
-        # Process texture coordinates
-        skin_width = 256
-        skin_height = 256
-        
-        for uv in mesh['uvs']:
-            s = int(uv[0] * skin_width)
-            t = int(uv[1] * skin_height)
-            texcoords.append(MDLTexCoord(s, t))
+        if any(anim['frames'] for anim in self.animations):
+            # Stream sampled animation frames straight into the writer; the
+            # generator sets the shared scale/translate before its first frame.
+            # Producing that frame now runs the bounds pass, which skins every
+            # frame, while the texture jobs are still busy
+            frames = profiler.timed('frames', self._iter_animation_frames(mesh), 'frames')
+            frames = itertools.chain([next(frames)], frames)
+        else:
+            with profiler.stage('frames', frames=1, vertices=len(positions)):
+                # Calculate scale and translate for compression first
+                if len(positions):
+                    self.scale_factor, self.translate = compute_scale_translate(positions)
+                
+                # Process vertices and normals
+                normal_indices = np.zeros(len(positions), dtype=np.uint8)
+                normal_count = min(len(positions), len(mesh['normals']))
+                normal_indices[:normal_count] = quantize_normals(mesh['normals'][:normal_count])
+                
+                # Create one static frame
+                frames.append(MDLFrame("idle", pack_frame_vertices(
+                    compress_positions(positions, self.scale_factor, self.translate), normal_indices)))
         
-        # Ensure we have enough texture coordinates
-        while len(texcoords) < len(vertices):
-            texcoords.append(MDLTexCoord(0, 0))
+        # Process texture coordinates
+        uvs = mesh['uvs']
+        texcoords = np.zeros(len(positions), dtype=MDL_TEXCOORD_DTYPE)
+        texcoords['on_seam'] = mesh['on_seam']
+        texcoords['s'] = np.trunc(uvs[:, 0] * skin_width)
+        texcoords['t'] = np.trunc(uvs[:, 1] * skin_height)
         
         # Process triangles
-        for triangle in mesh['triangles']:
-            if len(triangle) >= 3:
-                triangles.append(MDLTriangle(triangle))
-        
-        # Process materials/skins
-        if self.materials:
-            for material in self.materials:
-                if material.get('diffuse_texture'):
-                    texture_path = material['diffuse_texture']
-                    output_dir = os.path.dirname(output_path)
-                    texture_name = os.path.splitext(os.path.basename(texture_path))[0] + '.bmp'
-                    texture_output = os.path.join(output_dir, texture_name)
-                    
-                    width, height, data = self.convert_texture_to_8bit_indexed(texture_path, texture_output)
-                    skin = MDLSkin(width, height, data)
-                    skins.append(skin)
-                    skin_width, skin_height = width, height
-        
-        # Create default skin if none found
-        if not skins:
-            width, height, data = self._create_default_texture()
-            skin = MDLSkin(width, height, data)
-            skins.append(skin)
-            skin_width, skin_height = width, height
+        triangles = np.zeros(len(mesh['triangles']), dtype=MDL_TRIANGLE_DTYPE)
+        triangles['faces_front'] = mesh['faces_front']
+        triangles['vertex'] = mesh['triangles'][:, :3]
         
-        # Create frames (for now, just create one static frame)
-        frame = MDLFrame("idle", vertices)
-        frames.append(frame)
+        # Assemble the skin, unless the previous file's skin is reused
+        if self.reused_skins is not None:
+            skins = self.reused_skins
+            print("Reusing the skin of the previous output")
+        else:
+            skins = self.assemble_skins(output_path)
+        skin_width, skin_height = skins[0].width, skins[0].height
         
         # Write MDL file
-        self._write_mdl_binary(output_path, skins, texcoords, triangles, frames, skin_width, skin_height)
+        with profiler.stage('write_binary') as stage:
+            self._write_mdl_binary(output_path, skins, texcoords, triangles, frames, skin_width, skin_height)
+            stage['counts'].update(bytes=os.path.getsize(output_path))
         
         print("MDL file written successfully")
     
-    def _write_mdl_binary(self, output_path: str, skins: List[MDLSkin], texcoords: List[MDLTexCoord], 
-                         triangles: List[MDLTriangle], frames: List[MDLFrame], skin_width: int, skin_height: int):
-        """Write binary MDL file"""
+    def assemble_skins(self, output_path: str) -> List[MDLSkin]:
+        """Assemble the atlas skin from the texture jobs' cells
+        
+        The skin is saved as a BMP next to output_path. Without readable
+        textures the skin is the default checkerboard.
+        """
+        profiler = self.profiler
+        skins = []
+        if self.texture_jobs is None:
+            self.start_texture_jobs()
+        
+        wait_start = time.perf_counter()
+        if self.atlas:
+            with profiler.stage('textures', textures=len(self.atlas['textures']),
+                                pixels=self.atlas['width'] * self.atlas['height']):
+                skin_width, skin_height = self.atlas['width'], self.atlas['height']
+                indices = np.zeros((skin_height, skin_width), dtype=np.uint8)
+                palette = None
+                for texture_path, (x, y, w, h) in zip(self.atlas['textures'], self.atlas['rects']):
+                    try:
+                        palette, indices[y:y + h, x:x + w] = self.texture_jobs[texture_path].result()
+                    except Exception as e:
+                        print(f"Warning: Failed to convert texture {texture_path}: {e}")
+                
+                if palette is not None:
+                    skin_output = os.path.splitext(output_path)[0] + '.bmp'
+                    skins.append(MDLSkin(*self._save_skin(indices, palette, skin_output)))
+                else:
+                    skins.append(MDLSkin(*self._create_default_texture(skin_width, skin_height)))
+        
+        for timing in self.texture_timings:
+            print(f"Texture {os.path.basename(timing['texture'])}: decoded in {timing['decode'] * 1000:.1f} ms, "
+                  f"quantized in {timing['quantize'] * 1000:.1f} ms")
+        if self.texture_jobs:
+            print(f"Waited {(time.perf_counter() - wait_start) * 1000:.1f} ms for texture jobs")
+        
+        # Create default skin if no texture was found
+        if not skins:
+            width, height, data = self._create_default_texture()
+            skins.append(MDLSkin(width, height, data))
+        
+        return skins
+    
+    def _write_mdl_binary(self, output_path: str, skins: List[MDLSkin], texcoords, triangles,
+                         frames: Iterable[MDLFrame], skin_width: int, skin_height: int):
+        """Write binary MDL file
+        
+        The header, skins, texture coordinates and triangles are assembled in
+        one preallocated buffer. Frames may be any iterable, including a
+        generator: each frame is encoded to a block, appended and dropped,
+        and the buffer is flushed whenever it grows past MDL_WRITE_CHUNK, so
+        memory stays flat however many frames there are. Header fields that
+        depend on the frames (bounding radius, frame count, and the
+        scale/translate a generator may set while producing its first frame)
+        are packed last: in place if the header has not been flushed yet
+        (one write for typical models), otherwise patched with a seek.
+        
+        Texture coordinates and triangles may be given as MDL_TEXCOORD_DTYPE /
+        MDL_TRIANGLE_DTYPE arrays or as lists of MDLTexCoord / MDLTriangle
+        objects.
+        """
+        texcoords = texcoords_to_array(texcoords)
+        triangles = triangles_to_array(triangles)
+        
+        size = (MDL_HEADER.size
+                + sum(MDL_SKIN_GROUP.size + len(skin.data) for skin in skins)
+                + texcoords.nbytes + triangles.nbytes)
+        buffer = bytearray(size)
+        offset = MDL_HEADER.size  # header is packed once the frames are known
+        
+        # Write skins data (group 0 for single skin)
+        for skin in skins:
+            MDL_SKIN_GROUP.pack_into(buffer, offset, skin.group)
+            offset += MDL_SKIN_GROUP.size
+            buffer[offset:offset + len(skin.data)] = skin.data
+            offset += len(skin.data)
+        
+        # Write texture coordinates and triangles
+        for block in (texcoords, triangles):
+            buffer[offset:offset + block.nbytes] = block.tobytes()
+            offset += block.nbytes
         
         with open(output_path, 'wb') as f:
-            # Calculate bounding radius from vertices
+            header_flushed = False
             bounding_radius = 50.0
-            if frames and frames[0].vertices:
-                max_dist = 0.0
-                for vertex in frames[0].vertices:
-                    # Convert back from compressed format
-                    x = (vertex.v[0] - 128) * self.scale_factor.x + self.translate.x
-                    y = (vertex.v[1] - 128) * self.scale_factor.y + self.translate.y
-                    z = (vertex.v[2] - 128) * self.scale_factor.z + self.translate.z
-                    dist = math.sqrt(x*x + y*y + z*z)
-                    max_dist = max(max_dist, dist)
-                bounding_radius = max_dist
-            
-            # Write header (84 bytes total)
-            f.write(struct.pack('<I', MDL_MAGIC))  # ident (4 bytes)
-            f.write(struct.pack('<I', MDL_VERSION))  # version (4 bytes)
-            f.write(struct.pack('<fff', self.scale_factor.x, self.scale_factor.y, self.scale_factor.z))  # scale (12 bytes)
-            f.write(struct.pack('<fff', self.translate.x, self.translate.y, self.translate.z))  # translate (12 bytes)
-            f.write(struct.pack('<f', bounding_radius))  # bounding radius (4 bytes)
-            f.write(struct.pack('<fff', 0.0, 0.0, 24.0))  # eye position (12 bytes)
-            f.write(struct.pack('<I', len(skins)))  # num_skins (4 bytes)
-            f.write(struct.pack('<I', skin_width))  # skin width (4 bytes)
-            f.write(struct.pack('<I', skin_height))  # skin height (4 bytes)
-            f.write(struct.pack('<I', len(texcoords)))  # num_verts (4 bytes)
-            f.write(struct.pack('<I', len(triangles)))  # num_tris (4 bytes)
-            f.write(struct.pack('<I', len(frames)))  # num_frames (4 bytes)
-            f.write(struct.pack('<I', 0))  # synctype (4 bytes)
-            f.write(struct.pack('<I', 0))  # flags (4 bytes)
-            f.write(struct.pack('<f', 1.0))  # size (4 bytes)
-            
-            # Write skins data
-            for skin in skins:
-                # Write skin group (0 for single skin)
-                f.write(struct.pack('<I', skin.group))
-                # Write skin data
-                f.write(skin.data)
-            
-            # Write texture coordinates
-            for texcoord in texcoords:
-                f.write(struct.pack('<I', texcoord.on_seam))
-                f.write(struct.pack('<I', texcoord.s))
-                f.write(struct.pack('<I', texcoord.t))
-            
-            # Write triangles
-            for triangle in triangles:
-                f.write(struct.pack('<I', triangle.faces_front))
-                f.write(struct.pack('<I', triangle.vertex[0]))
-                f.write(struct.pack('<I', triangle.vertex[1]))
-                f.write(struct.pack('<I', triangle.vertex[2]))
+            frame_count = 0
             
             # Write frames
             for frame in frames:
-                # Write frame type
-                f.write(struct.pack('<I', frame.type))
-                
-                # Write bounding box min
-                f.write(struct.pack('<B', frame.bbox_min.v[0]))
-                f.write(struct.pack('<B', frame.bbox_min.v[1]))
-                f.write(struct.pack('<B', frame.bbox_min.v[2]))
-                f.write(struct.pack('<B', frame.bbox_min.normal_index))
+                if frame_count == 0 and len(frame.vertices):
+                    # Calculate bounding radius from vertices of the first frame
+                    restored = (frame.vertices[:, :3].astype(np.float64) - 128) * self.scale_factor + self.translate
+                    x, y, z = restored[:, 0], restored[:, 1], restored[:, 2]
+                    bounding_radius = max(0.0, float(np.sqrt(x*x + y*y + z*z).max()))
                 
-                # Write bounding box max
-                f.write(struct.pack('<B', frame.bbox_max.v[0]))
-                f.write(struct.pack('<B', frame.bbox_max.v[1]))
-                f.write(struct.pack('<B', frame.bbox_max.v[2]))
-                f.write(struct.pack('<B', frame.bbox_max.normal_index))
+                buffer += MDL_FRAME_HEADER.pack(
+                    frame.type,
+                    *frame.bbox_min.v, frame.bbox_min.normal_index,
+                    *frame.bbox_max.v, frame.bbox_max.normal_index,
+                    frame.name.encode('ascii')[:16])
+                buffer += frame.vertices.tobytes()
+                frame_count += 1
                 
-                # Write frame name (16 bytes)
-                name_bytes = frame.name.encode('ascii')[:16]
-                name_bytes = name_bytes.ljust(16, b'\0')
-                f.write(name_bytes)
-                
-                # Write vertices
-                for vertex in frame.vertices:
-                    f.write(struct.pack('<B', vertex.v[0]))
-                    f.write(struct.pack('<B', vertex.v[1]))
-                    f.write(struct.pack('<B', vertex.v[2]))
-                    f.write(struct.pack('<B', vertex.normal_index))
-    
-    def convert(self, fbx_path: str, mdl_path: str):
-        """Main conversion function"""
-        try:
-            print(f"Starting FBX to MDL conversion...")
-            print(f"Input: {fbx_path}")
-            print(f"Output: {mdl_path}")
+                if len(buffer) >= MDL_WRITE_CHUNK:
+                    f.write(buffer)
+                    buffer = bytearray()
+                    header_flushed = True
             
-            # Initialize FBX SDK
-            self.initialize_fbx_sdk()
+            # Write header (84 bytes total)
+            header = MDL_HEADER.pack(
+                MDL_MAGIC, MDL_VERSION,
+                *self.scale_factor, *self.translate, bounding_radius,
+                0.0, 0.0, 24.0,  # eye position
+                len(skins), skin_width, skin_height,
+                len(texcoords), len(triangles), frame_count,
+                0, 0, 1.0)  # synctype, flags, size
             
-            # Load FBX file
+            if header_flushed:
+                f.write(buffer)
+                f.seek(0)
+                f.write(header)
+            else:
+                buffer[:MDL_HEADER.size] = header
+                f.write(buffer)
+    
+    def load_scene(self, fbx_path: str):
+        """Load an FBX file and run every detect_* step on it
+        
+        The scene reader is created first unless one is already initialized.
+        """
+        profiler = self.profiler
+        if self.reader is None:
+            with profiler.stage('init_reader'):
+                self.initialize_reader()
+        
+        # Load FBX file
+        with profiler.stage('load', bytes=os.path.getsize(fbx_path) if os.path.exists(fbx_path) else 0):
             self.load_fbx_file(fbx_path)
-            
-            # Auto-detect all components
+        
+        # Auto-detect all components
+        with profiler.stage('detect_meshes') as stage:
             self.detect_meshes()
+            stage['counts'].update(meshes=len(self.meshes),
+                                   vertices=sum(len(mesh['vertices']) for mesh in self.meshes),
+                                   triangles=sum(len(mesh['triangles']) for mesh in self.meshes))
+        with profiler.stage('detect_bones') as stage:
             self.detect_bones()
+            stage['counts'].update(bones=len(self.bones))
+        with profiler.stage('detect_animations') as stage:
             self.detect_animations()
+            stage['counts'].update(animations=len(self.animations),
+                                   frames=sum(len(anim['frames']) for anim in self.animations))
+        with profiler.stage('detect_materials') as stage:
             self.detect_materials()
+            stage['counts'].update(materials=len(self.materials), textures=len(self.texture_jobs or {}))
+    
+    def incremental_inputs(self) -> Dict[str, Any]:
+        """Digests of the loaded scene's inputs to the geometry-side MDL sections
+        
+        'geometry' covers the selected meshes and their materials' textures;
+        'animations' has one {'name', 'digest'} per stack, over its sample
+        times and the cluster matrices sampled at them. See incremental_export.
+        """
+        from incremental_export import digest_value
+        
+        selected = self.select_meshes()
+        animations = []
+        for i, anim in enumerate(self.animations):
+            matrices = ([self._sample_cluster_matrices(mesh, i, anim['frames']) for mesh in selected]
+                        if anim['frames'] else [])
+            animations.append({'name': anim['name'], 'digest': digest_value([anim['frames'], matrices])})
+        return {'geometry': digest_value([selected, [m.get('diffuse_texture') for m in self.materials]]),
+                'animations': animations}
+    
+    def convert_incremental(self, fbx_path: str, mdl_path: str):
+        """Convert, reusing the sections of the previous output whose inputs are unchanged
+        
+        The previous output's sidecar manifest tells which inputs changed
+        (see incremental_export). An unchanged FBX is not loaded at all; an
+        unchanged set of textures keeps the previous skin; unchanged
+        geometry and animations keep every other section, patching only a
+        new skin into the file in place. A new manifest is written either
+        way. Sets incremental_result to 'unchanged', 'skins' (patched) or
+        'full' (rewritten).
+        """
+        from incremental_export import (hash_file, load_manifest, write_manifest, texture_hashes, atlas_layout,
+                                        patch_section, skins_unchanged, geometry_unchanged)
+        
+        profiler = self.profiler
+        options = self.cache_options()
+        with profiler.stage('manifest'):
+            fbx_hash = hash_file(fbx_path)
+            previous = load_manifest(mdl_path, options)
+        
+        if previous and previous['fbx'] == fbx_hash:
+            # Same scene: only the textures it references can have changed
+            print("FBX file unchanged since the last conversion; not loading it")
+            inputs = {'geometry': previous['geometry'], 'animations': previous['animations']}
+            self.manifest_textures = list(previous['textures'])
+        else:
+            self.load_scene(fbx_path)
+            with profiler.stage('hash_inputs'):
+                inputs = self.incremental_inputs()
+        
+        with profiler.stage('plan_atlas'):
+            textures = texture_hashes(self.texture_dependencies())
+            self.plan_texture_atlas(list(textures))
+            atlas = atlas_layout(self.atlas)
+        
+        if self.manifest_textures is not None and not geometry_unchanged(previous, inputs, atlas):
+            # Resized textures moved the atlas cells, and the texture
+            # coordinates are rebuilt from the scene after all
+            self.manifest_textures = None
+            self.load_scene(fbx_path)
+            with profiler.stage('hash_inputs'):
+                inputs = self.incremental_inputs()
+        
+        reuse_skins = previous is not None and skins_unchanged(previous, textures, atlas)
+        if reuse_skins:
+            # Side outputs of the previous conversion (the skin BMP) are still current
+            output_dir = os.path.dirname(mdl_path)
+            self.output_files = [path for path in (os.path.join(output_dir, name) for name in previous['outputs'])
+                                 if os.path.exists(path)]
+        
+        if previous and geometry_unchanged(previous, inputs, atlas):
+            if reuse_skins:
+                print(f"Output is up to date: {mdl_path}")
+                self.incremental_result = 'unchanged'
+            else:
+                with profiler.stage('patch_skins'):
+                    self.start_texture_jobs(list(textures))
+                    skins = self.assemble_skins(mdl_path)
+                    patch_section(mdl_path, previous, 'skins',
+                                  b''.join(MDL_SKIN_GROUP.pack(skin.group) + skin.data for skin in skins))
+                print(f"Textures changed; patched the skin of {mdl_path}")
+                self.incremental_result = 'skins'
+        else:
+            if reuse_skins:
+                from mdl_reader import read_mdl
+                with read_mdl(mdl_path) as mdl:
+                    width, height = int(mdl.header['skin_width']), int(mdl.header['skin_height'])
+                    self.reused_skins = [MDLSkin(width, height, data.tobytes()) for data in mdl.skins['data']]
+                self.texture_jobs = {}
             
             # Create output directory if it doesn't exist
-            os.makedirs(os.path.dirname(mdl_path), exist_ok=True)
+            os.makedirs(os.path.dirname(mdl_path) or '.', exist_ok=True)
+            with profiler.stage('write_mdl'):
+                self.write_mdl_file(mdl_path)
+            self.incremental_result = 'full'
+        
+        with profiler.stage('manifest'):
+            write_manifest(mdl_path, dict(inputs, options=options, fbx=fbx_hash, textures=textures, atlas=atlas,
+                                          outputs=[os.path.basename(path) for path in self.output_files]))
+    
+    def convert(self, fbx_path: str, mdl_path: str):
+        """Main conversion function
+        
+        If the scene reader is already initialized (see initialize_reader)
+        or keep_reader is set, it is reused and left alive afterwards;
+        otherwise it is created for this conversion and released at the end.
+        With incremental set, see convert_incremental.
+        """
+        owns_reader = self.reader is None and not self.keep_reader
+        try:
+            print(f"Starting FBX to MDL conversion...")
+            print(f"Input: {fbx_path}")
+            print(f"Output: {mdl_path}")
             
-            # Write MDL file
-            self.write_mdl_file(mdl_path)
+            # Start from a fresh scene; a warm scene reader is reused
+            self.reset()
+            profiler = self.profiler = ConversionProfiler(enabled=self.profile)
+            profiler.start()
+            
+            if self.incremental:
+                self.convert_incremental(fbx_path, mdl_path)
+            else:
+                self.load_scene(fbx_path)
+                
+                # Create output directory if it doesn't exist
+                os.makedirs(os.path.dirname(mdl_path) or '.', exist_ok=True)
+                
+                # Write MDL file
+                with profiler.stage('write_mdl'):
+                    self.write_mdl_file(mdl_path)
+            profiler.stop()
+            if self.profile:
+                self.profile_report = profiler.report(input=fbx_path, output=mdl_path,
+                                                      backend=self.reader.name if self.reader else None,
+                                                      texture_jobs=self.texture_timings)
             
             print(f"Conversion completed successfully!")
             print(f"Output saved to: {mdl_path}")
@@ -740,7 +1521,9 @@ class FBXToMDLConverter:
             print(f"Error during conversion: {e}")
             raise
         finally:
-            self.cleanup_fbx_sdk()
+            self.profiler.stop()
+            if owns_reader:
+                self.cleanup_reader()
 
 def create_sample_qc_file(mdl_path: str):
     """Create a sample QC file for StudioMDL compilation"""
@@ -767,15 +1550,338 @@ $sequence idle "{model_name}" fps 1
     
     print(f"Sample QC file created: {qc_path}")
 
+def collect_batch_inputs(source: str) -> List[Tuple[str, Optional[str]]]:
+    """Resolve a batch source into (input FBX, output MDL or None) pairs
+    
+    The source may be a directory (searched recursively for .fbx files), a
+    manifest file, or a glob pattern. Plain-text manifests list one FBX per
+    line, optionally followed by a tab and an output path; blank lines and
+    lines starting with '#' are ignored. JSON manifests are a list of paths
+    or of {"input": ..., "output": ...} objects. Relative paths in a
+    manifest are resolved against the manifest's directory.
+    """
+    if os.path.isdir(source):
+        return [(os.path.join(root, name), None)
+                for root, dirs, files in sorted(os.walk(source)) for name in sorted(files)
+                if name.lower().endswith('.fbx')]
+    
+    if os.path.isfile(source) and not source.lower().endswith('.fbx'):
+        base_dir = os.path.dirname(os.path.abspath(source))
+        resolve = lambda path: path and os.path.join(base_dir, os.path.expanduser(path))
+        
+        with open(source, 'r', encoding='utf-8') as f:
+            if source.lower().endswith('.json'):
+                entries = json.load(f)
+            else:
+                entries = [line.rstrip('\n').split('\t', 1) for line in f
+                           if line.strip() and not line.lstrip().startswith('#')]
+        
+        jobs = []
+        for entry in entries:
+            if isinstance(entry, str):
+                entry = [entry]
+            if isinstance(entry, dict):
+                jobs.append((resolve(entry['input']), resolve(entry.get('output'))))
+            else:
+                jobs.append((resolve(entry[0].strip()), resolve(entry[1].strip()) if len(entry) > 1 else None))
+        return jobs
+    
+    import glob
+    return [(path, None) for path in sorted(glob.glob(source, recursive=True))
+            if os.path.isfile(path) and path.lower().endswith('.fbx')]
+
+def plan_batch_jobs(inputs: List[Tuple[str, Optional[str]]], output_dir: str) -> List[Tuple[str, str]]:
+    """Assign an output path to every batch input that does not have one
+    
+    Outputs mirror the inputs' layout below their common parent directory.
+    """
+    unassigned = [os.path.abspath(src) for src, dst in inputs if not dst]
+    base_dir = os.path.commonpath([os.path.dirname(src) for src in unassigned]) if unassigned else ''
+    
+    jobs = []
+    for src, dst in inputs:
+        if not dst:
+            relative = os.path.relpath(os.path.abspath(src), base_dir)
+            dst = os.path.join(output_dir, os.path.splitext(relative)[0] + '.mdl')
+        jobs.append((src, dst))
+    return jobs
+
+def build_batch_palette(jobs: List[Tuple[str, str]],
+                        converter_options: Optional[Dict[str, Any]] = None) -> Optional[np.ndarray]:
+    """Build one palette from the textures of every model in a batch
+    
+    Each FBX is loaded once, in this process, only to list its materials;
+    files that fail to load are skipped here and reported by the batch run.
+    Returns None if no texture can be read.
+    """
+    converter = FBXToMDLConverter(keep_reader=True, **(converter_options or {}))
+    texture_paths = []
+    try:
+        for fbx_path, _ in jobs:
+            try:
+                with contextlib.redirect_stdout(io.StringIO()):
+                    converter.reset()
+                    if converter.reader is None:
+                        converter.initialize_reader()
+                    converter.load_fbx_file(fbx_path)
+                    converter.detect_materials()
+            except Exception:
+                continue
+            texture_paths.extend(path for path in converter.texture_dependencies() if path not in texture_paths)
+    finally:
+        converter.cleanup_reader()
+    
+    print(f"Building a shared palette from {len(texture_paths)} texture(s)")
+    return converter.textures.build_palette(texture_paths)
+
+def convert_file(converter: FBXToMDLConverter, fbx_path: str, mdl_path: str,
+                 create_qc: bool = False, cache=None) -> Dict[str, Any]:
+    """Convert one file, re-emitting cached outputs when its inputs are unchanged
+    
+    On a cache hit the FBX file is never loaded. Returns a dict whose
+    'cache' entry is 'hit', 'miss' or None (no cache), and whose 'profile'
+    entry is the conversion's profile report (None on a cache hit or
+    without profiling).
+    """
+    result = {'cache': None, 'profile': None}
+    options = converter.cache_options()
+    
+    key = cache.lookup(fbx_path, options) if cache else None
+    if key:
+        try:
+            cache.restore(key, mdl_path)
+            print(f"Restored from cache: {mdl_path}")
+        except OSError:
+            key = None
+    
+    if not key:
+        converter.convert(fbx_path, mdl_path)
+        result['profile'] = converter.profile_report
+        if cache:
+            cache.store(fbx_path, options, converter.texture_dependencies(), mdl_path, converter.output_files)
+    
+    if create_qc:
+        create_sample_qc_file(mdl_path)
+    
+    if cache:
+        result['cache'] = 'hit' if key else 'miss'
+        cache.record(bool(key))
+    return result
+
+# Converter and cache owned by a batch worker process; created on first use
+# and kept (with the converter's scene reader) for the lifetime of the process
+_worker_converter = None
+_worker_cache = None
+
+def _get_worker_converter(options: Dict[str, Any]) -> FBXToMDLConverter:
+    """Return this process's warm converter; its scene reader is created on first conversion"""
+    global _worker_converter
+    if _worker_converter is None:
+        _worker_converter = FBXToMDLConverter(keep_reader=True, **options)
+        
+        # Pool workers leave through multiprocessing, which skips atexit
+        import multiprocessing.util
+        multiprocessing.util.Finalize(None, _worker_converter.cleanup_reader, exitpriority=10)
+    return _worker_converter
+
+def _get_worker_cache(cache_dir: Optional[str], cache_size: int):
+    """Return this process's conversion cache, or None when caching is off"""
+    global _worker_cache
+    if cache_dir and _worker_cache is None:
+        from conversion_cache import ConversionCache
+        _worker_cache = ConversionCache(cache_dir, cache_size)
+    return _worker_cache
+
+def _run_batch_job(fbx_path: str, mdl_path: str, settings: Dict[str, Any]) -> Dict[str, Any]:
+    """Convert one file inside a batch worker and report its status"""
+    start = time.perf_counter()
+    result = {'input': fbx_path, 'output': mdl_path, 'status': 'ok', 'error': None, 'cache': None, 'profile': None,
+              'input_bytes': os.path.getsize(fbx_path) if os.path.exists(fbx_path) else 0}
+    
+    log = io.StringIO()
+    try:
+        with contextlib.redirect_stdout(sys.stdout if settings['verbose'] else log):
+            cache = _get_worker_cache(settings['cache_dir'], settings['cache_size'])
+            result.update(convert_file(_get_worker_converter(settings['converter_options']), fbx_path, mdl_path,
+                                       settings['create_qc'], cache))
+    except Exception as e:
+        result['status'] = 'failed'
+        result['error'] = str(e) or type(e).__name__
+    
+    result['seconds'] = time.perf_counter() - start
+    return result
+
+def batch_convert(jobs: List[Tuple[str, str]], workers: Optional[int] = None,
+                  create_qc: bool = False, verbose: bool = False,
+                  cache_dir: Optional[str] = None, cache_size: Optional[int] = None,
+                  converter_options: Optional[Dict[str, Any]] = None) -> List[Dict[str, Any]]:
+    """Convert many files across a pool of worker processes
+    
+    Each worker keeps one scene reader (and FBX manager) for its lifetime. A file that fails is
+    reported and the run continues; if a worker process dies, the pool is
+    restarted and unfinished files are retried once before being reported
+    as crashed. With cache_dir, unchanged inputs are restored from the
+    conversion cache, which is trimmed to cache_size bytes at the end.
+    converter_options are passed to each worker's FBXToMDLConverter.
+    Returns one result dict per job, in completion order.
+    """
+    from concurrent.futures import ProcessPoolExecutor, as_completed
+    from concurrent.futures.process import BrokenProcessPool
+    
+    cache = None
+    if cache_dir:
+        from conversion_cache import ConversionCache, DEFAULT_CACHE_SIZE
+        cache_size = cache_size or DEFAULT_CACHE_SIZE
+        cache = ConversionCache(cache_dir, cache_size)
+    settings = {'create_qc': create_qc, 'verbose': verbose, 'cache_dir': cache_dir, 'cache_size': cache_size,
+                'converter_options': converter_options or {}}
+    
+    results = []
+    attempts = {}
+    pending = list(jobs)
+    start = time.perf_counter()
+    
+    while pending:
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            futures = {executor.submit(_run_batch_job, src, dst, settings): (src, dst)
+                       for src, dst in pending}
+            pending = []
+            
+            for future in as_completed(futures):
+                src, dst = futures[future]
+                try:
+                    result = future.result()
+                except BrokenProcessPool:
+                    attempts[src] = attempts.get(src, 0) + 1
+                    if attempts[src] < 2:
+                        pending.append((src, dst))
+                        continue
+                    result = {'input': src, 'output': dst, 'status': 'failed', 'seconds': 0.0,
+                              'error': 'worker process crashed', 'input_bytes': 0, 'cache': None,
+                              'profile': None}
+                
+                results.append(result)
+                cached = ' (cached)' if result['cache'] == 'hit' else ''
+                if result['status'] == 'ok':
+                    print(f"[ok]     {result['seconds']:7.2f}s  {src} -> {dst}{cached}")
+                else:
+                    print(f"[FAILED] {result['seconds']:7.2f}s  {src}: {result['error']}")
+    
+    if cache:
+        for result in results:
+            if result['cache']:
+                cache.record(result['cache'] == 'hit')
+        cache.evict()
+    
+    print_batch_summary(results, time.perf_counter() - start)
+    if cache:
+        cache.print_stats()
+    return results
+
+def print_batch_summary(results: List[Dict[str, Any]], elapsed: float):
+    """Print aggregate status and throughput for a batch run"""
+    converted = [r for r in results if r['status'] == 'ok']
+    failed = [r for r in results if r['status'] != 'ok']
+    input_mb = sum(r['input_bytes'] for r in converted) / (1024 * 1024)
+    
+    print("\n" + "="*50)
+    print("BATCH SUMMARY")
+    print("="*50)
+    print(f"Converted: {len(converted)}")
+    print(f"Failed: {len(failed)}")
+    print(f"Wall time: {elapsed:.2f}s")
+    if elapsed > 0:
+        print(f"Throughput: {len(converted) / elapsed:.2f} files/s ({input_mb / elapsed:.2f} MB/s of FBX input)")
+    if converted:
+        print(f"Average per file: {sum(r['seconds'] for r in converted) / len(converted):.2f}s")
+    for r in failed:
+        print(f"  FAILED {r['input']}: {r['error']}")
+
 def main():
     """Main entry point"""
     parser = argparse.ArgumentParser(description='Convert FBX files to MDL format for Counter-Strike 1.6')
-    parser.add_argument('input', help='Input FBX file path')
-    parser.add_argument('output', help='Output MDL file path')
+    parser.add_argument('input', help='Input FBX file path (with --batch: a directory, glob pattern or manifest file)')
+    parser.add_argument('output', help='Output MDL file path (with --batch: output directory)')
     parser.add_argument('--create-qc', action='store_true', help='Create sample QC file for StudioMDL')
     parser.add_argument('--verbose', '-v', action='store_true', help='Enable verbose output')
+    parser.add_argument('--batch', action='store_true', help='Convert every FBX matched by the input in parallel')
+    parser.add_argument('--jobs', '-j', type=int, default=None,
+                        help='Number of worker processes for --batch (default: CPU count)')
+    parser.add_argument('--fps', type=float, default=DEFAULT_SAMPLE_FPS,
+                        help=f'Animation sampling rate in frames per second (default: {DEFAULT_SAMPLE_FPS:g})')
+    parser.add_argument('--backend', choices=['auto'] + list(SCENE_READERS), default='auto',
+                        help='FBX scene reader: the FBX SDK, the built-in binary FBX reader, '
+                             'or auto (SDK if installed; default)')
+    parser.add_argument('--meshes', type=lambda names: [name for name in names.split(',') if name],
+                        help='Comma-separated names of the meshes to merge into the output (default: all)')
+    parser.add_argument('--shared-palette', action='store_true',
+                        help='With --batch, quantize the skins of all models to one shared palette')
+    parser.add_argument('--cache-dir', help='Reuse outputs of unchanged inputs from this conversion cache')
+    parser.add_argument('--cache-size', type=int, default=2048, help='Conversion cache size cap in MB (default: 2048)')
+    parser.add_argument('--watch', action='store_true',
+                        help='Watch the input directory and re-convert each FBX into the output directory '
+                             'whenever it or one of its textures is saved')
+    parser.add_argument('--poll', action='store_true', help='With --watch: poll for changes instead of using inotify')
+    parser.add_argument('--debounce', type=float, default=0.2,
+                        help='With --watch: seconds without further saves before converting (default: 0.2)')
+    parser.add_argument('--incremental', action='store_true',
+                        help='Keep a manifest next to each output and only recompute the MDL sections whose '
+                             'inputs changed since the last conversion')
+    parser.add_argument('--profile', metavar='REPORT_JSON',
+                        help='Write per-stage wall time, peak memory and element counts to this JSON file '
+                             '(with --batch: aggregated over all converted files)')
+    parser.add_argument('--cprofile', metavar='STATS_FILE',
+                        help='Run the conversion under cProfile and dump its statistics to this file')
     
     args = parser.parse_args()
+    if args.batch and args.cprofile:
+        parser.error('--cprofile profiles a single conversion and cannot be combined with --batch')
+    if args.watch and (args.batch or args.cprofile):
+        parser.error('--watch cannot be combined with --batch or --cprofile')
+    converter_options = {'fps': args.fps, 'backend': args.backend, 'mesh_names': args.meshes,
+                         'profile': bool(args.profile), 'incremental': args.incremental}
+    if args.cache_dir:
+        converter_options['texture_cache_dir'] = os.path.join(args.cache_dir, 'textures')
+    
+    if args.watch:
+        if not os.path.isdir(args.input):
+            print(f"Error: --watch needs an input directory: {args.input}")
+            return 1
+        from watch_mode import WatchSession, create_watcher
+        cache = None
+        if args.cache_dir:
+            from conversion_cache import ConversionCache
+            cache = ConversionCache(args.cache_dir, args.cache_size * 1024 * 1024)
+        converter_options['profile'] = bool(args.profile)
+        session = WatchSession(args.input, args.output, converter_options, args.create_qc, args.verbose, cache,
+                               create_watcher(polling=args.poll), args.debounce)
+        session.run()
+        if args.profile:
+            write_report(aggregate_reports([r['profile'] for r in session.results if r.get('profile')]), args.profile)
+            print(f"Profile report written to: {args.profile}")
+        return 0
+    
+    if args.batch:
+        jobs = plan_batch_jobs(collect_batch_inputs(args.input), args.output)
+        if not jobs:
+            print(f"Error: No FBX files found for: {args.input}")
+            return 1
+        
+        if args.shared_palette:
+            palette = build_batch_palette(jobs, converter_options)
+            if palette is not None:
+                converter_options['palette'] = palette.tolist()
+        
+        print(f"Converting {len(jobs)} file(s) with {args.jobs or os.cpu_count()} worker(s)...")
+        results = batch_convert(jobs, args.jobs, args.create_qc, args.verbose,
+                                args.cache_dir, args.cache_size * 1024 * 1024, converter_options)
+        if converter_options['profile']:
+            report = aggregate_reports([r['profile'] for r in results if r.get('profile')])
+            print_report(report)
+            if args.profile:
+                write_report(report, args.profile)
+                print(f"Profile report written to: {args.profile}")
+        return 0 if all(r['status'] == 'ok' for r in results) else 1
     
     if not os.path.exists(args.input):
         print(f"Error: Input file not found: {args.input}")
@@ -789,11 +1895,30 @@ def main():
         args.output += '.mdl'
     
     try:
-        converter = FBXToMDLConverter()
-        converter.convert(args.input, args.output)
+        cache = None
+        if args.cache_dir:
+            from conversion_cache import ConversionCache
+            cache = ConversionCache(args.cache_dir, args.cache_size * 1024 * 1024)
+        
+        converter = FBXToMDLConverter(**converter_options)
+        if args.cprofile:
+            import cProfile
+            with cProfile.Profile() as stats:
+                result = convert_file(converter, args.input, args.output, args.create_qc, cache)
+            stats.dump_stats(args.cprofile)
+            print(f"cProfile statistics written to: {args.cprofile}")
+        else:
+            result = convert_file(converter, args.input, args.output, args.create_qc, cache)
+        
+        if result['profile']:
+            print_report(result['profile'])
+            if args.profile:
+                write_report(result['profile'], args.profile)
+                print(f"Profile report written to: {args.profile}")
         
-        if args.create_qc:
-            create_sample_qc_file(args.output)
+        if cache:
+            cache.evict()
+            cache.print_stats()
         
         print("\n" + "="*50)
         print("CONVERSION COMPLETED SUCCESSFULLY!")
@@ -0,0 +1,140 @@
+#!/usr/bin/env python3
+"""
+Incremental re-export for the FBX to MDL Converter
+Every MDL written with --incremental gets a sidecar manifest
+(<model>.mdl.manifest.json) recording hashes of the conversion's inputs,
+grouped by the MDL sections they feed, and the byte offset and length of
+each section in the written file:
+
+    fbx          the FBX file content
+    geometry     the selected meshes and their materials' textures
+    animations   per stack: sample times and cluster matrices
+    textures     per texture file: content hash
+    atlas        skin size and texture cells
+
+The skin depends only on the textures and the atlas layout. Texture
+coordinates, triangles, frames and the header all come out of the same
+merge/decimate/weld pipeline, so they are reused or rebuilt together; they
+depend on the geometry, the animations and the atlas layout (texture
+coordinates address the skin). On the next conversion:
+
+- if the FBX and every texture are unchanged, nothing is rewritten and the
+  scene is not even loaded;
+- if only textures changed (and the atlas layout did not), the skin is
+  re-quantized and patched into the file in place at its recorded offset;
+  the FBX is only loaded if its bytes changed;
+- if the geometry-side inputs changed but the textures did not, the skin is
+  copied from the previous file instead of being re-quantized;
+- otherwise the file is converted in full.
+
+A manifest is only trusted while the converter version and options match
+and the MDL on disk still has the hash it was written with.
+"""
+
+import os
+import json
+import hashlib
+import tempfile
+from typing import List, Dict, Any, Optional
+
+import numpy as np
+
+from conversion_cache import hash_file
+
+MANIFEST_FORMAT = 1
+MANIFEST_SUFFIX = '.manifest.json'
+
+def manifest_path(mdl_path: str) -> str:
+    """Path of the sidecar manifest of an MDL file"""
+    return mdl_path + MANIFEST_SUFFIX
+
+def _update_digest(digest, value):
+    if isinstance(value, np.ndarray):
+        digest.update(f"a{value.dtype.str}{value.shape}".encode('ascii'))
+        digest.update(np.ascontiguousarray(value).tobytes())
+    elif isinstance(value, dict):
+        digest.update(f"d{len(value)}".encode('ascii'))
+        for key in sorted(value, key=str):
+            _update_digest(digest, str(key))
+            _update_digest(digest, value[key])
+    elif isinstance(value, (list, tuple)):
+        digest.update(f"l{len(value)}".encode('ascii'))
+        for item in value:
+            _update_digest(digest, item)
+    elif value is None or isinstance(value, (str, bytes, bool, int, float, np.generic)):
+        digest.update(f"v{len(repr(value))}:{value!r}".encode('utf-8'))
+    else:
+        # Scene objects (SDK nodes and the like) hash by type; their content
+        # reaches the output through the arrays that were read from them
+        digest.update(f"o{type(value).__name__}".encode('utf-8'))
+
+def digest_value(value) -> str:
+    """SHA-256 hex digest of nested dicts, lists, NumPy arrays and scalars"""
+    digest = hashlib.sha256()
+    _update_digest(digest, value)
+    return digest.hexdigest()
+
+def atlas_layout(atlas: Optional[Dict[str, Any]]) -> Optional[Dict[str, Any]]:
+    """JSON form of a converter's atlas (None without textures)"""
+    if atlas is None:
+        return None
+    return {'width': int(atlas['width']), 'height': int(atlas['height']), 'textures': list(atlas['textures']),
+            'rects': np.asarray(atlas['rects']).astype(int).tolist()}
+
+def texture_hashes(paths: List[str]) -> Dict[str, Optional[str]]:
+    """Content hash of every texture file (None for missing files)"""
+    return {path: hash_file(path) for path in dict.fromkeys(paths)}
+
+def section_layout(mdl_path: str) -> Dict[str, List[int]]:
+    """[offset, length] of each section of an MDL file"""
+    from mdl_reader import read_mdl
+    with read_mdl(mdl_path) as mdl:
+        return {name: [0 if name == 'header' else mdl.offsets[name], len(mdl.section_bytes(name))]
+                for name in ('header', 'skins', 'texcoords', 'triangles', 'frames')}
+
+def load_manifest(mdl_path: str, options: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+    """Return the manifest of an MDL file if it can be trusted, else None
+
+    It must have been written with the same converter options (which
+    include the converter version), and the MDL must be unchanged since.
+    """
+    try:
+        with open(manifest_path(mdl_path), 'r', encoding='utf-8') as f:
+            manifest = json.load(f)
+    except (OSError, ValueError):
+        return None
+    if (not isinstance(manifest, dict) or manifest.get('format') != MANIFEST_FORMAT
+            or manifest.get('options') != json.loads(json.dumps(options))):
+        return None
+    if hash_file(mdl_path) != manifest.get('mdl'):
+        return None
+    return manifest
+
+def write_manifest(mdl_path: str, manifest: Dict[str, Any]) -> Dict[str, Any]:
+    """Record the written MDL's hash and section layout in the manifest and save it"""
+    manifest = dict(manifest, format=MANIFEST_FORMAT, sections=section_layout(mdl_path), mdl=hash_file(mdl_path))
+    path = manifest_path(mdl_path)
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path) or '.', prefix='.tmp-')
+    with os.fdopen(fd, 'w', encoding='utf-8') as f:
+        json.dump(manifest, f, indent=1)
+    os.replace(tmp_path, path)
+    return manifest
+
+def patch_section(mdl_path: str, manifest: Dict[str, Any], name: str, data: bytes):
+    """Overwrite one section of an MDL file in place; its length must not change"""
+    offset, length = manifest['sections'][name]
+    if len(data) != length:
+        raise ValueError(f"New {name} section is {len(data)} bytes, the file has room for {length}")
+    with open(mdl_path, 'r+b') as f:
+        f.seek(offset)
+        f.write(data)
+
+def skins_unchanged(previous: Dict[str, Any], textures: Dict[str, Optional[str]],
+                    atlas: Optional[Dict[str, Any]]) -> bool:
+    """Whether the previous skin section can be reused"""
+    return previous['textures'] == textures and previous['atlas'] == atlas
+
+def geometry_unchanged(previous: Dict[str, Any], inputs: Dict[str, Any], atlas: Optional[Dict[str, Any]]) -> bool:
+    """Whether the previous texcoord, triangle, frame and header sections can be reused"""
+    return (previous['geometry'] == inputs['geometry'] and previous['animations'] == inputs['animations']
+            and previous['atlas'] == atlas)
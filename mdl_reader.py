@@ -0,0 +1,233 @@
+#!/usr/bin/env python3
+"""
+Zero-copy MDL reader and validator for the FBX to MDL Converter
+The file is memory-mapped and every section is exposed as a NumPy view of
+its bytes (np.frombuffer with structured dtypes), so nothing is unpacked
+element by element:
+
+    with read_mdl('model.mdl') as mdl:       # or parse_mdl(data) for bytes
+        mdl.header['num_verts'], mdl.skins['data'], mdl.texcoords['s']
+        mdl.triangles['vertex'], mdl.frames['vertices']
+        problems = validate_mdl(mdl)
+
+validate_mdl() checks the header, section lengths, index ranges and frame
+bounds; compare_mdl() lists the sections in which two files differ. Run as
+a script to validate every .mdl below a directory:
+
+    python mdl_reader.py models/
+"""
+
+import os
+import sys
+import mmap
+import time
+import argparse
+from typing import List, Dict, Optional
+
+import numpy as np
+
+from fbx_to_mdl_converter import (MDL_MAGIC, MDL_VERSION, MAX_TRIANGLES, MAX_VERTICES, MAX_FRAMES, MAX_SKINS,
+                                  MDL_HEADER, MDL_TEXCOORD_DTYPE, MDL_TRIANGLE_DTYPE, ANORMS_ARRAY)
+
+# The header as one structured record (the same layout as MDL_HEADER)
+MDL_HEADER_DTYPE = np.dtype([
+    ('magic', '<u4'), ('version', '<u4'), ('scale', '<f4', (3,)), ('translate', '<f4', (3,)),
+    ('bounding_radius', '<f4'), ('eye_position', '<f4', (3,)), ('num_skins', '<u4'), ('skin_width', '<u4'),
+    ('skin_height', '<u4'), ('num_verts', '<u4'), ('num_tris', '<u4'), ('num_frames', '<u4'),
+    ('synctype', '<u4'), ('flags', '<u4'), ('size', '<f4')])
+assert MDL_HEADER_DTYPE.itemsize == MDL_HEADER.size
+
+# Texture coordinate on_seam value the Quake software renderer tests for
+ALIAS_ONSEAM = 0x20
+
+def skin_dtype(width: int, height: int) -> np.dtype:
+    """One single-skin record: group (0) and height x width palette indices"""
+    return np.dtype([('group', '<i4'), ('data', 'u1', (height, width))])
+
+def frame_dtype(vertex_count: int) -> np.dtype:
+    """One simple-frame record: type (0), bounds, name and (N, 4) packed vertices"""
+    return np.dtype([('type', '<i4'), ('bbox_min', 'u1', (4,)), ('bbox_max', 'u1', (4,)), ('name', 'S16'),
+                     ('vertices', 'u1', (vertex_count, 4))])
+
+class MDLFile:
+    """The sections of an MDL file as read-only NumPy views of its bytes
+
+    header is a single MDL_HEADER_DTYPE record; skins, texcoords, triangles
+    and frames are structured arrays (see skin_dtype() and frame_dtype()).
+    Skin and frame groups are not supported. The views keep the underlying
+    buffer alive; close() releases a mapped file once they are dropped.
+    """
+
+    def __init__(self, data, path: Optional[str] = None):
+        self.path = path
+        self.data = data
+        buffer = memoryview(data)
+        self.size = len(buffer)
+        if self.size < MDL_HEADER_DTYPE.itemsize:
+            raise ValueError(f"File too short for an MDL header ({self.size} bytes)")
+
+        self.header = np.frombuffer(buffer, dtype=MDL_HEADER_DTYPE, count=1)[0]
+        if self.header['magic'] != MDL_MAGIC:
+            raise ValueError(f"Not an MDL file (magic {int(self.header['magic'])}, expected {MDL_MAGIC})")
+        if self.header['version'] != MDL_VERSION:
+            raise ValueError(f"Unsupported MDL version {int(self.header['version'])} (expected {MDL_VERSION})")
+
+        width, height = int(self.header['skin_width']), int(self.header['skin_height'])
+        offset = MDL_HEADER_DTYPE.itemsize
+        sections = [('skins', skin_dtype(width, height), int(self.header['num_skins'])),
+                    ('texcoords', MDL_TEXCOORD_DTYPE, int(self.header['num_verts'])),
+                    ('triangles', MDL_TRIANGLE_DTYPE, int(self.header['num_tris'])),
+                    ('frames', frame_dtype(int(self.header['num_verts'])), int(self.header['num_frames']))]
+        self.offsets = {}
+        for name, dtype, count in sections:
+            length = dtype.itemsize * count
+            if offset + length > self.size:
+                raise ValueError(f"Truncated {name} section: {count} x {dtype.itemsize} bytes at offset "
+                                 f"{offset}, file is {self.size} bytes")
+            self.offsets[name] = offset
+            setattr(self, name, np.frombuffer(buffer, dtype=dtype, count=count, offset=offset))
+            offset += length
+            if name == 'skins' and count and self.skins['group'].any():
+                raise ValueError("Skin groups are not supported")
+            if name == 'frames' and count and self.frames['type'].any():
+                raise ValueError("Frame groups are not supported")
+        self.end = offset
+
+    def section_bytes(self, name: str) -> memoryview:
+        """Raw bytes of one section ('header', 'skins', 'texcoords', 'triangles' or 'frames')"""
+        if name == 'header':
+            return memoryview(self.data)[:MDL_HEADER_DTYPE.itemsize]
+        return memoryview(getattr(self, name)).cast('B')
+
+    def close(self):
+        """Drop the views and unmap the file"""
+        data, self.data = self.data, None
+        self.header = self.skins = self.texcoords = self.triangles = self.frames = None
+        if isinstance(data, mmap.mmap):
+            try:
+                data.close()
+            except BufferError:
+                pass  # views are still referenced elsewhere; the mapping closes once they are freed
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+def read_mdl(path: str) -> MDLFile:
+    """Map an MDL file into memory and index its sections"""
+    with open(path, 'rb') as f:
+        try:
+            data = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError:  # empty files cannot be mapped
+            data = b''
+    return MDLFile(data, path)
+
+def parse_mdl(data: bytes) -> MDLFile:
+    """Index the sections of an MDL file already in memory"""
+    return MDLFile(data)
+
+def validate_mdl(mdl: MDLFile) -> List[str]:
+    """Check a parsed MDL file for problems a game would reject or mis-render
+
+    Returns a list of problem descriptions, empty for a valid file. Checks
+    the header limits, that the sections fill the file exactly, that skin
+    texture coordinates and triangle vertex indices are in range, and that
+    every frame's stored bounds match its vertices.
+    """
+    problems = []
+    header = mdl.header
+    width, height = int(header['skin_width']), int(header['skin_height'])
+    vertex_count = int(header['num_verts'])
+
+    if not 1 <= header['num_skins'] <= MAX_SKINS:
+        problems.append(f"{int(header['num_skins'])} skins (1 to {MAX_SKINS} allowed)")
+    if width <= 0 or height <= 0 or width % 4:
+        problems.append(f"Skin size {width}x{height} (width must be a positive multiple of 4)")
+    if vertex_count > MAX_VERTICES or header['num_tris'] > MAX_TRIANGLES:
+        problems.append(f"{vertex_count} vertices / {int(header['num_tris'])} triangles exceed "
+                        f"{MAX_VERTICES} / {MAX_TRIANGLES}")
+    if not 1 <= header['num_frames'] <= MAX_FRAMES:
+        problems.append(f"{int(header['num_frames'])} frames (1 to {MAX_FRAMES} allowed)")
+    if not (np.isfinite(header['scale']).all() and np.isfinite(header['translate']).all()
+            and np.isfinite(header['bounding_radius']) and header['bounding_radius'] >= 0):
+        problems.append("Non-finite scale, translate or bounding radius")
+    if mdl.end != mdl.size:
+        problems.append(f"{mdl.size - mdl.end} trailing bytes after the last frame")
+
+    texcoords = mdl.texcoords
+    if len(texcoords):
+        if not np.isin(texcoords['on_seam'], (0, 1, ALIAS_ONSEAM)).all():
+            problems.append("Texture coordinates with on_seam other than 0, 1 or 32")
+        # Coordinates address texel edges, so the far edge (s == width) is in range
+        outside = ((texcoords['s'] < 0) | (texcoords['s'] > width) |
+                   (texcoords['t'] < 0) | (texcoords['t'] > height))
+        if outside.any():
+            problems.append(f"{int(outside.sum())} texture coordinates outside the {width}x{height} skin")
+
+    triangles = mdl.triangles
+    if len(triangles):
+        vertices = triangles['vertex']
+        bad = ((vertices < 0) | (vertices >= vertex_count)).any(axis=1)
+        if bad.any():
+            problems.append(f"{int(bad.sum())} triangles index vertices outside 0..{vertex_count - 1}")
+        if not np.isin(triangles['faces_front'], (0, 1)).all():
+            problems.append("Triangles with faces_front other than 0 or 1")
+
+    frames = mdl.frames
+    if len(frames) and vertex_count:
+        vertices = frames['vertices']
+        if (vertices[:, :, 3] >= len(ANORMS_ARRAY)).any():
+            problems.append(f"Normal indices outside 0..{len(ANORMS_ARRAY) - 1}")
+        mismatched = ((frames['bbox_min'][:, :3] != vertices[:, :, :3].min(axis=1)).any(axis=1) |
+                      (frames['bbox_max'][:, :3] != vertices[:, :, :3].max(axis=1)).any(axis=1))
+        if mismatched.any():
+            problems.append(f"{int(mismatched.sum())} frames with bounds that do not match their vertices")
+    return problems
+
+def compare_mdl(a: MDLFile, b: MDLFile) -> List[str]:
+    """Names of the sections whose bytes differ between two MDL files"""
+    return [name for name in ('header', 'skins', 'texcoords', 'triangles', 'frames')
+            if a.section_bytes(name) != b.section_bytes(name)]
+
+def validate_files(paths: List[str]) -> Dict[str, List[str]]:
+    """Validate MDL files; returns {path: problems} for the files that have any"""
+    failures = {}
+    for path in paths:
+        try:
+            with read_mdl(path) as mdl:
+                problems = validate_mdl(mdl)
+        except (OSError, ValueError) as e:
+            problems = [str(e)]
+        if problems:
+            failures[path] = problems
+    return failures
+
+def main():
+    """Validate every .mdl file below the given directories (or the given files)"""
+    parser = argparse.ArgumentParser(description='Validate MDL files')
+    parser.add_argument('paths', nargs='+', help='MDL files or directories to search recursively')
+
+    args = parser.parse_args()
+    paths = []
+    for path in args.paths:
+        if os.path.isdir(path):
+            paths.extend(os.path.join(root, name) for root, dirs, files in sorted(os.walk(path))
+                         for name in sorted(files) if name.lower().endswith('.mdl'))
+        else:
+            paths.append(path)
+
+    start = time.perf_counter()
+    failures = validate_files(paths)
+    elapsed = time.perf_counter() - start
+
+    for path, problems in failures.items():
+        for problem in problems:
+            print(f"{path}: {problem}")
+    print(f"Validated {len(paths)} file(s) in {elapsed:.2f}s: {len(paths) - len(failures)} valid, "
+          f"{len(failures)} with problems")
+    return 1 if failures else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
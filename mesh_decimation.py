@@ -0,0 +1,355 @@
+#!/usr/bin/env python3
+"""
+Mesh decimation for the FBX to MDL Converter
+Simplifies a merged mesh (see mesh_processing.merge_meshes) until it fits
+the MDL vertex and triangle budgets, using quadric error metrics and
+half-edge collapses: a vertex u is removed by moving it onto a neighbour v,
+so the surviving vertices are a subset of the original ones and their
+skin influences, normals and UVs carry over unchanged.
+
+Collapses run in batches. Every pass evaluates all candidate collapses with
+array operations, ranks them by quadric error and applies the cheapest ones
+whose neighbourhoods do not overlap, so they can be applied together; this
+replaces a priority queue updated one collapse at a time.
+
+Vertex counts are measured in wedges: distinct (vertex, UV, normal) corners,
+an upper bound on the vertices mesh_processing.weld_vertices makes of them.
+Borders and UV seams (and hard normal edges, which split wedges the same
+way) are kept: their vertices may only slide along the border or seam,
+both sides of a seam collapse together, and constraint planes keep the
+lines in shape. Vertices where seams or borders meet are never removed.
+"""
+
+from typing import Dict, Any, Tuple
+
+import numpy as np
+
+from mesh_processing import group_rows
+
+# Weight of the planes holding borders and UV seams in place, relative to
+# the area-weighted face planes
+BOUNDARY_WEIGHT = 100.0
+
+# A collapse is rejected if it turns a surrounding face by more than ~78 degrees
+MIN_FACE_ALIGNMENT = 0.2
+
+# Only the cheapest half of the proposed collapses run in each pass, so
+# cheap regions are simplified before expensive ones
+PASS_FRACTION = 0.5
+
+# Quadrics are symmetric 4x4 matrices stored as their 10 upper-triangle entries
+QUADRIC_ROWS, QUADRIC_COLUMNS = np.triu_indices(4)
+QUADRIC_TRACE = np.flatnonzero((QUADRIC_ROWS == QUADRIC_COLUMNS) & (QUADRIC_ROWS < 3))
+QUADRIC_SCALE = np.where(QUADRIC_ROWS == QUADRIC_COLUMNS, 1.0, 2.0)
+
+def _plane_quadrics(planes: np.ndarray, weights: np.ndarray) -> np.ndarray:
+    """(K, 10) quadrics of (K, 4) planes scaled by weights"""
+    return weights[:, None] * planes[:, QUADRIC_ROWS] * planes[:, QUADRIC_COLUMNS]
+
+def _quadric_error(quadrics: np.ndarray, points: np.ndarray) -> np.ndarray:
+    """Evaluate (K, 10) quadrics at (K, 3) points"""
+    point = np.column_stack([points, np.ones(len(points))])
+    return np.einsum('ki,ki->k', quadrics, QUADRIC_SCALE * point[:, QUADRIC_ROWS] * point[:, QUADRIC_COLUMNS])
+
+def _accumulate(index: np.ndarray, values: np.ndarray, count: int) -> np.ndarray:
+    """Sum rows of (K, W) values into count bins"""
+    return np.stack([np.bincount(index, weights=values[:, j], minlength=count)
+                     for j in range(values.shape[1])], axis=1)
+
+def _wedges(faces: np.ndarray, corner_uvs: np.ndarray,
+            corner_normals: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """Wedge id of every corner (M, 3) and the vertex of every wedge"""
+    attributes = np.column_stack([corner_uvs.reshape(-1, 2), corner_normals.reshape(-1, 3)])
+    keys = np.column_stack([faces.ravel(), (attributes + 0.0).view(np.int64)])  # + 0.0 folds -0.0 into 0.0
+    wedge, first = group_rows(keys)
+    return wedge.reshape(-1, 3), faces.ravel()[first]
+
+def count_wedges(mesh: Dict[str, Any]) -> int:
+    """Number of distinct (vertex, UV, normal) corners among a merged mesh's triangles"""
+    faces = np.asarray(mesh['triangles'], dtype=np.int64)
+    return len(_wedges(faces, np.asarray(mesh['corner_uvs'], dtype=np.float64),
+                       np.asarray(mesh['corner_normals'], dtype=np.float64))[1])
+
+class _Topology:
+    """Edges, adjacency and vertex classes of the current face set"""
+
+    def __init__(self, faces: np.ndarray, wedge: np.ndarray, wedge_count: np.ndarray, vertex_count: int):
+        count = vertex_count
+        a, b = faces.ravel(), faces[:, [1, 2, 0]].ravel()
+        wedge_a, wedge_b = wedge.ravel(), wedge[:, [1, 2, 0]].ravel()
+        low, high = np.minimum(a, b), np.maximum(a, b)
+        wedge_low = np.where(a == low, wedge_a, wedge_b)
+        wedge_high = np.where(a == low, wedge_b, wedge_a)
+
+        # Group half-edges by undirected edge
+        order = np.argsort(low * count + high, kind='stable')
+        key = (low * count + high)[order]
+        first = np.r_[True, key[1:] != key[:-1]]
+        starts = np.flatnonzero(first)
+        face_count = np.diff(np.r_[starts, len(key)])
+        self.low, self.high = low[order][starts], high[order][starts]
+        self.face_count = face_count
+        self.half_edge_start = starts
+        self.half_edge_face = order // 3
+
+        # An interior edge is a seam when its faces disagree on an endpoint's
+        # UV; it splits that endpoint's wedges
+        second = np.minimum(starts + 1, len(key) - 1)
+        pair = face_count == 2
+        self.splits_low = pair & (wedge_low[order][starts] != wedge_low[order][second])
+        self.splits_high = pair & (wedge_high[order][starts] != wedge_high[order][second])
+        self.seam = self.splits_low | self.splits_high
+        self.border = face_count == 1
+        nonmanifold = face_count > 2
+
+        ends = np.r_[self.low, self.high]
+        border_count = np.bincount(ends[np.r_[self.border, self.border]], minlength=count)
+        split_count = np.bincount(ends[np.r_[self.splits_low, self.splits_high]], minlength=count)
+        locked = np.zeros(count, dtype=bool)
+        locked[ends[np.r_[nonmanifold, nonmanifold]]] = True
+
+        # Movable vertices: inside one UV island, on a plain border, or on a
+        # seam with one wedge either side
+        self.free = ~locked & (border_count == 0) & (wedge_count == 1)
+        self.border_chain = ~locked & (border_count == 2) & (wedge_count == 1)
+        self.seam_chain = ~locked & (border_count == 0) & (split_count == 2) & (wedge_count == 2)
+
+        # Sorted adjacency (CSR) and the faces around every vertex
+        source, target = np.r_[self.low, self.high], np.r_[self.high, self.low]
+        order = np.lexsort((target, source))
+        self.neighbors = target[order]
+        self.neighbor_keys = source[order] * count + self.neighbors
+        self.degree = np.bincount(source, minlength=count)
+        self.neighbor_start = np.cumsum(self.degree) - self.degree
+
+        corner_order = np.argsort(faces.ravel(), kind='stable')
+        self.corner_faces = corner_order // 3
+        self.valence = np.bincount(faces.ravel(), minlength=count)
+        self.corner_start = np.cumsum(self.valence) - self.valence
+        self.count = count
+
+    def expand(self, vertices: np.ndarray, starts: np.ndarray, lengths: np.ndarray,
+               values: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """(owner, value) pairs listing a CSR row for every entry of vertices"""
+        length = lengths[vertices]
+        owner = np.repeat(np.arange(len(vertices)), length)
+        local = np.arange(length.sum()) - np.repeat(np.cumsum(length) - length, length)
+        return owner, values[np.repeat(starts[vertices], length) + local]
+
+    def ring(self, vertices: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """(owner, vertex) pairs of the closed one-ring of every vertex"""
+        owner, neighbor = self.expand(vertices, self.neighbor_start, self.degree, self.neighbors)
+        return np.r_[owner, np.arange(len(vertices))], np.r_[neighbor, vertices]
+
+def _links_ok(topology: _Topology, u: np.ndarray, v: np.ndarray, edge: np.ndarray) -> np.ndarray:
+    """Link condition: u and v share no neighbours other than their edge's opposite corners"""
+    owner, neighbor = topology.expand(u, topology.neighbor_start, topology.degree, topology.neighbors)
+    keys = v[owner] * topology.count + neighbor
+    position = np.minimum(np.searchsorted(topology.neighbor_keys, keys), len(topology.neighbor_keys) - 1)
+    common = np.bincount(owner[topology.neighbor_keys[position] == keys], minlength=len(u))
+    return common == topology.face_count[edge]
+
+def _flips_ok(topology: _Topology, faces: np.ndarray, positions: np.ndarray,
+              u: np.ndarray, v: np.ndarray) -> np.ndarray:
+    """Reject collapses that fold or flatten a surviving face around u"""
+    owner, face = topology.expand(u, topology.corner_start, topology.valence, topology.corner_faces)
+    corners = faces[face]
+    survives = ~(corners == v[owner, None]).any(axis=1)
+    owner, corners = owner[survives], corners[survives]
+
+    before = positions[corners]
+    after = np.where((corners == u[owner, None])[:, :, None], positions[v[owner]][:, None, :], before)
+    old = np.cross(before[:, 1] - before[:, 0], before[:, 2] - before[:, 0])
+    new = np.cross(after[:, 1] - after[:, 0], after[:, 2] - after[:, 0])
+    old_length, new_length = np.linalg.norm(old, axis=1), np.linalg.norm(new, axis=1)
+    ok = ((old * new).sum(axis=1) > MIN_FACE_ALIGNMENT * old_length * new_length) & (new_length > 0)
+    ok |= old_length == 0
+    return np.bincount(owner[~ok], minlength=len(u)) == 0
+
+def _independent(topology: _Topology, u: np.ndarray, v: np.ndarray, rounds: int = 3) -> np.ndarray:
+    """Pick collapses (given in priority order) that can be applied together
+
+    Two collapses conflict when either one's u or v lies in the other's
+    closed one-ring around u. A collapse is picked when no earlier open one
+    conflicts with it; the picks' conflicts are closed and the rest retried.
+    """
+    count, size = topology.count, len(u)
+    owner, member = topology.ring(u)
+    rank = np.arange(size)
+    picked = np.zeros(size, dtype=bool)
+    open_ = np.ones(size, dtype=bool)
+    for _ in range(rounds):
+        live = open_[owner]
+        touched = np.full(count, size)
+        np.minimum.at(touched, member[live], owner[live])
+        ends = np.full(count, size)
+        np.minimum.at(ends, np.r_[u[open_], v[open_]], np.r_[rank[open_], rank[open_]])
+        lost = (touched[u] < rank) | (touched[v] < rank)
+        lost |= np.bincount(owner[live & (ends[member] < owner)], minlength=size) > 0
+        winners = open_ & ~lost
+        if not winners.any():
+            break
+        picked |= winners
+
+        in_ring = np.zeros(count, dtype=bool)
+        in_ring[member[winners[owner]]] = True
+        is_end = np.zeros(count, dtype=bool)
+        is_end[u[winners]] = is_end[v[winners]] = True
+        open_ &= ~winners & ~in_ring[u] & ~in_ring[v]
+        open_ &= np.bincount(owner[is_end[member]], minlength=size) == 0
+    return np.flatnonzero(picked)
+
+def decimate_mesh(mesh: Dict[str, Any], max_vertices: int, max_triangles: int) -> Tuple[Dict[str, Any], float]:
+    """Simplify a merge_meshes() result to at most max_vertices wedges and max_triangles triangles
+
+    Returns the simplified mesh and the largest error introduced: the RMS
+    distance of a collapsed vertex's new position to the planes of the
+    original faces around it, in model units. If locked vertices (seam or
+    border junctions) make the budget unreachable, the closest result is
+    returned. A mesh already within budget is returned as is.
+    """
+    positions = np.asarray(mesh['vertices'], dtype=np.float64)
+    faces = np.asarray(mesh['triangles'], dtype=np.int64)
+    count = len(positions)
+    corner_uvs = np.asarray(mesh['corner_uvs'], dtype=np.float64).reshape(-1, 3, 2)
+    corner_normals = np.asarray(mesh['corner_normals'], dtype=np.float64).reshape(-1, 3, 3)
+
+    # Triangles with a repeated corner cover no area and are dropped up front
+    proper = (faces[:, 0] != faces[:, 1]) & (faces[:, 1] != faces[:, 2]) & (faces[:, 0] != faces[:, 2])
+    faces, corner_uvs, corner_normals = faces[proper], corner_uvs[proper], corner_normals[proper].copy()
+    face_materials = np.asarray(mesh.get('triangle_materials', np.full(len(proper), -1)))[proper]
+    wedge, wedge_vertex = _wedges(faces, corner_uvs, corner_normals)
+    wedge_count = np.bincount(wedge_vertex, minlength=count)
+    wedge_total = len(wedge_vertex)
+    if wedge_total <= max_vertices and len(faces) <= max_triangles:
+        return mesh, 0.0
+
+    # Area-weighted face planes accumulated on their corners
+    p0, p1, p2 = positions[faces[:, 0]], positions[faces[:, 1]], positions[faces[:, 2]]
+    normals = np.cross(p1 - p0, p2 - p0)
+    double_area = np.linalg.norm(normals, axis=1)
+    normals = np.divide(normals, double_area[:, None], out=np.zeros_like(normals), where=double_area[:, None] > 0)
+    face_quadrics = _plane_quadrics(np.column_stack([normals, -(normals * p0).sum(axis=1)]), double_area / 2)
+    quadrics = _accumulate(faces.ravel(), np.repeat(face_quadrics, 3, axis=0), count)
+
+    # Planes through border and seam edges, perpendicular to their faces
+    topology = _Topology(faces, wedge, wedge_count, count)
+    constrained = np.flatnonzero(topology.border | topology.seam)
+    if len(constrained):
+        face = topology.half_edge_face[topology.half_edge_start[constrained]]
+        low, high = positions[topology.low[constrained]], positions[topology.high[constrained]]
+        across = np.cross(high - low, normals[face])
+        length = np.linalg.norm(across, axis=1, keepdims=True)
+        across = np.divide(across, length, out=np.zeros_like(across), where=length > 0)
+        edge_quadrics = _plane_quadrics(np.column_stack([across, -(across * low).sum(axis=1)]),
+                                        BOUNDARY_WEIGHT * length[:, 0] ** 2)
+        quadrics += _accumulate(np.r_[topology.low[constrained], topology.high[constrained]],
+                                np.r_[edge_quadrics, edge_quadrics], count)
+
+    error = 0.0
+    rejected = np.zeros(0, dtype=np.int64)  # u * count + v of collapses that failed the checks
+    random = np.random.default_rng(0)
+    while wedge_total > max_vertices or len(faces) > max_triangles:
+        # Both directions of every edge, kept where u may move onto v
+        edges = np.arange(len(topology.low))
+        u, v = np.r_[topology.low, topology.high], np.r_[topology.high, topology.low]
+        edge = np.r_[edges, edges]
+        splits_u = np.r_[topology.splits_low, topology.splits_high]
+        # (a free vertex could not tell which side of a seam edge its faces take)
+        allowed = (topology.free[u] & ~topology.border[edge] & ~topology.seam[edge]) | \
+                  (topology.border_chain[u] & topology.border[edge]) | \
+                  (topology.seam_chain[u] & topology.seam[edge] & splits_u)
+        if len(rejected):
+            allowed &= ~np.isin(u * count + v, rejected)
+        u, v, edge = u[allowed], v[allowed], edge[allowed]
+        if not len(u):
+            break
+
+        # Quadric error of moving u onto v
+        combined = quadrics[u] + quadrics[v]
+        cost = np.maximum(_quadric_error(combined, positions[v]), 0.0)
+
+        # The cheapest collapse of every vertex; the cheapest share of those
+        # that keep the surface manifold and unfolded runs this pass
+        best = np.full(count, np.inf)
+        np.minimum.at(best, u, cost)
+        chosen = np.flatnonzero(cost == best[u])
+        chosen = chosen[np.unique(u[chosen], return_index=True)[1]]
+        chosen = chosen[np.argsort(cost[chosen], kind='stable')]
+        chosen = chosen[:max(1, int(np.ceil(len(chosen) * PASS_FRACTION)))]
+        ok = _links_ok(topology, u[chosen], v[chosen], edge[chosen])
+        ok[ok] = _flips_ok(topology, faces, positions, u[chosen[ok]], v[chosen[ok]])
+        if not ok.all():
+            rejected = np.union1d(rejected, u[chosen[~ok]] * count + v[chosen[~ok]])
+        chosen = chosen[ok]
+        if not len(chosen):
+            continue
+        # Cost order would pick chains along smooth cost gradients; a shuffled
+        # order packs the cheap collapses much more densely
+        chosen = chosen[random.permutation(len(chosen))]
+        chosen = chosen[_independent(topology, u[chosen], v[chosen])]
+        chosen = chosen[np.argsort(cost[chosen], kind='stable')]
+
+        # Stop as soon as the budget is met
+        removed_wedges = np.cumsum(wedge_count[u[chosen]])
+        removed_faces = np.cumsum(topology.face_count[edge[chosen]])
+        enough = np.flatnonzero((removed_wedges >= wedge_total - max_vertices) &
+                                (removed_faces >= len(faces) - max_triangles))
+        if len(enough):
+            chosen = chosen[:enough[0] + 1]
+        cu, cv = u[chosen], v[chosen]
+        weight = combined[chosen][:, QUADRIC_TRACE].sum(axis=1)
+        error = max(error, float(np.sqrt(cost[chosen] / np.maximum(weight, 1e-30)).max()))
+
+        # Collapse: faces spanning u-v disappear, u's other corners take v's
+        # attributes from the vanished face on the same side of any seam
+        remap = np.arange(count)
+        remap[cu] = cv
+        collapsed = remap[faces]
+        dead = (collapsed[:, 0] == collapsed[:, 1]) | (collapsed[:, 1] == collapsed[:, 2]) | \
+               (collapsed[:, 0] == collapsed[:, 2])
+        removed = np.zeros(count, dtype=bool)
+        removed[cu] = True
+        moving = removed[faces]
+
+        source = np.full(len(wedge_vertex), -1)
+        dead_faces = np.flatnonzero(dead)
+        u_corner = moving[dead_faces].argmax(axis=1)
+        v_corner = (faces[dead_faces] == remap[faces[dead_faces, u_corner]][:, None]).argmax(axis=1)
+        source[wedge[dead_faces, u_corner]] = dead_faces * 3 + v_corner
+        moved = np.flatnonzero((moving & ~dead[:, None]).ravel())
+        origin = source[wedge.ravel()[moved]]
+        corner_uvs.reshape(-1, 2)[moved] = corner_uvs.reshape(-1, 2)[origin]
+        corner_normals.reshape(-1, 3)[moved] = corner_normals.reshape(-1, 3)[origin]
+        wedge.ravel()[moved] = wedge.ravel()[origin]
+
+        quadrics[cv] += quadrics[cu]
+        wedge_total -= int(wedge_count[cu].sum())
+        wedge_count[cu] = 0
+        alive = ~dead
+        faces, wedge = collapsed[alive], wedge[alive]
+        corner_uvs, corner_normals, face_materials = corner_uvs[alive], corner_normals[alive], face_materials[alive]
+        topology = _Topology(faces, wedge, wedge_count, count)
+
+    # Drop removed and unreferenced vertices
+    keep = np.unique(faces)
+    index = np.full(count, -1)
+    index[keep] = np.arange(len(keep))
+    vertex_ids, cluster_ids, weights = mesh['skin']['influences']
+    kept = index[vertex_ids] >= 0
+
+    def per_vertex(layer):
+        return layer[keep] if len(layer) == count else layer[:0]
+
+    return dict(
+        mesh,
+        vertices=positions[keep],
+        normals=per_vertex(mesh['normals']),
+        uvs=per_vertex(mesh['uvs']),
+        triangles=index[faces].astype(np.int32),
+        triangle_corners=np.arange(3 * len(faces)).reshape(-1, 3),
+        corner_normals=corner_normals.reshape(-1, 3),
+        corner_uvs=corner_uvs.reshape(-1, 2),
+        triangle_materials=face_materials,
+        skin=dict(mesh['skin'], influences=(index[vertex_ids[kept]], cluster_ids[kept], weights[kept]))
+    ), error
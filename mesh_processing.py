@@ -0,0 +1,429 @@
+#!/usr/bin/env python3
+"""
+Mesh processing stages for the FBX to MDL Converter
+Array-based geometry operations shared by the scene readers and the MDL
+writer. Polygons arrive as FBX polygon-vertex streams: one control point
+index per polygon corner, polygons laid out back to back. Everything here
+works on whole streams with NumPy; only concave polygons fall back to a
+per-polygon Python loop.
+"""
+
+from typing import List, Dict, Any, Tuple, Optional
+
+import numpy as np
+
+from scene_reader import rigid_skin
+
+def polygon_layout(polygon_vertex_index: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """Split an FBX PolygonVertexIndex stream into (corner control points, polygon sizes)
+
+    The last corner of each polygon is stored as ~index. A trailing
+    polygon without a terminator is dropped.
+    """
+    indices = np.asarray(polygon_vertex_index, dtype=np.int64)
+    ends = np.flatnonzero(indices < 0)
+    corners = np.where(indices < 0, ~indices, indices)[:ends[-1] + 1 if len(ends) else 0]
+    sizes = np.diff(np.concatenate(([-1], ends)))
+    return corners, sizes
+
+def polygon_starts(sizes: np.ndarray) -> np.ndarray:
+    """Index of each polygon's first corner in the corner stream"""
+    return np.cumsum(sizes) - sizes
+
+def corner_attribute(values: np.ndarray, width: int, mapping: str, reference: str,
+                     corners: np.ndarray, sizes: np.ndarray,
+                     indices: Optional[np.ndarray] = None) -> np.ndarray:
+    """Resolve an FBX layer element to one (width,) value per polygon corner
+
+    mapping is the layer's MappingInformationType (ByPolygonVertex,
+    ByControlPoint/ByVertice, ByPolygon or AllSame) and reference its
+    ReferenceInformationType (Direct or IndexToDirect, which looks values
+    up through indices). Corners that map outside the data get zeros.
+    """
+    values = np.asarray(values, dtype=np.float64).reshape(-1, width)
+    count = len(corners)
+    if mapping == 'ByPolygonVertex':
+        element = np.arange(count)
+    elif mapping == 'ByPolygon':
+        element = np.repeat(np.arange(len(sizes)), sizes)
+    elif mapping == 'AllSame':
+        element = np.zeros(count, dtype=np.int64)
+    else:  # ByControlPoint, ByVertice, ByVertex
+        element = np.asarray(corners, dtype=np.int64)
+
+    if reference in ('IndexToDirect', 'Index') and indices is not None:
+        indices = np.asarray(indices, dtype=np.int64)
+        inside = element < len(indices)
+        element = np.where(inside, indices[np.where(inside, element, 0)] if len(indices) else -1, -1)
+
+    resolved = np.zeros((count, width))
+    valid = (element >= 0) & (element < len(values))
+    resolved[valid] = values[element[valid]]
+    return resolved
+
+def triangle_material_slots(slots: Optional[np.ndarray], mapping: str, triangle_corners: np.ndarray,
+                            sizes: np.ndarray, material_count: int) -> np.ndarray:
+    """Material slot of every triangle from an FBX material layer element
+
+    slots is the layer's Materials array, mapping its MappingInformationType
+    (ByPolygon, or AllSame for one slot everywhere). Without a layer
+    (slots None) every triangle uses slot 0, as FBX applies a node's first
+    material then. Triangles whose slot is not among the node's
+    material_count materials get -1.
+    """
+    count = len(triangle_corners)
+    if slots is None or not len(slots):
+        element = np.zeros(count, dtype=np.int64)
+        slots = np.zeros(1, dtype=np.int64)
+    elif mapping == 'AllSame':
+        element = np.zeros(count, dtype=np.int64)
+    else:  # ByPolygon
+        polygons = np.repeat(np.arange(len(sizes)), sizes)
+        element = polygons[np.asarray(triangle_corners, dtype=np.int64).reshape(-1, 3)[:, 0]]
+
+    slots = np.asarray(slots, dtype=np.int64).ravel()
+    result = np.full(count, -1, dtype=np.int64)
+    inside = element < len(slots)
+    result[inside] = slots[element[inside]]
+    result[(result < 0) | (result >= material_count)] = -1
+    return result
+
+def find_concave_polygons(positions: np.ndarray, corners: np.ndarray, sizes: np.ndarray) -> np.ndarray:
+    """Flag polygons with at least one reflex corner (turning against the polygon normal)
+
+    Polygons are processed in groups of equal corner count, each as
+    (polygons, corners) blocks per coordinate, so quad-dominant meshes take
+    one pass of plain elementwise arithmetic.
+    """
+    sizes = np.asarray(sizes, dtype=np.int64)
+    concave = np.zeros(len(sizes), dtype=bool)
+    if not len(sizes) or sizes.max() < 4:
+        return concave
+
+    coordinates = np.asarray(positions, dtype=np.float64).T
+    starts = polygon_starts(sizes)
+    for size in np.unique(sizes[sizes >= 4]):
+        members = np.flatnonzero(sizes == size)
+        index = corners[starts[members, None] + np.arange(size)]
+        x, y, z = coordinates[0][index], coordinates[1][index], coordinates[2][index]
+
+        # Outgoing edge at each corner; the incoming one is the previous corner's
+        bx, by, bz = np.roll(x, -1, axis=1) - x, np.roll(y, -1, axis=1) - y, np.roll(z, -1, axis=1) - z
+        ax, ay, az = np.roll(bx, 1, axis=1), np.roll(by, 1, axis=1), np.roll(bz, 1, axis=1)
+
+        # Newell normal (sum of corner x outgoing edge), robust for non-planar polygons
+        nx = (y * bz - z * by).sum(axis=1, keepdims=True)
+        ny = (z * bx - x * bz).sum(axis=1, keepdims=True)
+        nz = (x * by - y * bx).sum(axis=1, keepdims=True)
+
+        # Turn at each corner: incoming edge x outgoing edge
+        tx, ty, tz = ay * bz - az * by, az * bx - ax * bz, ax * by - ay * bx
+
+        alignment = tx * nx + ty * ny + tz * nz
+        magnitude = (tx * tx + ty * ty + tz * tz) * (nx * nx + ny * ny + nz * nz)
+        reflex = (alignment < 0) & (alignment * alignment > 1e-24 * magnitude)
+        concave[members] = reflex.any(axis=1)
+    return concave
+
+def ear_clip(points: np.ndarray) -> List[Tuple[int, int, int]]:
+    """Triangulate one simple polygon (n, 3) by ear clipping; returns local corner triples
+
+    The polygon is projected onto the plane its normal is most aligned
+    with. Triangles keep the polygon's winding. If no ear can be found
+    (degenerate or self-intersecting input), the remainder is fanned.
+    """
+    normal = np.cross(points, np.roll(points, -1, axis=0)).sum(axis=0)
+    axis = int(np.argmax(np.abs(normal)))
+    u, v = points[:, (axis + 1) % 3], points[:, (axis + 2) % 3]
+    orientation = 1.0 if normal[axis] >= 0 else -1.0
+
+    def turn(a, b, c):
+        return orientation * ((u[b] - u[a]) * (v[c] - v[b]) - (v[b] - v[a]) * (u[c] - u[b]))
+
+    remaining = list(range(len(points)))
+    triangles = []
+    while len(remaining) > 3:
+        for i in range(len(remaining)):
+            a, b, c = remaining[i - 1], remaining[i], remaining[(i + 1) % len(remaining)]
+            if turn(a, b, c) <= 0:
+                continue
+            if any(turn(a, b, p) >= 0 and turn(b, c, p) >= 0 and turn(c, a, p) >= 0
+                   for p in remaining if p not in (a, b, c)):
+                continue
+            triangles.append((a, b, c))
+            del remaining[i]
+            break
+        else:
+            break
+
+    triangles.extend((remaining[0], remaining[i], remaining[i + 1]) for i in range(1, len(remaining) - 1))
+    return triangles
+
+def triangulate_polygons(positions: np.ndarray, corners: np.ndarray, sizes: np.ndarray) -> np.ndarray:
+    """Triangulate a polygon stream into (M, 3) corner-stream indices
+
+    Convex polygons are fanned from their first corner with array ops;
+    concave ones are ear-clipped individually. Triangles come out in
+    polygon order and keep each polygon's winding. Polygons with fewer
+    than three corners are dropped.
+    """
+    sizes = np.asarray(sizes, dtype=np.int64)
+    starts = polygon_starts(sizes)
+    concave = find_concave_polygons(positions, corners, sizes)
+
+    fanned = np.flatnonzero((sizes >= 3) & ~concave)
+    counts = sizes[fanned] - 2
+    owner = np.repeat(fanned, counts)
+    step = np.arange(counts.sum()) - np.repeat(np.cumsum(counts) - counts, counts)
+    first = starts[owner]
+    triangles = np.stack([first, first + step + 1, first + step + 2], axis=1)
+
+    if concave.any():
+        points = np.asarray(positions, dtype=np.float64)
+        clipped, clipped_owner = [], []
+        for p in np.flatnonzero(concave):
+            polygon = np.arange(starts[p], starts[p] + sizes[p])
+            local = np.array(ear_clip(points[corners[polygon]]), dtype=np.int64).reshape(-1, 3)
+            clipped.append(polygon[local])
+            clipped_owner.append(np.full(len(local), p))
+        triangles = np.concatenate([triangles] + clipped)
+        owner = np.concatenate([owner] + clipped_owner)
+        triangles = triangles[np.argsort(owner, kind='stable')]
+
+    return triangles.reshape(-1, 3)
+
+def vertex_normals(mesh: Dict[str, Any]) -> np.ndarray:
+    """One normal per control point: the leading normal layer values, zero-padded"""
+    count = len(mesh['vertices'])
+    normals = np.zeros((count, 3))
+    available = min(count, len(mesh['normals']))
+    normals[:available] = mesh['normals'][:available]
+    return normals
+
+def _triangle_corner_attributes(mesh: Dict[str, Any], normals: np.ndarray,
+                                uvs: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """Normals and UVs of every triangle corner, as (3M, 3) and (3M, 2) arrays
+
+    Uses the per-corner layers when the reader provided them and falls back
+    to the per-control-point values otherwise.
+    """
+    triangles = mesh['triangles']
+    triangle_corners = mesh.get('triangle_corners')
+    corner_normals = mesh.get('corner_normals', np.zeros((0, 3)))
+    corner_uvs = mesh.get('corner_uvs', np.zeros((0, 2)))
+    if triangle_corners is not None and len(corner_normals):
+        normals = corner_normals[triangle_corners]
+    else:
+        normals = normals[triangles]
+    if triangle_corners is not None and len(corner_uvs):
+        uvs = corner_uvs[triangle_corners]
+    else:
+        uvs = uvs[triangles]
+    return normals.reshape(-1, 3), uvs.reshape(-1, 2)
+
+def merge_meshes(meshes: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """Merge mesh dicts into one mesh dict in world space
+
+    Every output array is preallocated from the summed sizes and each mesh
+    is copied into its slice: positions through one matrix multiply with
+    the mesh's node transform, normals through the inverse transpose,
+    triangle indices and skin influences offset in bulk. Per-corner normals
+    and UVs are flattened to one entry per triangle corner. The merged
+    skin concatenates every mesh's clusters; 'parts' keeps the source
+    meshes so their cluster matrices can be sampled (see
+    FBXToMDLConverter._sample_merged_cluster_matrices). Missing normals and
+    UVs are zero-filled; without any normal layer the merged one is empty.
+    Material indices refer to the scene's material list and are copied
+    as they are; 'materials' lists the distinct indices of all meshes.
+    """
+    vertex_counts = np.array([len(mesh['vertices']) for mesh in meshes], dtype=np.int64)
+    triangle_counts = np.array([len(mesh['triangles']) for mesh in meshes], dtype=np.int64)
+    vertex_offsets = np.cumsum(vertex_counts) - vertex_counts
+    triangle_offsets = np.cumsum(triangle_counts) - triangle_counts
+    total_vertices, total_triangles = int(vertex_counts.sum()), int(triangle_counts.sum())
+
+    vertices = np.empty((total_vertices, 3))
+    normals = np.empty((total_vertices, 3))
+    uvs = np.zeros((total_vertices, 2))
+    triangles = np.empty((total_triangles, 3), dtype=np.int32)
+    corner_normals = np.empty((3 * total_triangles, 3))
+    corner_uvs = np.empty((3 * total_triangles, 2))
+    triangle_materials = np.full(total_triangles, -1, dtype=np.int64)
+    materials = {}
+    links, bind_matrices, vertex_ids, cluster_ids, weights = [], [], [], [], []
+
+    for mesh, v0, count, t0, triangle_count in zip(meshes, vertex_offsets, vertex_counts,
+                                                   triangle_offsets, triangle_counts):
+        transform = mesh.get('transform', np.eye(4))
+        linear, normal_matrix = transform[:3, :3], np.linalg.pinv(transform[:3, :3]).T
+        v1, t1 = v0 + count, t0 + triangle_count
+
+        mesh_normals = vertex_normals(mesh)
+        mesh_uvs = np.zeros((count, 2))
+        mesh_uvs[:min(count, len(mesh['uvs']))] = mesh['uvs'][:count]
+
+        vertices[v0:v1] = mesh['vertices'] @ linear.T + transform[:3, 3]
+        normals[v0:v1] = mesh_normals @ normal_matrix.T
+        uvs[v0:v1] = mesh_uvs
+        triangles[t0:t1] = mesh['triangles'] + v0
+
+        triangle_normals, triangle_uvs = _triangle_corner_attributes(mesh, mesh_normals, mesh_uvs)
+        corner_normals[3 * t0:3 * t1] = triangle_normals @ normal_matrix.T
+        corner_uvs[3 * t0:3 * t1] = triangle_uvs
+
+        if mesh.get('triangle_materials') is not None:
+            triangle_materials[t0:t1] = mesh['triangle_materials']
+            materials.update(dict.fromkeys(index for index in mesh.get('materials', []) if index >= 0))
+
+        skin = mesh.get('skin') or rigid_skin(None, count)
+        mesh_vertex_ids, mesh_cluster_ids, mesh_weights = skin['influences']
+        vertex_ids.append(np.asarray(mesh_vertex_ids) + v0)
+        cluster_ids.append(np.asarray(mesh_cluster_ids) + len(bind_matrices))
+        weights.append(np.asarray(mesh_weights, dtype=np.float64))
+        links.extend(skin.get('links', [None] * len(skin['bind_matrices'])))
+        bind_matrices.extend(skin['bind_matrices'])
+
+    if not any(len(mesh['normals']) for mesh in meshes):
+        normals = normals[:0]  # keep "no normal layer" distinguishable from zero normals
+
+    return {
+        'name': '+'.join(mesh['name'] for mesh in meshes),
+        'vertices': vertices,
+        'normals': normals,
+        'uvs': uvs,
+        'triangles': triangles,
+        'triangle_corners': np.arange(3 * total_triangles).reshape(-1, 3),
+        'corner_normals': corner_normals,
+        'corner_uvs': corner_uvs,
+        'materials': list(materials),
+        'triangle_materials': triangle_materials,
+        'transform': np.eye(4),
+        'skin': {
+            'links': links,
+            'bind_matrices': np.array(bind_matrices).reshape(-1, 4, 4),
+            'influences': (np.concatenate(vertex_ids).astype(np.int64),
+                           np.concatenate(cluster_ids).astype(np.int64), np.concatenate(weights))
+        },
+        'parts': list(meshes)
+    }
+
+def group_rows(rows: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """Group id of every row of an (N, K) integer array, and each group's first row
+
+    Groups are numbered in sorted row order.
+    """
+    order = np.lexsort(rows.T[::-1])
+    sorted_rows = rows[order]
+    first = np.ones(len(rows), dtype=bool)
+    first[1:] = (sorted_rows[1:] != sorted_rows[:-1]).any(axis=1)
+    group = np.empty(len(rows), dtype=np.int64)
+    group[order] = np.cumsum(first) - 1
+    return group, order[first]
+
+def influence_signatures(influences: Tuple[np.ndarray, np.ndarray, np.ndarray], vertex_count: int) -> np.ndarray:
+    """Id per control point such that points share an id exactly when their skin influences match"""
+    vertex_ids, cluster_ids, weights = (np.asarray(a) for a in influences)
+    order = np.lexsort((cluster_ids, vertex_ids))
+    vertex_ids = vertex_ids[order]
+    counts = np.bincount(vertex_ids, minlength=vertex_count)
+    rank = np.arange(len(vertex_ids)) - (np.cumsum(counts) - counts)[vertex_ids]
+
+    table = np.full((vertex_count, max(1, counts.max(initial=0)), 2), -1, dtype=np.int64)
+    table[vertex_ids, rank, 0] = cluster_ids[order]
+    table[vertex_ids, rank, 1] = (np.asarray(weights, dtype=np.float64)[order] + 0.0).view(np.int64)
+    return group_rows(table.reshape(vertex_count, -1))[0]
+
+def weld_vertices(mesh: Dict[str, Any], normal_indices: np.ndarray,
+                  skin_width: int, skin_height: int) -> Dict[str, Any]:
+    """Build one MDL vertex per distinct (position, normal index, texel) triangle corner
+
+    normal_indices holds the ANORMS index of every triangle corner of a
+    merge_meshes() result. Corners weld when their positions, skin
+    influences, normal indices and integer skin texcoords all match, so
+    vertices are only split where the MDL output would really differ.
+
+    A vertex needed at texcoord s on front triangles and s + skin_width / 2
+    on others is stored once with on_seam set; those other triangles are
+    marked as back faces (faces_front False) so the engine applies the
+    offset. Vertices come out in control point order.
+
+    Returns a mesh dict whose vertices, normals, uvs and skin are per
+    welded vertex, plus 'on_seam' (W,) and 'faces_front' (M,) flags.
+    """
+    positions = np.asarray(mesh['vertices'], dtype=np.float64)
+    corner_points = np.asarray(mesh['triangles'], dtype=np.int64).ravel()
+    corners = np.asarray(mesh['triangle_corners']).ravel()
+    corner_uvs = np.asarray(mesh['corner_uvs'])[corners]
+    texels = np.column_stack([np.trunc(corner_uvs[:, 0] * skin_width),
+                              np.trunc(corner_uvs[:, 1] * skin_height)]).astype(np.int64)
+    signatures = influence_signatures(mesh['skin']['influences'], len(positions))
+
+    # Weld on (position, skin, normal index, texel)
+    point_group, _ = group_rows(np.column_stack([(positions + 0.0).view(np.int64), signatures]))
+    keys = np.column_stack([point_group[corner_points], np.asarray(normal_indices, dtype=np.int64), texels])
+    corner_vertex, first = group_rows(keys)
+
+    # Put vertices in order of their first corner's control point
+    order = np.lexsort((first, corner_points[first]))
+    rank = np.empty(len(order), dtype=np.int64)
+    rank[order] = np.arange(len(order))
+    corner_vertex, first = rank[corner_vertex], first[order]
+    keys = keys[first]
+
+    # Seam pairs: same key but s shifted by half the skin width
+    half = skin_width // 2
+    front = keys[:, 2] < half
+    shifted = keys.copy()
+    shifted[:, 2] -= half
+    group, _ = group_rows(np.concatenate([keys[front], shifted[~front]]))
+    partner_of = np.full(len(group), -1)
+    partner_of[group[:front.sum()]] = np.flatnonzero(front)
+    partner = np.full(len(keys), -1)
+    partner[~front] = partner_of[group[front.sum():]]
+
+    # A triangle cannot use both the front copy of one seam vertex and the
+    # back copy of another; drop the pairs whose back copies cause that
+    triangles = corner_vertex.reshape(-1, 3)
+    paired = partner >= 0
+    while True:
+        on_seam = np.zeros(len(keys), dtype=bool)
+        on_seam[partner[paired]] = True
+        back = paired[triangles].any(axis=1)
+        conflict = back & on_seam[triangles].any(axis=1)
+        if not conflict.any():
+            break
+        paired[triangles[conflict][paired[triangles[conflict]]]] = False
+
+    # Fold back copies into their front vertex and compact
+    target = np.where(paired, partner, np.arange(len(keys)))
+    kept = np.flatnonzero(~paired)
+    index = np.full(len(keys), -1)
+    index[kept] = np.arange(len(kept))
+    triangles = index[target[triangles]].astype(np.int32)
+    first, on_seam = first[kept], on_seam[kept]
+
+    # Each vertex keeps its control point's influences
+    source = corner_points[first]
+    vertex_ids, cluster_ids, weights = (np.asarray(a) for a in mesh['skin']['influences'])
+    by_point = np.argsort(source, kind='stable')
+    copies = np.bincount(source, minlength=len(positions))
+    starts = np.cumsum(copies) - copies
+    repeat = copies[vertex_ids]
+    influence = np.repeat(np.arange(len(vertex_ids)), repeat)
+    local = np.arange(repeat.sum()) - np.repeat(np.cumsum(repeat) - repeat, repeat)
+    welded_ids = by_point[starts[vertex_ids[influence]] + local]
+
+    corner_normals = np.asarray(mesh['corner_normals'])[corners]
+    return dict(
+        mesh,
+        vertices=positions[source],
+        normals=corner_normals[first] if len(mesh['normals']) else np.zeros((0, 3)),
+        uvs=corner_uvs[first],
+        triangles=triangles,
+        triangle_corners=np.arange(triangles.size).reshape(-1, 3),
+        corner_normals=corner_normals,
+        corner_uvs=corner_uvs,
+        skin=dict(mesh['skin'], influences=(welded_ids, cluster_ids[influence], weights[influence])),
+        on_seam=on_seam,
+        faces_front=~back
+    )
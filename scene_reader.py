@@ -0,0 +1,176 @@
+#!/usr/bin/env python3
+"""
+Scene reader interface for the FBX to MDL Converter
+A scene reader loads one FBX file and hands its contents to the converter as
+plain dicts of NumPy arrays, so the rest of the pipeline does not care which
+library parsed the file. Backends:
+- 'sdk': the Autodesk FBX SDK bindings (FBXSDKSceneReader in
+  fbx_to_mdl_converter.py)
+- 'binary': a pure-Python parser for binary FBX 7.x files
+  (BinaryFBXSceneReader in fbx_binary_reader.py)
+
+Mesh dicts returned by read_meshes() hold:
+    name              node name
+    vertices          (N, 3) float64 control points
+    normals           (K, 3) float64 normal layer values
+    uvs               (K, 2) float64 UV layer values, V flipped for MDL skins
+    triangles         (M, 3) int32 control point indices; every polygon is
+                      triangulated (see mesh_processing.triangulate_polygons)
+    triangle_corners  (M, 3) positions of the triangles' corners in the
+                      polygon-vertex stream
+    corner_normals    (C, 3) normal of every polygon corner, or empty
+    corner_uvs        (C, 2) UV of every polygon corner (V flipped), or empty
+    materials         index in read_materials() of the node's material in
+                      every slot, -1 for an empty slot
+    triangle_materials (M,) int64 index in read_materials() of every
+                      triangle's material, -1 for none
+    transform         4x4 global node transform acting on column vectors
+    skin              {'links', 'bind_matrices', 'influences'}, see rigid_skin()
+"""
+
+from typing import List, Dict, Any, Tuple, Callable, Iterable, Optional
+
+import numpy as np
+
+def normalize_influences(vertex_ids: np.ndarray, cluster_ids: np.ndarray, weights: np.ndarray,
+                         vertex_count: int) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """Scale skin weights so every influenced vertex's weights sum to one"""
+    total = np.bincount(vertex_ids, weights=weights, minlength=vertex_count)
+    scale = np.divide(1.0, total, out=np.zeros_like(total), where=total > 0)
+    return vertex_ids, cluster_ids, weights * scale[vertex_ids]
+
+def rigid_skin(link, vertex_count: int) -> Dict[str, Any]:
+    """Skin data binding every control point to one link with full weight
+
+    A mesh without a skin deformer is treated as rigidly bound to its own
+    node, so all meshes animate through the same path.
+    """
+    return {
+        'links': [link],
+        'bind_matrices': np.eye(4)[None],
+        'influences': (np.arange(vertex_count), np.zeros(vertex_count, dtype=np.int64),
+                       np.ones(vertex_count))
+    }
+
+class MaterialRegistry:
+    """The distinct materials of a scene, keyed by their object's unique ID
+
+    Meshes refer to materials by their index in self.materials, so a
+    material is built once however many slots use it, and two materials
+    with equal values stay distinct. Texture paths are resolved once per
+    texture object, however many materials share it.
+    """
+
+    def __init__(self):
+        self.materials = []
+        self._indices = {}
+        self._texture_paths = {}
+
+    def index(self, key, build: Callable[[], Dict[str, Any]]) -> int:
+        """Index of the material with unique ID key, calling build() to create it the first time"""
+        index = self._indices.get(key)
+        if index is None:
+            index = self._indices[key] = len(self.materials)
+            self.materials.append(build())
+        return index
+
+    def texture_path(self, key, resolve: Callable[[], Optional[str]]) -> Optional[str]:
+        """Path of the texture with unique ID key, calling resolve() the first time"""
+        if key not in self._texture_paths:
+            self._texture_paths[key] = resolve()
+        return self._texture_paths[key]
+
+class SceneWalker:
+    """Single-pass, explicit-stack walk of a scene's node tree
+
+    Visitors are registered for an attribute type ('mesh', 'skeleton') or,
+    with attribute None, for every node, and are called as
+    visitor(node, index) in depth-first order. walk() returns the flat node
+    table: one {'name', 'parent', 'attribute'} dict per node, 'parent' being
+    the parent's index in the table (-1 for a root). The table being built
+    is self.nodes, so visitors can look up a node's ancestors. No recursion
+    is used, so arbitrarily deep hierarchies are fine.
+    """
+
+    def __init__(self, children: Callable[[Any], Iterable[Any]], name: Callable[[Any], str],
+                 attribute: Callable[[Any], Optional[str]]):
+        self.children = children
+        self.name = name
+        self.attribute = attribute
+        self.visitors = {}
+        self.nodes = []
+
+    def register(self, visitor: Callable[[Any, int], None], attribute: Optional[str] = None):
+        """Call visitor(node, index) for nodes of an attribute type, or for all nodes"""
+        self.visitors.setdefault(attribute, []).append(visitor)
+
+    def walk(self, roots: Iterable[Any]) -> List[Dict[str, Any]]:
+        """Visit every node below (and including) roots; return the node table"""
+        self.nodes = nodes = []
+        everywhere = self.visitors.get(None, [])
+        stack = [(root, -1) for root in reversed(list(roots))]
+        while stack:
+            node, parent = stack.pop()
+            index = len(nodes)
+            attribute = self.attribute(node)
+            nodes.append({'name': self.name(node), 'parent': parent, 'attribute': attribute})
+            for visitor in self.visitors.get(attribute, []) if attribute is not None else []:
+                visitor(node, index)
+            for visitor in everywhere:
+                visitor(node, index)
+            stack.extend((child, index) for child in reversed(list(self.children(node))))
+        return nodes
+
+class SceneReader:
+    """Base class of the FBX scene backends
+
+    initialize() and shutdown() bracket the reader's lifetime and may hold
+    expensive process-wide state (such as an FBX SDK manager) across many
+    files; load() and unload() bracket one file.
+    """
+    name = 'base'
+    supports_animation = True
+
+    def initialize(self):
+        """Set up backend state shared by every file this reader loads"""
+
+    def shutdown(self):
+        """Release backend state created by initialize()"""
+
+    def load(self, filepath: str):
+        """Load an FBX file, replacing any previously loaded one"""
+        raise NotImplementedError
+
+    def unload(self):
+        """Drop the loaded file so the next load() starts from a clean scene"""
+
+    def read_meshes(self) -> List[Dict[str, Any]]:
+        """Return a mesh dict (see module docstring) for every mesh node"""
+        raise NotImplementedError
+
+    def read_bones(self) -> List[Dict[str, Any]]:
+        """Return {'name', 'parent', 'transform'} for every skeleton node"""
+        return []
+
+    def read_nodes(self) -> List[Dict[str, Any]]:
+        """Return the flat node table of the scene (see SceneWalker.walk())
+
+        'attribute' is 'mesh', 'skeleton' or None for any other node.
+        """
+        return []
+
+    def read_animations(self) -> List[Dict[str, Any]]:
+        """Return {'name', 'start_time', 'end_time', 'frames'} for every animation stack"""
+        return []
+
+    def read_materials(self) -> List[Dict[str, Any]]:
+        """Return the distinct materials assigned to nodes (see MaterialRegistry)"""
+        return []
+
+    def sample_cluster_matrices(self, mesh: Dict[str, Any], anim_index: int, times) -> np.ndarray:
+        """Evaluate a mesh's (F, C, 4, 4) cluster matrices at the given times (seconds)
+
+        Matrices map bind-pose control points into the mesh node's default
+        (unanimated) space, matching the static export.
+        """
+        raise NotImplementedError(f"the {self.name} scene reader cannot sample animations")
@@ -6,11 +6,37 @@ This script performs basic validation of the converter functionality.
 
 import os
 import sys
+import json
 import struct
+import tempfile
 from pathlib import Path
 
+import numpy as np
+
+def _import_converter():
+    """Import the converter module (the FBX SDK is only loaded for conversions)"""
+    sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+    import fbx_to_mdl_converter
+    return fbx_to_mdl_converter
+
+def _make_cube_mesh(converter_module):
+    """Build the 20-unit cube that demo_cube.mdl was written from"""
+    anorms = converter_module.ANORMS
+    return {
+        'name': 'cube',
+        'vertices': np.array([[-10, -10, -10], [10, -10, -10], [10, 10, -10], [-10, 10, -10],
+                              [-10, -10, 10], [10, -10, 10], [10, 10, 10], [-10, 10, 10]], dtype=np.float64),
+        'normals': np.array([anorms[6]] * 4 + [anorms[5]] * 4, dtype=np.float64),
+        'uvs': np.array([[0, 0], [0.25, 0], [0.25, 0.25], [0, 0.25]] * 2, dtype=np.float64),
+        'triangles': np.array([[0, 1, 2], [0, 2, 3], [4, 6, 5], [4, 7, 6], [0, 4, 5], [0, 5, 1],
+                               [2, 6, 7], [2, 7, 3], [0, 3, 7], [0, 7, 4], [1, 5, 6], [1, 6, 2]],
+                              dtype=np.int32),
+        'materials': []
+    }
+
 def validate_mdl_file(mdl_path):
     """Validate that an MDL file has correct structure"""
+    from mdl_reader import read_mdl, validate_mdl
     print(f"Validating MDL file: {mdl_path}")
     
     if not os.path.exists(mdl_path):
@@ -18,55 +44,30 @@ def validate_mdl_file(mdl_path):
         return False
     
     try:
-        with open(mdl_path, 'rb') as f:
-            # Read header
-            magic = struct.unpack('<I', f.read(4))[0]
-            version = struct.unpack('<I', f.read(4))[0]
-            
-            # Check magic number
-            if magic != 1330660425:  # "IDPO"
-                print(f"❌ Invalid magic number: {magic} (expected 1330660425)")
-                return False
-            
-            # Check version
-            if version != 6:
-                print(f"❌ Invalid version: {version} (expected 6)")
-                return False
-            
-            # Read scale and translate
-            scale = struct.unpack('<fff', f.read(12))
-            translate = struct.unpack('<fff', f.read(12))
-            bounding_radius = struct.unpack('<f', f.read(4))[0]
-            eye_pos = struct.unpack('<fff', f.read(12))
-            
-            # Read counts
-            num_skins = struct.unpack('<I', f.read(4))[0]
-            skin_width = struct.unpack('<I', f.read(4))[0]
-            skin_height = struct.unpack('<I', f.read(4))[0]
-            num_verts = struct.unpack('<I', f.read(4))[0]
-            num_tris = struct.unpack('<I', f.read(4))[0]
-            num_frames = struct.unpack('<I', f.read(4))[0]
+        with read_mdl(mdl_path) as mdl:
+            header = mdl.header
+            problems = validate_mdl(mdl)
             
             print(f"✅ Valid MDL header")
-            print(f"   Magic: {magic} (IDPO)")
-            print(f"   Version: {version}")
-            print(f"   Scale: {scale}")
-            print(f"   Translate: {translate}")
-            print(f"   Bounding radius: {bounding_radius}")
-            print(f"   Skins: {num_skins}")
-            print(f"   Skin size: {skin_width}x{skin_height}")
-            print(f"   Vertices: {num_verts}")
-            print(f"   Triangles: {num_tris}")
-            print(f"   Frames: {num_frames}")
+            print(f"   Magic: {header['magic']} (IDPO)")
+            print(f"   Version: {header['version']}")
+            print(f"   Scale: {tuple(header['scale'])}")
+            print(f"   Translate: {tuple(header['translate'])}")
+            print(f"   Bounding radius: {header['bounding_radius']}")
+            print(f"   Skins: {header['num_skins']}")
+            print(f"   Skin size: {header['skin_width']}x{header['skin_height']}")
+            print(f"   Vertices: {header['num_verts']}")
+            print(f"   Triangles: {header['num_tris']}")
+            print(f"   Frames: {header['num_frames']}")
             
-            if num_verts == 0:
+            if header['num_verts'] == 0:
                 print("⚠️  Warning: No vertices found")
-            if num_tris == 0:
+            if header['num_tris'] == 0:
                 print("⚠️  Warning: No triangles found")
-            if num_frames == 0:
-                print("⚠️  Warning: No frames found")
             
-            return True
+            for problem in problems:
+                print(f"❌ {problem}")
+            return not problems
             
     except Exception as e:
         print(f"❌ Error reading MDL file: {e}")
@@ -84,19 +85,14 @@ def create_simple_test_fbx():
 def test_converter_import():
     """Test if the converter can be imported properly"""
     try:
-        # Try importing without FBX SDK first
-        sys.path.insert(0, '.')
-        
-        # Mock FBX SDK to test other parts
-        import types
-        fbx_mock = types.ModuleType('fbx')
-        sys.modules['fbx'] = fbx_mock
-        sys.modules['FbxCommon'] = fbx_mock
-        
-        # Test basic imports
-        from fbx_to_mdl_converter import Vector3, MDLVertex, MDLTriangle, MDLTexCoord, MDLSkin, MDLFrame
+        # The FBX SDK is only loaded for conversions, so no stand-in is needed
+        sdk_loaded = {name for name in ('fbx', 'FbxCommon') if name in sys.modules}
+        conv = _import_converter()
+        Vector3, MDLVertex, MDLTriangle, MDLTexCoord = conv.Vector3, conv.MDLVertex, conv.MDLTriangle, conv.MDLTexCoord
         
         print("✅ Successfully imported converter classes")
+        assert {name for name in ('fbx', 'FbxCommon') if name in sys.modules} == sdk_loaded
+        print("✅ Importing the converter does not load the FBX SDK")
         
         # Test Vector3 functionality
         v1 = Vector3(1, 2, 3)
@@ -116,6 +112,1385 @@ def test_converter_import():
         print(f"❌ Import test failed: {e}")
         return False
 
+def test_mesh_arrays():
+    """Test the NumPy mesh core against the reference demo_cube.mdl"""
+    conv = _import_converter()
+    
+    positions = np.array([[-10.0, 0.0, 5.0], [10.0, 2.0, 5.0], [0.0, 4.0, 5.0]])
+    scale, translate = conv.compute_scale_translate(positions)
+    assert np.allclose(scale, [20.0 / 255.0, 4.0 / 255.0, 1.0])
+    assert np.array_equal(translate, [-10.0, 0.0, 5.0])
+    compressed = conv.compress_positions(positions + [[0, 0, 0], [0, 0, 0], [100, -100, 0]], scale, translate)
+    assert compressed.dtype == np.uint8
+    assert compressed.tolist() == [[0, 0, 0], [255, 127, 0], [255, 0, 0]]
+    print("✅ Array bbox, scale/translate and clamping work")
+    
+    frame = conv.MDLFrame("idle", [conv.MDLVertex(conv.Vector3(1, 2, 3), 4)])
+    assert frame.vertices.tolist() == [[129, 130, 131, 4]]
+    assert frame.bbox_max.v == [129, 130, 131]
+    
+    converter = conv.FBXToMDLConverter()
+    converter.meshes = [_make_cube_mesh(conv)]
+    with tempfile.TemporaryDirectory() as tmp:
+        output = os.path.join(tmp, 'cube.mdl')
+        converter.write_mdl_file(output)
+        with open(output, 'rb') as f:
+            written = f.read()
+    with open(os.path.join(os.path.dirname(os.path.abspath(__file__)), 'demo_cube.mdl'), 'rb') as f:
+        assert written == f.read()
+    print("✅ Cube output matches demo_cube.mdl")
+    
+    return True
+
+def _scan_closest_normal_index(normal):
+    """Reference linear scan over ANORMS, as the converter originally did it"""
+    conv = _import_converter()
+    normal = conv.Vector3(*normal).normalize()
+    best_dot, best_index = -2.0, 0
+    for i, anorm in enumerate(conv.ANORMS[:162]):
+        dot = normal.dot(conv.Vector3(*anorm))
+        if dot > best_dot:
+            best_dot, best_index = dot, i
+    return best_index
+
+def test_normal_quantization():
+    """Test that batched normal quantization matches the linear scan exactly"""
+    conv = _import_converter()
+    
+    rng = np.random.default_rng(162)
+    anorms = np.array(conv.ANORMS[:162])
+    normals = np.concatenate([
+        rng.normal(size=(2000, 3)),
+        anorms,
+        (anorms[:-1] + anorms[1:]) * 0.5,  # near-ties between neighbours
+        [[0.0, 0.0, 0.0], [0.0, 0.0, -3.0]],
+    ])
+    
+    expected = [_scan_closest_normal_index(n) for n in normals]
+    indices = conv.quantize_normals(normals)
+    assert indices.dtype == np.uint8
+    assert indices.tolist() == expected
+    
+    converter = conv.FBXToMDLConverter()
+    assert converter.find_closest_normal_index(conv.Vector3(*normals[7])) == expected[7]
+    print(f"✅ Batched normal quantization matches the scan on {len(normals)} normals")
+    
+    return True
+
+def test_bulk_writer():
+    """Test that the single-buffer writer lays out every section"""
+    conv = _import_converter()
+    
+    converter = conv.FBXToMDLConverter()
+    skins = [conv.MDLSkin(8, 8, bytes(range(64))), conv.MDLSkin(8, 8, bytes(64))]
+    texcoords = [conv.MDLTexCoord(1, 2), conv.MDLTexCoord(3, 4, on_seam=True), conv.MDLTexCoord(5, 6)]
+    triangles = [conv.MDLTriangle([0, 1, 2]), conv.MDLTriangle([2, 1, 0], faces_front=False)]
+    vertices = np.array([[0, 0, 0, 1], [255, 10, 20, 2], [30, 255, 40, 3]], dtype=np.uint8)
+    frames = [conv.MDLFrame("a", vertices), conv.MDLFrame("b", vertices[::-1])]
+    
+    with tempfile.TemporaryDirectory() as tmp:
+        from_objects = os.path.join(tmp, 'objects.mdl')
+        from_arrays = os.path.join(tmp, 'arrays.mdl')
+        converter._write_mdl_binary(from_objects, skins, texcoords, triangles, frames, 8, 8)
+        converter._write_mdl_binary(from_arrays, skins, conv.texcoords_to_array(texcoords),
+                                    conv.triangles_to_array(triangles), frames, 8, 8)
+        with open(from_objects, 'rb') as f:
+            data = f.read()
+        with open(from_arrays, 'rb') as f:
+            assert f.read() == data
+    
+    assert len(data) == 84 + 2 * (4 + 64) + 3 * 12 + 2 * 16 + 2 * (28 + 3 * 4)
+    offset = 84 + 2 * (4 + 64)
+    assert struct.unpack_from('<3i', data, offset + 12) == (1, 3, 4)
+    assert struct.unpack_from('<4i', data, offset + 36 + 16) == (0, 2, 1, 0)
+    frame_offset = offset + 36 + 32 + 40
+    assert data[frame_offset + 4:frame_offset + 12] == bytes([0, 0, 0, 0, 255, 255, 40, 0])
+    assert data[frame_offset + 12:frame_offset + 28] == b'b' + bytes(15)
+    assert data[frame_offset + 28:frame_offset + 40] == vertices[::-1].tobytes()
+    print("✅ Bulk writer sections are laid out correctly")
+    
+    return True
+
+def test_batch_mode():
+    """Test batch input discovery and that failing files don't abort a run"""
+    conv = _import_converter()
+    
+    with tempfile.TemporaryDirectory() as tmp:
+        for name in ('a.fbx', 'sub/b.FBX', 'sub/notes.txt'):
+            path = os.path.join(tmp, 'models', name)
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            with open(path, 'wb') as f:
+                f.write(b'not really an fbx')
+        
+        models = os.path.join(tmp, 'models')
+        found = conv.collect_batch_inputs(models)
+        assert [os.path.relpath(src, models) for src, _ in found] == ['a.fbx', os.path.join('sub', 'b.FBX')]
+        assert len(conv.collect_batch_inputs(os.path.join(models, '**', '*.fbx'))) == 1
+        
+        manifest = os.path.join(tmp, 'manifest.txt')
+        with open(manifest, 'w') as f:
+            f.write("# comment\nmodels/a.fbx\tout/custom.mdl\n\nmodels/sub/b.FBX\n")
+        jobs = conv.plan_batch_jobs(conv.collect_batch_inputs(manifest), os.path.join(tmp, 'build'))
+        assert jobs == [(os.path.join(tmp, 'models/a.fbx'), os.path.join(tmp, 'out/custom.mdl')),
+                        (os.path.join(tmp, 'models/sub/b.FBX'), os.path.join(tmp, 'build', 'b.mdl'))]
+        print("✅ Batch inputs resolve from directories, globs and manifests")
+        
+        results = conv.batch_convert(conv.plan_batch_jobs(found, os.path.join(tmp, 'build')), workers=2)
+        assert sorted(r['input'] for r in results) == sorted(src for src, _ in found)
+        assert all(r['status'] == 'failed' and r['error'] for r in results)
+        print("✅ Failed conversions are reported without aborting the batch")
+    
+    return True
+
+def test_conversion_cache():
+    """Test cache hits, texture invalidation and LRU eviction"""
+    conv = _import_converter()
+    from conversion_cache import ConversionCache
+    
+    class StubConverter(conv.FBXToMDLConverter):
+        """Writes fixed outputs instead of running the FBX SDK"""
+        conversions = 0
+        
+        def convert(self, fbx_path, mdl_path):
+            StubConverter.conversions += 1
+            self.reset()
+            self.materials = [{'name': 'skin', 'diffuse_texture': texture}]
+            bmp_path = os.path.join(os.path.dirname(mdl_path), 'skin.bmp')
+            skin_path = os.path.splitext(mdl_path)[0] + '_1.bmp'
+            for path, data in ((mdl_path, b'MDL' * 100), (bmp_path, b'BMP'), (skin_path, b'BMP')):
+                with open(path, 'wb') as f:
+                    f.write(data)
+            self.output_files.extend([bmp_path, skin_path])
+    
+    with tempfile.TemporaryDirectory() as tmp:
+        fbx, texture = os.path.join(tmp, 'model.fbx'), os.path.join(tmp, 'skin.png')
+        for path, data in ((fbx, b'fbx'), (texture, b'png')):
+            with open(path, 'wb') as f:
+                f.write(data)
+        
+        cache = ConversionCache(os.path.join(tmp, 'cache'), max_bytes=400)
+        converter = StubConverter()
+        mdl = os.path.join(tmp, 'out', 'model.mdl')
+        os.makedirs(os.path.dirname(mdl))
+        
+        assert conv.convert_file(converter, fbx, mdl, cache=cache)['cache'] == 'miss'
+        os.remove(os.path.join(tmp, 'out', 'skin.bmp'))
+        renamed = os.path.join(tmp, 'elsewhere', 'renamed.mdl')
+        assert conv.convert_file(converter, fbx, renamed, cache=cache)['cache'] == 'hit'
+        assert StubConverter.conversions == 1
+        with open(renamed, 'rb') as f:
+            assert f.read() == b'MDL' * 100
+        assert os.path.exists(os.path.join(tmp, 'elsewhere', 'skin.bmp'))
+        # Side outputs named after the model follow the new name
+        assert sorted(os.listdir(os.path.join(tmp, 'elsewhere'))) == ['renamed.mdl', 'renamed_1.bmp', 'skin.bmp']
+        print("✅ Unchanged inputs are restored from the cache")
+        
+        # 'auto' is keyed by the backend it resolves to
+        assert converter.cache_options()['backend'] == conv.resolve_backend() in conv.SCENE_READERS
+        assert StubConverter(backend=conv.resolve_backend()).cache_options() == converter.cache_options()
+        
+        with open(texture, 'wb') as f:
+            f.write(b'png v2')
+        assert conv.convert_file(converter, fbx, mdl, cache=cache)['cache'] == 'miss'
+        assert StubConverter.conversions == 2
+        assert (cache.hits, cache.misses) == (1, 2)
+        print("✅ Changed textures invalidate cached entries")
+        
+        assert len(cache.entries()) == 2
+        assert cache.evict() == 1
+        assert len(cache.entries()) == 1
+        assert conv.convert_file(converter, fbx, mdl, cache=cache)['cache'] == 'hit'
+        print("✅ Least recently used entries are evicted over the size cap")
+    
+    return True
+
+def test_animation_sampling():
+    """Test sample planning, skinning math and shared-scale animated frames"""
+    conv = _import_converter()
+    
+    times = conv.plan_sample_times([(0.0, 1.0), (2.0, 2.5)], fps=10)
+    assert [len(t) for t in times] == [11, 6]
+    assert np.allclose(times[1], [2.0, 2.1, 2.2, 2.3, 2.4, 2.5])
+    limited = conv.plan_sample_times([(0.0, 100.0), (0.0, 1.0)], fps=30, max_frames=256)
+    assert sum(len(t) for t in limited) <= 256 and len(limited[1]) >= 1
+    assert limited[0][0] == 0.0 and limited[0][-1] == 100.0
+    
+    # Two clusters translating by +x and +y, vertex 1 split half/half, vertex 2 unweighted
+    positions = np.zeros((3, 3))
+    influences = conv.normalize_influences(np.array([0, 1, 1]), np.array([0, 0, 1]),
+                                           np.array([2.0, 1.0, 1.0]), 3)
+    clusters = np.stack([np.eye(4), np.eye(4)])
+    clusters[0, 0, 3] = 4.0
+    clusters[1, 1, 3] = 8.0
+    blended = conv.blend_skin_matrices(influences, clusters, 3)
+    deformed, _ = conv.deform_vertices(positions, np.zeros((0, 3)), blended)
+    assert np.allclose(deformed, [[4, 0, 0], [2, 4, 0], [0, 0, 0]])
+    print("✅ Sample planning and linear blend skinning work")
+    
+    class SampledConverter(conv.FBXToMDLConverter):
+        """Moves the whole mesh +x by 10 units per second instead of asking the SDK"""
+        def _sample_cluster_matrices(self, mesh, anim_index, times):
+            matrices = np.tile(np.eye(4), (len(times), 1, 1, 1))
+            matrices[:, 0, 0, 3] = np.asarray(times) * 10.0
+            return matrices
+    
+    converter = SampledConverter()
+    mesh = _make_cube_mesh(conv)
+    mesh['skin'] = {'bind_matrices': np.eye(4)[None],
+                    'influences': (np.arange(8), np.zeros(8, dtype=int), np.ones(8))}
+    converter.meshes = [mesh]
+    converter.animations = [{'name': 'walk', 'start_time': 0.0, 'end_time': 1.0, 'frames': [0.0, 0.5, 1.0]},
+                            {'name': 'idle', 'start_time': 0.0, 'end_time': 0.0, 'frames': [0.0]}]
+    with tempfile.TemporaryDirectory() as tmp:
+        output = os.path.join(tmp, 'anim.mdl')
+        converter.write_mdl_file(output)
+        with open(output, 'rb') as f:
+            data = f.read()
+    
+    assert np.allclose(converter.translate, [-10, -10, -10])
+    assert np.allclose(converter.scale_factor, [30 / 255.0, 20 / 255.0, 20 / 255.0])
+    assert struct.unpack_from('<I', data, 68)[0] == 4
+    frame_size = 28 + 8 * 4
+    first_frame = len(data) - 4 * frame_size
+    names = [data[first_frame + i * frame_size + 12:first_frame + i * frame_size + 28].rstrip(b'\0')
+             for i in range(4)]
+    assert names == [b'walk1', b'walk2', b'walk3', b'idle1']
+    last_x = [data[first_frame + 2 * frame_size + 28 + 4 * v] for v in range(8)]
+    assert last_x == [85, 255, 255, 85, 85, 255, 255, 85]
+    print("✅ Animation stacks are sampled into frames with a shared scale")
+    
+    # Take names from the file may hold any Unicode; frame names are ASCII
+    converter.animations[1]['name'] = 'Größe Übung 走る long'
+    with tempfile.TemporaryDirectory() as tmp:
+        output = os.path.join(tmp, 'anim.mdl')
+        converter.write_mdl_file(output)
+        with open(output, 'rb') as f:
+            data = f.read()
+    assert data[first_frame + 3 * frame_size + 12:first_frame + 3 * frame_size + 28] == b'Gr__e _bung __ 1'
+    print("✅ Non-ASCII stack names become ASCII frame names")
+    
+    return True
+
+def test_streaming_frames():
+    """Test that frames stream from generators with flat memory"""
+    import tracemalloc
+    conv = _import_converter()
+    
+    converter = conv.FBXToMDLConverter()
+    skins = [conv.MDLSkin(8, 8, bytes(64))]
+    vertices = np.random.default_rng(7).integers(0, 256, size=(50, 4), dtype=np.uint8)
+    frames = [conv.MDLFrame(f"f{i}", np.roll(vertices, i, axis=0)) for i in range(5)]
+    
+    outputs = []
+    with tempfile.TemporaryDirectory() as tmp:
+        for chunk, frame_source in ((conv.MDL_WRITE_CHUNK, frames), (conv.MDL_WRITE_CHUNK, iter(frames)),
+                                    (64, iter(frames))):
+            conv.MDL_WRITE_CHUNK, saved = chunk, conv.MDL_WRITE_CHUNK
+            try:
+                path = os.path.join(tmp, f'{len(outputs)}.mdl')
+                converter._write_mdl_binary(path, skins, [], [], frame_source, 8, 8)
+            finally:
+                conv.MDL_WRITE_CHUNK = saved
+            with open(path, 'rb') as f:
+                outputs.append(f.read())
+    assert outputs[0] == outputs[1] == outputs[2]
+    assert struct.unpack_from('<I', outputs[0], 68)[0] == 5
+    print("✅ Generated frames are written identically, with and without header patching")
+    
+    class SampledConverter(conv.FBXToMDLConverter):
+        """Rigidly moves the mesh instead of asking the SDK"""
+        def _sample_cluster_matrices(self, mesh, anim_index, times):
+            matrices = np.tile(np.eye(4), (len(times), 1, 1, 1))
+            matrices[:, 0, 0, 3] = np.asarray(times)
+            return matrices
+    
+    def peak_memory(frame_count):
+        vertex_count = 20000
+        converter = SampledConverter()
+        converter.meshes = [{
+            'name': 'blob', 'vertices': np.random.default_rng(1).normal(size=(vertex_count, 3)),
+            'normals': np.zeros((0, 3)), 'uvs': np.zeros((0, 2)),
+            'triangles': ((np.arange(vertex_count)[:, None] + [0, 1, 2]) % vertex_count).astype(np.int32),
+            'skin': {'bind_matrices': np.eye(4)[None],
+                     'influences': (np.arange(vertex_count), np.zeros(vertex_count, dtype=int), np.ones(vertex_count))}
+        }]
+        converter.animations = [{'name': 'run', 'frames': list(np.linspace(0, 1, frame_count))}]
+        # Keep every vertex: this measures frame streaming, not decimation
+        limits = conv.MAX_VERTICES, conv.MAX_TRIANGLES
+        conv.MAX_VERTICES = conv.MAX_TRIANGLES = vertex_count
+        try:
+            with tempfile.TemporaryDirectory() as tmp:
+                tracemalloc.start()
+                converter.write_mdl_file(os.path.join(tmp, 'run.mdl'))
+                peak = tracemalloc.get_traced_memory()[1]
+                tracemalloc.stop()
+        finally:
+            conv.MAX_VERTICES, conv.MAX_TRIANGLES = limits
+        return peak
+    
+    few, many = peak_memory(64), peak_memory(256)
+    assert many < few * 1.5, (few, many)
+    print(f"✅ Peak memory stays flat: {few / 1e6:.1f} MB for 64 frames, {many / 1e6:.1f} MB for 256")
+    
+    return True
+
+def test_lazy_backends():
+    """Test that importing the converter does not load the FBX SDK or Pillow"""
+    import subprocess
+    script = ("import sys, fbx_to_mdl_converter as c; "
+              "c.MDLFrame('idle', []); c.quantize_normals([[0, 0, 1]]); "
+              "print(sorted(m for m in sys.modules if m.split('.')[0] in ('fbx', 'FbxCommon', 'pyfbx', 'PIL')))")
+    proc = subprocess.run([sys.executable, '-c', script], capture_output=True, text=True,
+                          cwd=os.path.dirname(os.path.abspath(__file__)))
+    assert proc.returncode == 0, proc.stderr
+    assert proc.stdout.strip() == '[]', proc.stdout
+    print("✅ FBX SDK and Pillow are loaded lazily")
+    
+    conv = _import_converter()
+    assert conv.load_pil() is conv.Image is not None
+    return True
+
+def _encode_fbx_property(value, compress=False):
+    """Encode one binary FBX property (arrays by dtype, Python scalars as C/L/D/S/R)"""
+    if isinstance(value, np.ndarray):
+        code = {'f8': b'd', 'f4': b'f', 'i8': b'l', 'i4': b'i', 'u1': b'b'}[value.dtype.str[1:]]
+        data = value.tobytes()
+        if compress:
+            import zlib
+            data = zlib.compress(data)
+        return code + struct.pack('<III', len(value), int(compress), len(data)) + data
+    if isinstance(value, bool):
+        return b'C' + struct.pack('<?', value)
+    if isinstance(value, int):
+        return b'L' + struct.pack('<q', value)
+    if isinstance(value, float):
+        return b'D' + struct.pack('<d', value)
+    if isinstance(value, str):
+        value = value.encode('utf-8')
+        return b'S' + struct.pack('<I', len(value)) + value
+    return b'R' + struct.pack('<I', len(value)) + value
+
+def _encode_fbx_node(node, offset, version, compress=False):
+    """Encode a (name, properties, children) tuple as a node record starting at offset"""
+    name, properties, children = node
+    header = struct.Struct('<QQQB' if version >= 7500 else '<IIIB')
+    encoded = b''.join(_encode_fbx_property(p, compress) for p in properties)
+    body_offset = offset + header.size + len(name) + len(encoded)
+    body = b''
+    for child in children:
+        body += _encode_fbx_node(child, body_offset + len(body), version, compress)
+    if children:
+        body += bytes(header.size)  # null record ends the child list
+    return (header.pack(body_offset + len(body), len(properties), len(encoded), len(name))
+            + name.encode('ascii') + encoded + body)
+
+def _write_binary_fbx(path, nodes, version=7400, compress=False):
+    """Write top-level (name, properties, children) tuples as a binary FBX file"""
+    data = b'Kaydara FBX Binary  \x00\x1a\x00' + struct.pack('<I', version)
+    for node in nodes:
+        data += _encode_fbx_node(node, len(data), version, compress)
+    data += bytes(25 if version >= 7500 else 13)
+    with open(path, 'wb') as f:
+        f.write(data)
+
+def _fbx_properties70(**values):
+    """Build a Properties70 record from name=(type, values...) pairs"""
+    return ('Properties70', [], [('P', [name.replace('_', ' '), kind, '', 'A', *args], [])
+                                 for name, (kind, *args) in values.items()])
+
+def _make_cube_fbx_nodes(conv):
+    """Scene records for the demo cube, skinned to a bone under a root node"""
+    cube = _make_cube_mesh(conv)
+    polygons = cube['triangles'].astype(np.int32)
+    polygons[:, 2] = ~polygons[:, 2]
+    objects = [
+        ('Geometry', [1000, 'cube\x00\x01Geometry', 'Mesh'], [
+            ('Vertices', [cube['vertices'].ravel()], []),
+            ('PolygonVertexIndex', [polygons.ravel()], []),
+            ('LayerElementNormal', [0], [('MappingInformationType', ['ByControlPoint'], []),
+                                         ('Normals', [cube['normals'].ravel()], [])]),
+            ('LayerElementUV', [0], [('MappingInformationType', ['ByControlPoint'], []),
+                                     ('ReferenceInformationType', ['Direct'], []),
+                                     ('UV', [(cube['uvs'] * [1, -1] + [0, 1]).ravel()], [])]),
+        ]),
+        ('Model', [2000, 'cube\x00\x01Model', 'Mesh'], []),
+        ('Model', [2001, 'root\x00\x01Model', 'Null'], [
+            _fbx_properties70(Lcl_Translation=('Lcl Translation', 0.0, 0.0, 5.0))]),
+        ('Model', [2002, 'bone\x00\x01Model', 'LimbNode'], [
+            _fbx_properties70(Lcl_Translation=('Lcl Translation', 1.0, 0.0, 0.0),
+                              Lcl_Rotation=('Lcl Rotation', 0.0, 0.0, 90.0))]),
+        ('Deformer', [3000, '\x00\x01Deformer', 'Skin'], []),
+        ('Deformer', [3001, '\x00\x01SubDeformer', 'Cluster'], [
+            ('Indexes', [np.arange(8, dtype=np.int32)], []),
+            ('Weights', [np.full(8, 0.5)], []),
+            ('Transform', [np.eye(4).ravel()], []),
+            ('TransformLink', [np.array([1, 0, 0, 0, 0, 1, 0, 0, 0, 0, 1, 0, 1, 0, 5, 1], dtype=np.float64)], []),
+        ]),
+        ('Material', [4000, 'paint\x00\x01Material', ''], [
+            _fbx_properties70(DiffuseColor=('Color', 0.5, 0.25, 1.0))]),
+        ('Texture', [5000, 'paint\x00\x01Texture', ''], [('RelativeFilename', ['textures\\paint.png'], [])]),
+        ('AnimationStack', [6000, 'walk\x00\x01AnimStack', ''], [
+            _fbx_properties70(LocalStop=('KTime', 46186158000 // 2))]),
+    ]
+    connections = [('OO', 2000, 0), ('OO', 1000, 2000), ('OO', 2001, 0), ('OO', 2002, 2001),
+                   ('OO', 3000, 1000), ('OO', 3001, 3000), ('OO', 2002, 3001),
+                   ('OO', 4000, 2000), ('OP', 5000, 4000, 'DiffuseColor')]
+    return [('GlobalSettings', [], [_fbx_properties70(TimeSpanStop=('KTime', 46186158000))]),
+            ('Objects', [], objects),
+            ('Connections', [], [('C', list(c), []) for c in connections])]
+
+def test_binary_fbx_reader():
+    """Test the pure-Python binary FBX backend end to end"""
+    conv = _import_converter()
+    from fbx_binary_reader import BinaryFBXSceneReader, parse_fbx
+    
+    with open(os.path.join(os.path.dirname(os.path.abspath(__file__)), 'demo_cube.mdl'), 'rb') as f:
+        reference = f.read()
+    
+    with tempfile.TemporaryDirectory() as tmp:
+        for version, compress in ((7400, False), (7500, True)):
+            fbx_path = os.path.join(tmp, f'cube{version}.fbx')
+            _write_binary_fbx(fbx_path, _make_cube_fbx_nodes(conv), version, compress)
+            
+            reader = BinaryFBXSceneReader()
+            reader.load(fbx_path)
+            mesh, = reader.read_meshes()
+            assert reader.version == version
+            assert mesh['name'] == 'cube' and mesh['triangles'].shape == (12, 3)
+            assert not mesh['vertices'].flags.owndata  # decoded with frombuffer, not copied
+            assert np.allclose(mesh['uvs'], _make_cube_mesh(conv)['uvs'])
+            assert mesh['skin']['links'] == [2002]
+            assert np.allclose(mesh['skin']['bind_matrices'][0][:3, 3], [-1, 0, -5])
+            assert np.allclose(mesh['skin']['influences'][2], 1.0)
+            
+            bone, = reader.read_bones()
+            assert bone['name'] == 'bone' and bone['parent'] == 'root'
+            assert np.allclose(bone['transform']['translation'], [1, 0, 5])
+            assert np.allclose(bone['transform']['rotation'], [0, 0, 90])
+            assert reader.read_nodes() == [{'name': 'cube', 'parent': -1, 'attribute': 'mesh'},
+                                           {'name': 'root', 'parent': -1, 'attribute': None},
+                                           {'name': 'bone', 'parent': 1, 'attribute': 'skeleton'}]
+            material, = reader.read_materials()
+            assert material['diffuse_color'] == [0.5, 0.25, 1.0]
+            assert material['diffuse_texture'] == os.path.join(tmp, 'textures/paint.png')
+            assert mesh['materials'] == [0] and not mesh['triangle_materials'].any()
+            anim, = reader.read_animations()
+            assert (anim['name'], anim['start_time'], anim['end_time']) == ('walk', 0.0, 0.5)
+            
+            # No texture on disk and no animation sampling: the demo cube comes out
+            mdl_path = os.path.join(tmp, f'cube{version}.mdl')
+            conv.FBXToMDLConverter(backend='binary').convert(fbx_path, mdl_path)
+            with open(mdl_path, 'rb') as f:
+                assert f.read() == reference
+        print("✅ Binary FBX 7.4/7.5, raw and zlib arrays convert without the FBX SDK")
+        
+        ascii_path = os.path.join(tmp, 'ascii.fbx')
+        with open(ascii_path, 'w') as f:
+            f.write('; FBX 7.4.0 project file\n')
+        try:
+            conv.FBXToMDLConverter(backend='binary').convert(ascii_path, os.path.join(tmp, 'ascii.mdl'))
+        except ValueError as e:
+            assert 'ASCII' in str(e)
+        else:
+            raise AssertionError("ASCII FBX was accepted by the binary reader")
+    
+    try:
+        conv.create_scene_reader('maya')
+    except ValueError:
+        pass
+    else:
+        raise AssertionError("unknown backend was accepted")
+    print("✅ ASCII files and unknown backends are rejected")
+    
+    return True
+
+def test_lazy_fbx_decoding():
+    """Test that unused FBX records are never decoded"""
+    import tracemalloc
+    conv = _import_converter()
+    from fbx_binary_reader import BinaryFBXSceneReader
+    
+    # 32 MB of animation curve keys and 16 MB of embedded media nobody exports
+    nodes = _make_cube_fbx_nodes(conv)
+    objects = nodes[1][2]
+    objects.append(('AnimationCurve', [7000, '\x00\x01AnimCurve', ''], [
+        ('KeyTime', [np.arange(4 * 1024 * 1024, dtype=np.int64)], []),
+        ('KeyValueFloat', [np.zeros(4 * 1024 * 1024, dtype=np.float32)], [])]))
+    objects.append(('Video', [7001, 'movie\x00\x01Video', 'Clip'], [('Content', [bytes(16 * 1024 * 1024)], [])]))
+    
+    with tempfile.TemporaryDirectory() as tmp:
+        fbx_path = os.path.join(tmp, 'heavy.fbx')
+        _write_binary_fbx(fbx_path, nodes, 7500, compress=True)
+        
+        converter = conv.FBXToMDLConverter(backend='binary')
+        tracemalloc.start()
+        converter.convert(fbx_path, os.path.join(tmp, 'heavy.mdl'))
+        peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+        assert peak < 4 * 1024 * 1024, peak
+        print(f"✅ {os.path.getsize(fbx_path) / 1e6:.0f} MB FBX converted with {peak / 1e6:.1f} MB peak memory")
+        
+        reader = BinaryFBXSceneReader()
+        reader.load(fbx_path)
+        curve = reader._objects[7000]
+        assert curve._children is None and reader._objects[7001]._children is None
+        assert len(curve.get('KeyTime')) == 4 * 1024 * 1024  # still decodes on request
+        reader.unload()
+    print("✅ Unused records stay undecoded until asked for")
+    
+    return True
+
+def test_triangulation():
+    """Test bulk n-gon triangulation and per-corner layer attributes"""
+    conv = _import_converter()
+    from mesh_processing import polygon_layout, triangulate_polygons, corner_attribute, find_concave_polygons
+    
+    # A quad, an L-shaped (concave) hexagon, a pentagon, a triangle and a degenerate edge
+    positions = np.array([[0, 0, 0], [1, 0, 0], [1, 1, 0], [0, 1, 0],
+                          [0, 0, 1], [2, 0, 1], [2, 1, 1], [1, 1, 1], [1, 2, 1], [0, 2, 1],
+                          [0, 0, 2], [2, 0, 2], [3, 1, 2], [1, 2, 2], [-1, 1, 2]], dtype=np.float64)
+    stream = [0, 1, 2, ~3, 4, 5, 6, 7, 8, ~9, 10, 11, 12, 13, ~14, 0, 1, ~2, 3, ~0]
+    corners, sizes = polygon_layout(np.array(stream, dtype=np.int32))
+    assert sizes.tolist() == [4, 6, 5, 3, 2]
+    assert find_concave_polygons(positions, corners, sizes).tolist() == [False, True, False, False, False]
+    
+    triangle_corners = triangulate_polygons(positions, corners, sizes)
+    triangles = corners[triangle_corners]
+    assert len(triangles) == 2 + 4 + 3 + 1
+    assert triangles[:2].tolist() == [[0, 1, 2], [0, 2, 3]]
+    a, b, c = (positions[triangles[:, i]] for i in range(3))
+    normals = np.cross(b - a, c - a)
+    assert (normals[:, 2] > 0).all()  # every triangle keeps its polygon's winding
+    assert np.isclose(np.linalg.norm(normals[2:6], axis=1).sum() / 2, 3.0)  # L-shape area, no overlap
+    print("✅ Convex polygons are fanned and concave ones ear-clipped")
+    
+    corner_uvs = corner_attribute(np.array([0.0, 0.0, 1.0, 1.0]), 2, 'ByPolygonVertex', 'IndexToDirect',
+                                  corners, sizes, np.array([1, 0] * 10))
+    assert corner_uvs[triangle_corners[0]].tolist() == [[1, 1], [0, 0], [1, 1]]
+    by_polygon = corner_attribute(np.arange(15.0), 3, 'ByPolygon', 'Direct', corners, sizes)
+    assert by_polygon[[0, 4, 10, 15, 18]].tolist() == [[0, 1, 2], [3, 4, 5], [6, 7, 8], [9, 10, 11], [12, 13, 14]]
+    by_point = corner_attribute(positions, 3, 'ByControlPoint', 'Direct', corners, sizes)
+    assert np.array_equal(by_point, positions[corners])
+    print("✅ Per-corner normals and UVs follow every mapping mode")
+    
+    with tempfile.TemporaryDirectory() as tmp:
+        nodes = _make_cube_fbx_nodes(conv)
+        geometry = nodes[1][2][0][2]
+        quads = np.array([0, 1, 2, ~3, 4, 7, 6, ~5], dtype=np.int32)
+        geometry[1] = ('PolygonVertexIndex', [quads], [])
+        geometry[3] = ('LayerElementUV', [0], [('MappingInformationType', ['ByPolygonVertex'], []),
+                                               ('ReferenceInformationType', ['IndexToDirect'], []),
+                                               ('UV', [np.array([0.0, 0.0, 0.5, 1.0])], []),
+                                               ('UVIndex', [np.array([0, 1, 1, 0] * 2, dtype=np.int32)], [])])
+        fbx_path = os.path.join(tmp, 'quads.fbx')
+        _write_binary_fbx(fbx_path, nodes)
+        reader = conv.create_scene_reader('binary')
+        reader.load(fbx_path)
+        mesh, = reader.read_meshes()
+        assert mesh['triangles'].tolist() == [[0, 1, 2], [0, 2, 3], [4, 7, 6], [4, 6, 5]]
+        assert mesh['corner_uvs'][mesh['triangle_corners'][1]].tolist() == [[0, 1], [0.5, 0], [0, 1]]
+    print("✅ Quads from FBX files are triangulated with their corner UVs")
+    
+    return True
+
+def test_merge_meshes():
+    """Test merging several meshes, or a selected subset, into one MDL"""
+    conv = _import_converter()
+    from mesh_processing import merge_meshes
+    
+    with open(os.path.join(os.path.dirname(os.path.abspath(__file__)), 'demo_cube.mdl'), 'rb') as f:
+        reference = f.read()
+    
+    # A second, unskinned copy of the cube geometry on a node moved 100 units along X
+    nodes = _make_cube_fbx_nodes(conv)
+    objects, connections = nodes[1][2], nodes[2][2]
+    objects.append(('Model', [2003, 'crate\x00\x01Model', 'Mesh'], [
+        _fbx_properties70(Lcl_Translation=('Lcl Translation', 100.0, 0.0, 0.0))]))
+    objects.append(('Geometry', [1001, 'crate\x00\x01Geometry', 'Mesh'], objects[0][2]))
+    connections += [('C', ['OO', 2003, 0], []), ('C', ['OO', 1001, 2003], [])]
+    
+    with tempfile.TemporaryDirectory() as tmp:
+        fbx_path = os.path.join(tmp, 'props.fbx')
+        _write_binary_fbx(fbx_path, nodes)
+        
+        converter = conv.FBXToMDLConverter(backend='binary')
+        converter.convert(fbx_path, os.path.join(tmp, 'all.mdl'))
+        with open(os.path.join(tmp, 'all.mdl'), 'rb') as f:
+            data = f.read()
+        assert struct.unpack_from('<3i', data, 60) == (16, 24, 1)  # vertices, triangles, frames
+        assert np.allclose(struct.unpack_from('<2f', data, 8), [120 / 255, 20 / 255])  # scale spans both cubes
+        
+        converter = conv.FBXToMDLConverter(backend='binary', mesh_names=['cube'])
+        converter.convert(fbx_path, os.path.join(tmp, 'cube.mdl'))
+        with open(os.path.join(tmp, 'cube.mdl'), 'rb') as f:
+            assert f.read() == reference
+        
+        converter = conv.FBXToMDLConverter(backend='binary', mesh_names=['barrel'])
+        try:
+            converter.convert(fbx_path, os.path.join(tmp, 'none.mdl'))
+            assert False, "unknown mesh name accepted"
+        except ValueError as e:
+            assert 'barrel' in str(e) and 'crate' in str(e)
+    print("✅ All meshes merge into one MDL; --meshes selects a subset")
+    
+    # Node transforms are baked in and triangle indices offset per mesh
+    cube = _make_cube_mesh(conv)
+    turn = np.array([[0.0, -1, 0, 0], [1, 0, 0, 0], [0, 0, 1, 3], [0, 0, 0, 1]])
+    merged = merge_meshes([cube, dict(cube, name='turned', transform=turn)])
+    assert merged['name'] == 'cube+turned' and merged['vertices'].shape == (16, 3)
+    assert np.allclose(merged['vertices'][8:], cube['vertices'] @ turn[:3, :3].T + [0, 0, 3])
+    assert np.allclose(merged['normals'][8:], cube['normals'] @ turn[:3, :3].T)
+    assert (merged['triangles'][12:] == cube['triangles'] + 8).all()
+    assert np.allclose(merged['corner_uvs'], merged['uvs'][merged['triangles']].reshape(-1, 2))
+    assert merged['skin']['influences'][1].tolist() == [0] * 8 + [1] * 8
+    
+    # Animated parts are sampled in their own node space and moved into the merged one
+    class SampledConverter(conv.FBXToMDLConverter):
+        """Slides every (rigid) part along its local X axis"""
+        def _sample_cluster_matrices(self, mesh, anim_index, times):
+            matrices = np.tile(np.eye(4), (len(times), 1, 1, 1))
+            matrices[:, 0, 0, 3] = np.asarray(times)
+            return matrices
+    
+    matrices = SampledConverter()._sample_merged_cluster_matrices(merged, 0, [2.0])
+    assert matrices.shape == (1, 2, 4, 4)
+    assert np.allclose(matrices[0, 0, :3, 3], [2, 0, 0]) and np.allclose(matrices[0, 1, :3, 3], [0, 2, 0])
+    print("✅ Node transforms are baked in and animations follow them")
+    
+    return True
+
+def test_decimation():
+    """Test quadric decimation down to the MDL vertex and triangle budgets"""
+    conv = _import_converter()
+    from mesh_decimation import decimate_mesh, count_wedges
+    from mesh_processing import merge_meshes
+    from scene_reader import rigid_skin
+    
+    # An open, bulging tube (two border loops) with a UV seam where the angle wraps around
+    rings, segments = 80, 120
+    angle = np.linspace(0, 2 * np.pi, segments, endpoint=False)
+    height = np.linspace(0, 4, rings + 1)
+    radius = np.repeat(1 + 0.2 * np.sin(height * np.pi / 4), segments)
+    positions = np.stack([np.tile(np.cos(angle), rings + 1) * radius, np.tile(np.sin(angle), rings + 1) * radius,
+                          np.repeat(height, segments)], axis=1)
+    ring, segment = np.meshgrid(np.arange(rings), np.arange(segments), indexing='ij')
+    a, b = ring * segments + segment, ring * segments + (segment + 1) % segments
+    triangles = np.concatenate([np.stack([a, b, b + segments], -1).reshape(-1, 3),
+                                np.stack([a, b + segments, a + segments], -1).reshape(-1, 3)])
+    corner_u = np.concatenate([np.stack([segment, segment + 1, segment + 1], -1).reshape(-1, 3),
+                               np.stack([segment, segment + 1, segment], -1).reshape(-1, 3)]) / segments
+    corner_uvs = np.stack([corner_u, positions[triangles, 2] / 4], axis=-1).reshape(-1, 2)
+    mesh = {'name': 'tube', 'vertices': positions, 'normals': positions * [1, 1, 0],
+            'uvs': np.zeros((len(positions), 2)), 'triangles': triangles.astype(np.int32),
+            'triangle_corners': np.arange(triangles.size).reshape(-1, 3),
+            'corner_normals': (positions * [1, 1, 0])[triangles].reshape(-1, 3), 'corner_uvs': corner_uvs,
+            'materials': [], 'transform': np.eye(4), 'skin': rigid_skin(None, len(positions))}
+    assert len(triangles) == 19200 and count_wedges(mesh) == 9801
+    
+    decimated, error = decimate_mesh(mesh, conv.MAX_VERTICES, conv.MAX_TRIANGLES)
+    assert count_wedges(decimated) <= conv.MAX_VERTICES and len(decimated['triangles']) <= conv.MAX_TRIANGLES
+    assert 0 < error < 0.05
+    print(f"✅ 19200 triangles decimated to {len(decimated['triangles'])}, max error {error:.4f}")
+    
+    # Kept vertices carry their own UVs, and no triangle wraps across the seam
+    kept, faces = decimated['vertices'], decimated['triangles']
+    source = np.flatnonzero((positions[:, None] == kept[None]).all(axis=2).any(axis=1))
+    assert len(source) == len(kept)
+    original = {(tuple(positions[v]), tuple(uv)) for v, uv in zip(triangles.ravel(), corner_uvs)}
+    assert all((tuple(kept[v]), tuple(uv)) in original for v, uv in zip(faces.ravel(), decimated['corner_uvs']))
+    u = decimated['corner_uvs'][:, 0].reshape(-1, 3)
+    assert (u.max(axis=1) - u.min(axis=1) < 0.5).all()
+    
+    # Both border loops survive: every border edge stays on one of the rims
+    edges = np.sort(np.concatenate([faces[:, [0, 1]], faces[:, [1, 2]], faces[:, [2, 0]]]), axis=1)
+    unique, counts = np.unique(edges, axis=0, return_counts=True)
+    assert counts.max() == 2
+    border = unique[counts == 1]
+    assert np.isin(kept[border, 2], (0, 4)).all() and (kept[border[:, 0], 2] == kept[border[:, 1], 2]).all()
+    
+    # Faces keep facing outward
+    p0, p1, p2 = (kept[faces[:, i]] for i in range(3))
+    centroid = (p0 + p1 + p2) / 3
+    assert ((np.cross(p1 - p0, p2 - p0) * centroid * [1, 1, 0]).sum(axis=1) > 0).all()
+    assert len(decimated['skin']['influences'][0]) == len(kept)
+    print("✅ UV seams, borders and winding survive decimation")
+    
+    # The writer decimates on its own, and leaves small meshes untouched
+    converter = conv.FBXToMDLConverter()
+    converter.meshes = [mesh]
+    with tempfile.TemporaryDirectory() as tmp:
+        converter.write_mdl_file(os.path.join(tmp, 'tube.mdl'))
+        with open(os.path.join(tmp, 'tube.mdl'), 'rb') as f:
+            vertex_count, triangle_count = struct.unpack_from('<2i', f.read(), 60)
+    assert vertex_count <= conv.MAX_VERTICES and triangle_count <= conv.MAX_TRIANGLES
+    cube = merge_meshes([_make_cube_mesh(conv)])
+    assert decimate_mesh(cube, conv.MAX_VERTICES, conv.MAX_TRIANGLES)[0] is cube
+    print("✅ Oversized meshes are decimated before writing")
+    
+    return True
+
+def test_vertex_welding():
+    """Test welding triangle corners into MDL vertices with seam splits and on_seam flags"""
+    conv = _import_converter()
+    from mesh_processing import merge_meshes, weld_vertices
+    
+    def weld(mesh):
+        merged = merge_meshes([mesh])
+        return weld_vertices(merged, conv.quantize_normals(merged['corner_normals']), 256, 256)
+    
+    # A strip of three triangles; control point 4 duplicates point 1's position
+    positions = np.array([[0, 0, 0], [1, 0, 0], [1, 1, 0], [0, 1, 0], [1, 0, 0], [2, 1, 0]], dtype=np.float64)
+    mesh = {'name': 'strip', 'vertices': positions, 'normals': np.tile([0.0, 0.0, 1.0], (6, 1)),
+            'uvs': np.zeros((6, 2)), 'triangles': np.array([[0, 1, 2], [0, 2, 3], [4, 5, 2]], dtype=np.int32),
+            'triangle_corners': np.arange(9).reshape(3, 3),
+            'corner_normals': np.tile([0.0, 0.0, 1.0], (9, 1)),
+            'corner_uvs': np.array([[0, 0], [0.25, 0], [0.25, 0.25], [0, 0], [0.25, 0.25], [0, 0.25],
+                                    [0.25, 0], [0.375, 0.25], [0.25, 0.25]]),
+            'materials': []}
+    welded = weld(mesh)
+    assert len(welded['vertices']) == 5  # point 4 welds onto point 1
+    assert welded['triangles'].tolist() == [[0, 1, 2], [0, 2, 3], [1, 4, 2]]
+    assert not welded['on_seam'].any() and welded['faces_front'].all()
+    assert np.allclose(welded['uvs'][:, 0] * 256, [0, 64, 64, 0, 96])
+    
+    # Different texels or different skins split the vertex again
+    split = dict(mesh, corner_uvs=mesh['corner_uvs'] + np.r_[np.zeros((6, 2)), [[0.1, 0]], np.zeros((2, 2))])
+    assert len(weld(split)['vertices']) == 6
+    skinned = dict(mesh, skin={'links': [None, None], 'bind_matrices': np.tile(np.eye(4), (2, 1, 1)),
+                               'influences': (np.arange(6), np.array([0, 0, 0, 0, 1, 1]), np.ones(6))})
+    welded = weld(skinned)
+    assert len(welded['vertices']) == 6
+    assert welded['skin']['influences'][1].tolist() == [0, 0, 0, 0, 1, 1]
+    print("✅ Corners weld on (position, skin, normal, texel) and split only where those differ")
+    
+    # The third triangle maps point 2 to the back half of the skin: it becomes
+    # an on_seam vertex and that triangle a back face
+    seam = dict(mesh, corner_uvs=mesh['corner_uvs'] + np.r_[np.zeros((8, 2)), [[0.5, 0]]])
+    welded = weld(seam)
+    assert len(welded['vertices']) == 5
+    assert welded['on_seam'].tolist() == [False, False, True, False, False]
+    assert welded['faces_front'].tolist() == [True, True, False]
+    
+    # ...unless a back triangle also uses another seam vertex's front copy:
+    # the fourth triangle needs point 5's back copy and point 2's front copy
+    seam['triangles'] = np.array([[0, 1, 2], [0, 2, 3], [4, 5, 2], [2, 5, 4]], dtype=np.int32)
+    seam['triangle_corners'] = np.arange(12).reshape(4, 3)
+    seam['corner_uvs'] = np.r_[seam['corner_uvs'], [[0.25, 0.25], [0.875, 0.25], [0.25, 0]]]
+    seam['corner_normals'] = np.tile([0.0, 0.0, 1.0], (12, 1))
+    welded = weld(seam)
+    assert welded['faces_front'].all() and not welded['on_seam'].any()
+    assert len(welded['vertices']) == 7
+    print("✅ Back-half texcoords fold into on_seam vertices where triangles allow")
+    
+    # Per-polygon-vertex UVs reach the MDL texcoords; without textures they
+    # address the default skin, and its back half pairs with its front half
+    from mdl_reader import parse_mdl, validate_mdl
+    converter = conv.FBXToMDLConverter()
+    converter.meshes = [dict(mesh, corner_uvs=mesh['corner_uvs'] + np.r_[np.zeros((8, 2)), [[0.5, 0]]])]
+    with tempfile.TemporaryDirectory() as tmp:
+        converter.write_mdl_file(os.path.join(tmp, 'strip.mdl'))
+        with open(os.path.join(tmp, 'strip.mdl'), 'rb') as f:
+            data = f.read()
+    mdl = parse_mdl(data)
+    assert (mdl.header['skin_width'], mdl.header['skin_height']) == (conv.DEFAULT_SKIN_WIDTH, conv.DEFAULT_SKIN_HEIGHT)
+    texcoords = mdl.texcoords
+    assert texcoords['on_seam'].tolist() == [0, 0, 1, 0, 0] and texcoords['s'].tolist() == [0, 16, 16, 0, 24]
+    assert mdl.triangles['faces_front'].tolist() == [1, 1, 0]
+    assert validate_mdl(mdl) == []
+    print("✅ Welded texcoords and seam flags are written for the skin in the header")
+    
+    return True
+
+def test_texture_quantization():
+    """Test shared palettes, exact nearest-color mapping and the content-hash texture cache"""
+    conv = _import_converter()
+    from PIL import Image
+    from texture_quantization import TextureQuantizer, build_palette, map_to_palette, median_cut
+    
+    # A 64-color image keeps its exact colors; a gradient is approximated closely
+    y, x = np.mgrid[0:64, 0:64]
+    blocks = np.stack([x // 16 * 80, y // 16 * 80, (x // 16 + y // 16) * 30], axis=-1).astype(np.uint8)
+    gradient = np.stack([x * 4, y * 4, (x + y) * 2], axis=-1).astype(np.uint8)
+    palette = median_cut(blocks.reshape(-1, 3))
+    assert len(palette) == 16 and np.array_equal(palette[map_to_palette(blocks, palette)], blocks)
+    palette = build_palette([blocks, gradient])
+    assert len(palette) == 256
+    error = np.abs(palette[map_to_palette(gradient, palette)].astype(int) - gradient).mean()
+    assert error < 4.0, error
+    distances = ((gradient.reshape(-1, 1, 3).astype(int) - palette.astype(int)) ** 2).sum(axis=2)
+    assert np.array_equal(map_to_palette(gradient, palette).ravel(), distances.argmin(axis=1))
+    print("✅ Median-cut palettes map pixels to their nearest color")
+    
+    with tempfile.TemporaryDirectory() as tmp:
+        paths = {}
+        for name, image in (('blocks', blocks), ('gradient', gradient), ('copy', gradient)):
+            paths[name] = os.path.join(tmp, name + '.png')
+            Image.fromarray(image).save(paths[name])
+        
+        # All textures of a model are quantized to one palette
+        converter = conv.FBXToMDLConverter()
+        converter.meshes = [_make_cube_mesh(conv)]
+        converter.materials = [{'name': name, 'diffuse_texture': paths[name]} for name in ('blocks', 'gradient')]
+        mdl = os.path.join(tmp, 'out', 'model.mdl')
+        os.makedirs(os.path.dirname(mdl))
+        converter.write_mdl_file(mdl)
+        with Image.open(os.path.join(tmp, 'out', 'model.bmp')) as skin:
+            assert skin.mode == 'P' and skin.getpalette()[:768] == list(palette.tobytes())
+            assert np.array_equal(np.asarray(skin)[:, 64:], map_to_palette(gradient, palette))
+        with open(mdl, 'rb') as f:
+            data = f.read()
+        assert struct.unpack_from('<3I', data, 48) == (1, 128, 64)
+        skin = np.frombuffer(data, dtype=np.uint8, count=128 * 64, offset=88).reshape(64, 128)
+        assert np.array_equal(skin[:, :64], map_to_palette(blocks, palette))
+        print("✅ Textures of one model share a palette")
+        
+        # Identical content is decoded and mapped once, also across quantizers
+        quantizer = TextureQuantizer(cache_dir=os.path.join(tmp, 'textures'))
+        for name in ('gradient', 'copy', 'gradient'):
+            quantizer.quantize(paths[name], palette)
+        assert (quantizer.decoded, quantizer.mapped) == (1, 1)
+        assert np.array_equal(quantizer.build_palette([paths['copy']]), quantizer.build_palette([paths['gradient']]))
+        assert quantizer.decoded == 1
+        other = TextureQuantizer(cache_dir=os.path.join(tmp, 'textures'))
+        assert np.array_equal(other.quantize(paths['copy'], palette), quantizer.quantize(paths['gradient'], palette))
+        assert (other.decoded, other.mapped) == (0, 0)
+        print("✅ Textures are cached by content hash")
+    
+    return True
+
+def test_texture_pipeline():
+    """Test background texture jobs, their timings and fallbacks"""
+    conv = _import_converter()
+    from PIL import Image
+    
+    with tempfile.TemporaryDirectory() as tmp:
+        paths = []
+        for i in range(3):
+            paths.append(os.path.join(tmp, f'skin{i}.png'))
+            Image.fromarray(np.full((32, 16, 3), 60 * i, dtype=np.uint8)).save(paths[-1])
+        broken = os.path.join(tmp, 'broken.png')
+        with open(broken, 'wb') as f:
+            f.write(b'not an image')
+        
+        converter = conv.FBXToMDLConverter()
+        converter.meshes = [_make_cube_mesh(conv)]
+        converter.materials = [{'name': os.path.basename(path), 'diffuse_texture': path}
+                               for path in paths + [broken, os.path.join(tmp, 'missing.png'), paths[0]]]
+        jobs = converter.start_texture_jobs()
+        assert list(jobs) == paths and converter.atlas['textures'] == paths
+        palette, indices = jobs[paths[2]].result()
+        assert indices.shape == (32, 16) and palette[indices[0, 0]].tolist() == [120, 120, 120]
+        print("✅ Texture jobs are queued once per distinct readable texture")
+        
+        mdl = os.path.join(tmp, 'model.mdl')
+        converter.write_mdl_file(mdl)
+        with open(mdl, 'rb') as f:
+            data = f.read()
+        assert struct.unpack_from('<3I', data, 48) == (1, 48, 32)  # three 16x32 cells side by side
+        assert sorted(timing['texture'] for timing in converter.texture_timings) == sorted(paths)
+        assert all(timing['decode'] >= 0 and timing['quantize'] >= 0 for timing in converter.texture_timings)
+        assert converter.output_files == [os.path.join(tmp, 'model.bmp')]
+        
+        converter.reset()
+        assert converter.texture_jobs is None and converter.texture_timings == []
+        print("✅ The skin is assembled from the jobs, with per-texture timings")
+    
+    return True
+
+def test_texture_atlas():
+    """Test skyline atlas packing, material slots and per-material UV remapping"""
+    conv = _import_converter()
+    from PIL import Image
+    from mesh_processing import merge_meshes, triangle_material_slots
+    from texture_atlas import plan_atlas, remap_atlas_uvs
+    
+    rng = np.random.default_rng(3)
+    for sizes in ([(256, 256)], [(100, 60)], [(256, 256)] * 4, [tuple(s) for s in rng.integers(8, 600, (12, 2))]):
+        width, height, rects = plan_atlas(sizes)
+        assert width % 4 == 0 and width <= 256 and height <= 256
+        coverage = np.zeros((height, width), dtype=int)
+        for x, y, w, h in rects:
+            coverage[y:y + h, x:x + w] += 1
+        assert coverage.max() == 1 and coverage.sum() == (rects[:, 2] * rects[:, 3]).sum()
+    assert plan_atlas([(100, 60)])[:2] == (100, 60)
+    assert plan_atlas([(256, 256)] * 4)[2][:, 2:].tolist() == [[128, 128]] * 4
+    print("✅ Textures are packed without overlap within the 256px skin budget")
+    
+    # Slots come ByPolygon, AllSame, or default to the first material
+    triangle_corners = np.array([[0, 1, 2], [0, 2, 3], [4, 5, 6]])
+    sizes = np.array([4, 3])
+    assert triangle_material_slots(np.array([1, 0]), 'ByPolygon', triangle_corners, sizes, 2).tolist() == [1, 1, 0]
+    assert triangle_material_slots(np.array([1]), 'AllSame', triangle_corners, sizes, 2).tolist() == [1, 1, 1]
+    assert triangle_material_slots(None, '', triangle_corners, sizes, 1).tolist() == [0, 0, 0]
+    assert triangle_material_slots(np.array([5, 0]), 'ByPolygon', triangle_corners, sizes, 2).tolist() == [-1, -1, 0]
+    assert remap_atlas_uvs([[0, 0], [1, 1], [2, -1]] * 2, [1, -1], [[0, 0, 8, 8], [8, 4, 8, 4]], 16, 8).tolist() == \
+        [[0.5, 0.5], [1.0, 1.0], [1.0, 0.5], [0, 0], [1, 1], [2, -1]]
+    print("✅ Triangle material slots are resolved and UVs moved into their cells")
+    
+    with tempfile.TemporaryDirectory() as tmp:
+        red, blue = ({'name': name, 'diffuse_color': [1.0, 1.0, 1.0],
+                      'diffuse_texture': os.path.join(tmp, name + '.png'), 'transparency': 1.0}
+                     for name in ('red', 'blue'))
+        Image.new('RGB', (64, 64), (255, 0, 0)).save(red['diffuse_texture'])
+        Image.new('RGB', (32, 64), (0, 0, 255)).save(blue['diffuse_texture'])
+        
+        # Materials are indices into the scene's [red, blue]: a quad with both and one with blue only
+        def quad(x, materials, triangle_materials):
+            corners = np.array([[0, 0], [1, 0], [1, 1], [0, 1]], dtype=np.float64)
+            return {'name': f'quad{x}', 'vertices': np.column_stack([corners + [x, 0], np.zeros(4)]),
+                    'normals': np.zeros((0, 3)), 'uvs': corners,
+                    'triangles': np.array([[0, 1, 2], [0, 2, 3]], dtype=np.int32), 'materials': materials,
+                    'triangle_materials': np.array(triangle_materials)}
+        meshes = [quad(0, [0, 1], [0, 1]), quad(2, [1], [1, 1])]
+        merged = merge_meshes(meshes)
+        assert merged['materials'] == [0, 1] and merged['triangle_materials'].tolist() == [0, 1, 1, 1]
+        
+        converter = conv.FBXToMDLConverter()
+        converter.meshes, converter.materials = meshes, [red, blue]
+        mdl = os.path.join(tmp, 'model.mdl')
+        converter.write_mdl_file(mdl)
+        with open(mdl, 'rb') as f:
+            data = f.read()
+        skin_count, width, height, vertex_count, triangle_count = struct.unpack_from('<5I', data, 48)
+        assert (skin_count, width, height) == (1, 96, 64)
+        offset = 88 + width * height
+        with Image.open(os.path.join(tmp, 'model.bmp')) as skin:
+            colors = np.asarray(skin.convert('RGB'))
+        texcoords = np.frombuffer(data, dtype=conv.MDL_TEXCOORD_DTYPE, count=vertex_count, offset=offset)
+        triangles = np.frombuffer(data, dtype=conv.MDL_TRIANGLE_DTYPE, count=triangle_count,
+                                  offset=offset + texcoords.nbytes)
+        for triangle, expected in zip(triangles['vertex'], ([255, 0, 0], [0, 0, 255], [0, 0, 255], [0, 0, 255])):
+            s, t = texcoords['s'][triangle].mean(), texcoords['t'][triangle].mean()  # triangle centroid
+            assert colors[int(t), int(s)].tolist() == expected
+        print("✅ Multi-material meshes map onto one atlas skin")
+    
+    return True
+
+def test_scene_walker():
+    """Test the single-pass scene walker and its node table"""
+    from scene_reader import SceneWalker
+    
+    # Nodes are (name, attribute, children) tuples
+    tree = ('RootNode', None, [('body', 'mesh', []),
+                               ('hips', 'skeleton', [('spine', 'skeleton', [('head', 'mesh', [])])]),
+                               ('light', None, [])])
+    walker = SceneWalker(children=lambda node: node[2], name=lambda node: node[0], attribute=lambda node: node[1])
+    visits = []
+    walker.register(lambda node, index: visits.append(('mesh', index)), 'mesh')
+    walker.register(lambda node, index: visits.append(('skeleton', walker.nodes[walker.nodes[index]['parent']]['name'])),
+                    'skeleton')
+    walker.register(lambda node, index: visits.append(('any', index)))
+    nodes = walker.walk([tree])
+    assert [(n['name'], n['parent'], n['attribute']) for n in nodes] == [
+        ('RootNode', -1, None), ('body', 0, 'mesh'), ('hips', 0, 'skeleton'), ('spine', 2, 'skeleton'),
+        ('head', 3, 'mesh'), ('light', 0, None)]
+    assert visits == [('any', 0), ('mesh', 1), ('any', 1), ('skeleton', 'RootNode'), ('any', 2),
+                      ('skeleton', 'hips'), ('any', 3), ('mesh', 4), ('any', 4), ('any', 5)]
+    print("✅ One pass dispatches mesh, skeleton and per-node visitors and records the node table")
+    
+    # A chain far deeper than the recursion limit
+    depth = sys.getrecursionlimit() * 5
+    chain = SceneWalker(children=lambda node: [node + 1] if node + 1 < depth else [], name=str,
+                        attribute=lambda node: 'skeleton').walk([0])
+    assert len(chain) == depth and chain[-1]['parent'] == depth - 2
+    print(f"✅ A {depth}-deep hierarchy is walked without recursion")
+    
+    return True
+
+def test_material_registry():
+    """Test material deduplication by object ID and shared texture resolution"""
+    from scene_reader import MaterialRegistry
+    
+    registry = MaterialRegistry()
+    resolved = []
+    def resolve(path):
+        resolved.append(path)
+        return path
+    def material(name, texture_id):
+        return {'name': name, 'diffuse_color': [1.0, 1.0, 1.0], 'transparency': 1.0,
+                'diffuse_texture': registry.texture_path(texture_id, lambda: resolve(f'{texture_id}.png'))}
+    
+    # Thousands of slots over a few hundred materials, all sharing two textures
+    slots = [registry.index(i % 300, lambda i=i: material('paint', i % 2)) for i in range(6000)]
+    assert slots == [i % 300 for i in range(6000)] and len(registry.materials) == 300
+    assert resolved == ['0.png', '1.png']
+    # Equal values, different objects: still two materials
+    assert registry.materials[0] == registry.materials[2] and registry.materials[0] is not registry.materials[2]
+    print("✅ Materials are deduplicated by object ID and shared textures are resolved once")
+    
+    return True
+
+def test_conversion_profiler():
+    """Test per-stage profiling of conversions and aggregation of batch reports"""
+    conv = _import_converter()
+    from conversion_profiler import ConversionProfiler, aggregate_reports
+    
+    profiler = ConversionProfiler()
+    profiler.start()
+    with profiler.stage('outer', files=1) as outer:
+        with profiler.stage('inner'):
+            block = np.ones(1 << 20)  # 8 MB
+        del block
+        outer['counts']['blocks'] = 1
+        assert list(profiler.timed('items', range(3))) == [0, 1, 2]
+    profiler.stop()
+    report = profiler.report(input='x.fbx')
+    assert [(s['name'], s['depth']) for s in report['stages']] == [('outer', 0), ('inner', 1), ('items', 1)]
+    assert report['stages'][0]['counts'] == {'files': 1, 'blocks': 1} and report['stages'][2]['counts'] == {'items': 3}
+    assert report['stages'][0]['peak_bytes'] >= report['stages'][1]['peak_bytes'] >= 8 << 20
+    assert report['peak_bytes'] >= 8 << 20 and report['input'] == 'x.fbx'
+    
+    disabled = ConversionProfiler(enabled=False)
+    items = range(3)
+    with disabled.stage('outer'):
+        assert disabled.timed('items', items) is items
+    assert not disabled.report()['stages']
+    
+    # Without tracemalloc.reset_peak (Python < 3.9) stages still get a peak
+    import tracemalloc
+    reset_peak = tracemalloc.reset_peak
+    del tracemalloc.reset_peak
+    try:
+        profiler = ConversionProfiler()
+        profiler.start()
+        with profiler.stage('outer'):
+            block = np.ones(1 << 20)
+        del block
+        profiler.stop()
+        assert profiler.report()['stages'][0]['peak_bytes'] >= 8 << 20
+    finally:
+        tracemalloc.reset_peak = reset_peak
+    print("✅ Stages record wall time, peak traced memory and counts, nested and streamed")
+    
+    with tempfile.TemporaryDirectory() as tmp:
+        fbx_path = os.path.join(tmp, 'cube.fbx')
+        _write_binary_fbx(fbx_path, _make_cube_fbx_nodes(conv), 7400, False)
+        converter = conv.FBXToMDLConverter(keep_reader=True, backend='binary', profile=True)
+        reports = []
+        for name in ('a', 'b'):
+            reports.append(conv.convert_file(converter, fbx_path, os.path.join(tmp, name + '.mdl'))['profile'])
+        converter.cleanup_reader()
+        
+        names = [stage['name'] for stage in reports[0]['stages']]
+        assert names == ['init_reader', 'load', 'detect_meshes', 'detect_bones', 'detect_animations',
+                         'detect_materials', 'write_mdl', 'merge', 'decimate', 'weld', 'frames', 'write_binary']
+        assert 'init_reader' not in [stage['name'] for stage in reports[1]['stages']]  # warm reader
+        counts = {stage['name']: stage['counts'] for stage in reports[0]['stages']}
+        assert counts['detect_meshes'] == {'meshes': 1, 'vertices': 8, 'triangles': 12}
+        assert counts['write_binary']['bytes'] == os.path.getsize(os.path.join(tmp, 'a.mdl'))
+        with open(os.path.join(tmp, 'a.mdl'), 'rb') as f, \
+                open(os.path.join(os.path.dirname(os.path.abspath(__file__)), 'demo_cube.mdl'), 'rb') as reference:
+            assert f.read() == reference.read()
+        
+        aggregate = aggregate_reports(reports)
+        stages = {stage['name']: stage for stage in aggregate['stages']}
+        assert aggregate['files'] == 2 and stages['init_reader']['files'] == 1 and stages['load']['files'] == 2
+        assert stages['detect_meshes']['counts']['triangles'] == 24
+        assert stages['weld']['max_seconds'] <= stages['weld']['seconds']
+        json.dumps(aggregate)
+        
+        # Only --profile turns profiling on; --verbose is just log output
+        import subprocess
+        script = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'fbx_to_mdl_converter.py')
+        for flags, profiled in ((['-v'], False), (['--profile', os.path.join(tmp, 'report.json')], True)):
+            proc = subprocess.run([sys.executable, script, fbx_path, os.path.join(tmp, 'c.mdl'),
+                                   '--backend', 'binary'] + flags, capture_output=True, text=True)
+            assert proc.returncode == 0, proc.stderr
+            assert ('Peak (MB)' in proc.stdout) == profiled, proc.stdout
+    print("✅ Conversions report every stage and batch reports aggregate")
+    
+    return True
+
+def test_benchmark_comparison():
+    """Test the benchmark regression check"""
+    from benchmark_converter import compare_results
+    
+    baseline = {'scaling': [{'stage': 'write_mdl_binary', 'vertices': 1000, 'seconds': 0.10},
+                            {'stage': 'write_mdl_binary', 'frames': 16, 'seconds': 0.20},
+                            {'stage': 'mdl_frame', 'vertices': 1000, 'seconds': 0.0001}],
+                'writer': [{'size': 1000, 'legacy': 1.0, 'bulk': 0.05}]}
+    current = {'scaling': [{'stage': 'write_mdl_binary', 'vertices': 1000, 'seconds': 0.11},
+                           {'stage': 'write_mdl_binary', 'frames': 16, 'seconds': 0.30},
+                           {'stage': 'mdl_frame', 'vertices': 1000, 'seconds': 0.001},
+                           {'stage': 'convert_texture', 'texture_size': 64, 'seconds': 0.5}],
+               'writer': [{'size': 1000, 'legacy': 9.0, 'bulk': 0.05}]}
+    rows = compare_results(baseline, current, threshold=0.25, min_seconds=0.005)
+    compared = [(row['benchmark'], row['entry'], row['metric'], row['regressed']) for row in rows]
+    # Entries match by scale; tiny timings, new entries and legacy reference timings are not compared
+    assert compared == [('scaling', {'stage': 'write_mdl_binary', 'vertices': 1000}, 'seconds', False),
+                        ('scaling', {'stage': 'write_mdl_binary', 'frames': 16}, 'seconds', True),
+                        ('writer', {'size': 1000}, 'bulk', False)]
+    print("✅ Benchmark comparison flags stages slower than the threshold")
+    
+    return True
+
+def test_mdl_reader():
+    """Test the zero-copy MDL reader and validator against the writer's output"""
+    conv = _import_converter()
+    from mdl_reader import read_mdl, parse_mdl, validate_mdl, compare_mdl
+    
+    converter = conv.FBXToMDLConverter()
+    skins = [conv.MDLSkin(8, 8, bytes(range(64)))]
+    texcoords = [conv.MDLTexCoord(1, 2), conv.MDLTexCoord(3, 4, on_seam=True), conv.MDLTexCoord(8, 6)]
+    triangles = [conv.MDLTriangle([0, 1, 2]), conv.MDLTriangle([2, 1, 0], faces_front=False)]
+    vertices = np.array([[0, 0, 0, 1], [255, 10, 20, 2], [30, 255, 40, 3]], dtype=np.uint8)
+    frames = [conv.MDLFrame("a", vertices), conv.MDLFrame("b", vertices[::-1])]
+    
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'model.mdl')
+        converter._write_mdl_binary(path, skins, texcoords, triangles, frames, 8, 8)
+        with open(path, 'rb') as f:
+            data = f.read()
+        
+        with read_mdl(path) as mdl:
+            assert mdl.header['num_verts'] == 3 and mdl.header['num_frames'] == 2
+            assert mdl.skins['data'][0].tobytes() == bytes(range(64))
+            assert mdl.texcoords.tolist() == [(0, 1, 2), (1, 3, 4), (0, 8, 6)]
+            assert mdl.triangles['vertex'].tolist() == [[0, 1, 2], [2, 1, 0]]
+            assert mdl.frames['name'].tolist() == [b'a', b'b']
+            assert np.array_equal(mdl.frames['vertices'][1], vertices[::-1])
+            assert validate_mdl(mdl) == []
+            # Round trip: the sections cover the file exactly, byte for byte
+            assert b''.join(bytes(mdl.section_bytes(name)) for name in
+                            ('header', 'skins', 'texcoords', 'triangles', 'frames')) == data
+            assert compare_mdl(mdl, parse_mdl(data)) == []
+    
+    # Corruptions are reported per section
+    corrupt = bytearray(data)
+    triangles_offset = 84 + 4 + 64 + 3 * 12
+    struct.pack_into('<i', corrupt, triangles_offset + 4, 7)
+    frames_offset = triangles_offset + 2 * 16
+    corrupt[frames_offset + 4] = 9
+    corrupt[-1] = 200
+    mdl = parse_mdl(bytes(corrupt) + b'\0')
+    problems = validate_mdl(mdl)
+    assert any('1 triangles index vertices' in p for p in problems)
+    assert any('1 frames with bounds' in p for p in problems)
+    assert any('Normal indices' in p for p in problems)
+    assert any('1 trailing bytes' in p for p in problems)
+    assert compare_mdl(parse_mdl(data), mdl) == ['triangles', 'frames']
+    
+    for bad in (data[:-1], b'', bytes(4) + data[4:]):
+        try:
+            parse_mdl(bad)
+        except ValueError:
+            pass
+        else:
+            assert False, "Truncated or foreign data must be rejected"
+    
+    # An untextured conversion (the cube's texture is missing) is valid too
+    with tempfile.TemporaryDirectory() as tmp:
+        fbx_path = os.path.join(tmp, 'cube.fbx')
+        _write_binary_fbx(fbx_path, _make_cube_fbx_nodes(conv))
+        conv.FBXToMDLConverter(backend='binary').convert(fbx_path, os.path.join(tmp, 'cube.mdl'))
+        with read_mdl(os.path.join(tmp, 'cube.mdl')) as mdl:
+            assert mdl.header['skin_width'] == conv.DEFAULT_SKIN_WIDTH
+            assert validate_mdl(mdl) == []
+    
+    if os.path.exists('demo_cube.mdl'):
+        with read_mdl('demo_cube.mdl') as mdl:
+            assert validate_mdl(mdl) == []
+    print("✅ MDL reader round-trips writer output and validation catches corruption")
+    
+    return True
+
+def test_incremental_export():
+    """Test that incremental conversions reuse unchanged MDL sections"""
+    conv = _import_converter()
+    from PIL import Image
+    from incremental_export import manifest_path
+    
+    with tempfile.TemporaryDirectory() as tmp:
+        fbx_path = os.path.join(tmp, 'cube.fbx')
+        mdl_path = os.path.join(tmp, 'out', 'cube.mdl')
+        os.makedirs(os.path.join(tmp, 'textures'))
+        texture_path = os.path.join(tmp, 'textures', 'paint.png')
+        nodes = _make_cube_fbx_nodes(conv)
+        _write_binary_fbx(fbx_path, nodes)
+        Image.new('RGB', (64, 32), (200, 30, 30)).save(texture_path)
+        
+        def convert():
+            converter = conv.FBXToMDLConverter(backend='binary', incremental=True, profile=True)
+            converter.convert(fbx_path, mdl_path)
+            # The output must match a from-scratch conversion byte for byte
+            reference_path = os.path.join(tmp, 'reference.mdl')
+            conv.FBXToMDLConverter(backend='binary').convert(fbx_path, reference_path)
+            with open(mdl_path, 'rb') as f, open(reference_path, 'rb') as g:
+                assert f.read() == g.read()
+            stages = [stage['name'] for stage in converter.profile_report['stages']]
+            return converter.incremental_result, 'load' in stages, converter
+        
+        assert convert()[:2] == ('full', True)
+        assert os.path.exists(manifest_path(mdl_path))
+        assert convert()[:2] == ('unchanged', False)
+        
+        # A texture edit only re-quantizes the skin, without loading the FBX
+        Image.new('RGB', (64, 32), (30, 200, 30)).save(texture_path)
+        result, loaded, converter = convert()
+        assert (result, loaded) == ('skins', False)
+        assert converter.texture_dependencies() == [texture_path]
+        
+        # Same scene in different bytes: loaded, compared, left alone
+        _write_binary_fbx(fbx_path, nodes, 7500, compress=True)
+        assert convert()[:2] == ('unchanged', True)
+        
+        # A geometry edit rewrites the file but keeps the previous skin
+        nodes[1][2][0][2][0] = ('Vertices', [_make_cube_mesh(conv)['vertices'].ravel() * 2], [])
+        _write_binary_fbx(fbx_path, nodes)
+        result, loaded, converter = convert()
+        assert (result, loaded) == ('full', True) and converter.reused_skins is not None
+        
+        # Resized textures move the atlas cells, and a file edited since is not trusted
+        Image.new('RGB', (32, 32), (30, 30, 200)).save(texture_path)
+        result, _, converter = convert()
+        assert result == 'full' and converter.reused_skins is None
+        with open(mdl_path, 'r+b') as f:
+            f.seek(100)
+            f.write(b'\xff')
+        assert convert()[:2] == ('full', True)
+    print("✅ Incremental conversions patch or reuse only the sections whose inputs changed")
+    
+    return True
+
+def test_watch_mode():
+    """Test that watch mode re-converts the files whose FBX or textures are saved"""
+    conv = _import_converter()
+    from PIL import Image
+    from watch_mode import WatchSession, PollingWatcher, create_watcher
+    
+    with tempfile.TemporaryDirectory() as tmp:
+        assets, output_dir = os.path.join(tmp, 'assets'), os.path.join(tmp, 'out')
+        os.makedirs(os.path.join(assets, 'weapons', 'textures'))
+        fbx_path = os.path.join(assets, 'weapons', 'cube.fbx')
+        texture_path = os.path.join(assets, 'weapons', 'textures', 'paint.png')
+        mdl_path = os.path.join(output_dir, 'weapons', 'cube.mdl')
+        _write_binary_fbx(fbx_path, _make_cube_fbx_nodes(conv))
+        Image.new('RGB', (64, 32), (200, 30, 30)).save(texture_path)
+        
+        for watcher in (create_watcher(), PollingWatcher(interval=0.02)):
+            session = WatchSession(assets, output_dir, {'backend': 'binary'}, watcher=watcher, debounce=0.05)
+            try:
+                stale = session.start()
+                assert stale == ([fbx_path] if not os.path.exists(mdl_path) else [])
+                assert session.convert(fbx_path)['status'] == 'ok' and os.path.exists(mdl_path)
+                reader = session.converter.reader
+                assert reader is not None
+                
+                Image.new('RGB', (64, 32), (30, 200, 30)).save(texture_path)
+                assert session.wait_for_changes(timeout=2) == [fbx_path]
+                _write_binary_fbx(fbx_path, _make_cube_fbx_nodes(conv), 7500, compress=True)
+                with open(os.path.join(assets, 'notes.txt'), 'w') as f:
+                    f.write('saved at the same time')
+                assert session.wait_for_changes(timeout=2) == [fbx_path]
+                assert session.convert(fbx_path, session.changed_at)['status'] == 'ok'
+                assert session.converter.reader is reader  # the scene reader stays warm
+                
+                with open(os.path.join(assets, 'notes.txt'), 'a') as f:
+                    f.write('unrelated')
+                assert session.wait_for_changes(timeout=2) == []
+            finally:
+                session.close()
+            print(f"✅ {type(watcher).__name__} re-converts saved models and models whose textures were saved")
+        
+        # Every save stores a cache entry; the session keeps the cache under its cap
+        from conversion_cache import ConversionCache
+        cache = ConversionCache(os.path.join(tmp, 'cache'))
+        session = WatchSession(assets, output_dir, {'backend': 'binary'}, cache=cache,
+                               watcher=PollingWatcher(interval=0.02), debounce=0.05)
+        try:
+            session.start()
+            assert session.convert(fbx_path)['cache'] == 'miss'
+            cache.max_bytes = cache.entries()[0]['size']  # room for one entry
+            for color in ((10, 10, 200), (10, 200, 200), (200, 200, 10)):
+                Image.new('RGB', (64, 32), color).save(texture_path)
+                assert session.convert(fbx_path)['cache'] == 'miss'
+            assert len(cache.entries()) == 1 and cache.evictions == 3
+        finally:
+            session.close()
+        print("✅ Watch mode trims the conversion cache to its size cap")
+    
+    return True
+
+def test_conversion_service():
+    """Test the conversion service's queue, priorities, cancellation and metrics over a Unix socket"""
+    import threading
+    import time
+    conv = _import_converter()
+    from conversion_service import ConversionService, ServiceClient, create_server
+    
+    with tempfile.TemporaryDirectory() as tmp:
+        fbx_path = os.path.join(tmp, 'cube.fbx')
+        _write_binary_fbx(fbx_path, _make_cube_fbx_nodes(conv))
+        address = 'unix:' + os.path.join(tmp, 'service.sock')
+        
+        service = ConversionService(workers=1, converter_options={'backend': 'binary'})
+        server = create_server(address, service)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        client = ServiceClient(address)
+        try:
+            # Jobs queue until the workers start, then run by priority
+            outputs = [os.path.join(tmp, f'out{i}.mdl') for i in range(4)]
+            first = client.submit(fbx_path, outputs[0])
+            low = client.submit(fbx_path, outputs[1])
+            high = client.submit(fbx_path, outputs[2], priority=10)
+            dropped = client.submit(fbx_path, outputs[3])
+            missing = client.submit(os.path.join(tmp, 'missing.fbx'), priority=5)
+            assert client.cancel(dropped['id'])['status'] == 'cancelled'
+            assert client.metrics()['queue_depth'] == 4
+            service.start()
+            
+            jobs = {name: client.status(job['id'], wait=30)
+                    for name, job in (('first', first), ('low', low), ('high', high), ('missing', missing))}
+            assert [jobs[name]['status'] for name in ('first', 'low', 'high')] == ['ok'] * 3
+            assert jobs['missing']['status'] == 'failed' and jobs['missing']['error']
+            started = sorted(jobs, key=lambda name: jobs[name]['started'])
+            assert started == ['high', 'missing', 'first', 'low'], started
+            assert not os.path.exists(outputs[3])
+            with open(outputs[0], 'rb') as f, open(outputs[2], 'rb') as g:
+                assert f.read() == g.read()
+            assert client.cancel(first['id'])['status'] == 'ok'  # finished jobs cannot be cancelled
+            assert client._request('GET', '/jobs/999')[0] == 404
+            # A rejected job does not take an id
+            assert client._request('POST', '/jobs', {'input': fbx_path, 'priority': 'high'})[0] == 400
+            assert client.submit(fbx_path, outputs[3], priority=-1)['id'] == str(int(missing['id']) + 1)
+            assert client.status(str(int(missing['id']) + 1), wait=30)['status'] == 'ok'
+            
+            metrics = client.metrics()
+            assert metrics['queue_depth'] == 0 and metrics['running'] == 0
+            assert metrics['jobs'] == {'queued': 0, 'running': 0, 'ok': 4, 'failed': 1, 'cancelled': 1}
+            assert metrics['latency']['total_seconds']['max'] >= metrics['latency']['run_seconds']['max'] > 0
+            assert metrics['cache'] is None
+        finally:
+            server.shutdown()
+            server.server_close()
+            service.shutdown()
+    print("✅ Conversion service runs queued jobs by priority, cancels, and reports metrics")
+    
+    with tempfile.TemporaryDirectory() as tmp:
+        fbx_path, other_path = os.path.join(tmp, 'cube.fbx'), os.path.join(tmp, 'other.fbx')
+        _write_binary_fbx(fbx_path, _make_cube_fbx_nodes(conv))
+        _write_binary_fbx(other_path, _make_cube_fbx_nodes(conv), 7500, compress=True)
+        service = ConversionService(workers=1, converter_options={'backend': 'binary'},
+                                    cache_dir=os.path.join(tmp, 'cache'))
+        service.start()
+        try:
+            for path in (fbx_path, fbx_path):
+                assert service.status(service.submit(path)['id'], wait=30)['status'] == 'ok'
+            assert service.metrics()['cache'] == {'hits': 1, 'misses': 1, 'evictions': 0}
+            service.cache.max_bytes = service.cache.entries()[0]['size']  # room for one entry
+            job = service.submit(other_path)
+            assert service.status(job['id'], wait=30)['status'] == 'ok'
+            deadline = time.monotonic() + 10
+            while service.metrics()['cache']['evictions'] == 0 and time.monotonic() < deadline:
+                time.sleep(0.01)  # eviction follows the job's completion
+            assert service.metrics()['cache'] == {'hits': 1, 'misses': 2, 'evictions': 1}
+            assert len(service.cache.entries()) == 1
+        finally:
+            service.shutdown()
+    print("✅ Conversion service trims its cache to the size cap and reports hits, misses and evictions")
+    
+    return True
+
 def main():
     """Run all tests"""
     print("="*50)
@@ -127,6 +1502,106 @@ def main():
     if not test_converter_import():
         return 1
     
+    print("\n1b. Testing mesh arrays...")
+    if not test_mesh_arrays():
+        return 1
+    
+    print("\n1c. Testing normal quantization...")
+    if not test_normal_quantization():
+        return 1
+    
+    print("\n1d. Testing bulk MDL writer...")
+    if not test_bulk_writer():
+        return 1
+    
+    print("\n1e. Testing batch mode...")
+    if not test_batch_mode():
+        return 1
+    
+    print("\n1f. Testing conversion cache...")
+    if not test_conversion_cache():
+        return 1
+    
+    print("\n1g. Testing animation sampling...")
+    if not test_animation_sampling():
+        return 1
+    
+    print("\n1h. Testing streaming frame output...")
+    if not test_streaming_frames():
+        return 1
+    
+    print("\n1i. Testing lazy backend imports...")
+    if not test_lazy_backends():
+        return 1
+    
+    print("\n1j. Testing binary FBX reader...")
+    if not test_binary_fbx_reader():
+        return 1
+    
+    print("\n1k. Testing lazy FBX decoding...")
+    if not test_lazy_fbx_decoding():
+        return 1
+    
+    print("\n1l. Testing triangulation...")
+    if not test_triangulation():
+        return 1
+    
+    print("\n1m. Testing mesh merging...")
+    if not test_merge_meshes():
+        return 1
+    
+    print("\n1n. Testing mesh decimation...")
+    if not test_decimation():
+        return 1
+    
+    print("\n1o. Testing vertex welding...")
+    if not test_vertex_welding():
+        return 1
+    
+    print("\n1p. Testing texture quantization...")
+    if not test_texture_quantization():
+        return 1
+    
+    print("\n1q. Testing the texture pipeline...")
+    if not test_texture_pipeline():
+        return 1
+    
+    print("\n1r. Testing texture atlas packing...")
+    if not test_texture_atlas():
+        return 1
+    
+    print("\n1s. Testing the scene walker...")
+    if not test_scene_walker():
+        return 1
+    
+    print("\n1t. Testing the material registry...")
+    if not test_material_registry():
+        return 1
+    
+    print("\n1u. Testing conversion profiling...")
+    if not test_conversion_profiler():
+        return 1
+    
+    print("\n1v. Testing benchmark comparison...")
+    if not test_benchmark_comparison():
+        return 1
+    
+    print("\n1w. Testing the MDL reader and validator...")
+    if not test_mdl_reader():
+        return 1
+    
+    print("\n1x. Testing incremental export...")
+    if not test_incremental_export():
+        return 1
+    
+    print("\n1y. Testing watch mode...")
+    if not test_watch_mode():
+        return 1
+    
+    print("\n1z. Testing the conversion service...")
+    if not test_conversion_service():
+        return 1
+    
     # Test 2: Check if converter file exists
     print("\n2. Checking converter file...")
     if not os.path.exists('fbx_to_mdl_converter.py'):
@@ -146,7 +1621,8 @@ def main():
     mdl_files = list(Path('.').glob('*.mdl'))
     if mdl_files:
         for mdl_file in mdl_files:
-            validate_mdl_file(str(mdl_file))
+            if not validate_mdl_file(str(mdl_file)):
+                return 1
     else:
         print("ℹ️  No MDL files found for validation")
     
@@ -0,0 +1,126 @@
+#!/usr/bin/env python3
+"""
+Texture atlas packing for the FBX to MDL Converter
+An MDL model has one skin layout shared by all triangles, so the textures
+of every material are packed into a single atlas skin and each triangle's
+UVs are moved into its material's cell:
+
+    width, height, rects = plan_atlas(texture_sizes)
+    corner_uvs = remap_atlas_uvs(corner_uvs, triangle_cells, rects, width, height)
+
+Textures keep their aspect ratio and are scaled uniformly (never up) until
+a skyline bottom-left packer fits them all within the skin budget.
+"""
+
+from typing import List, Optional, Tuple
+
+import numpy as np
+
+# Largest skin the atlas may use
+MAX_ATLAS_SIZE = 256
+
+# Skin widths must be a multiple of this (the Quake loader rejects others)
+SKIN_WIDTH_MULTIPLE = 4
+
+# Bisection steps used to find the largest scale at which the textures fit
+SCALE_STEPS = 16
+
+def fit_size(width: int, height: int, max_size: int = MAX_ATLAS_SIZE) -> Tuple[int, int]:
+    """Scale (width, height) down to fit max_size, keeping the aspect ratio"""
+    scale = min(1.0, max_size / max(width, height, 1))
+    return max(1, round(width * scale)), max(1, round(height * scale))
+
+def skyline_pack(sizes: List[Tuple[int, int]], width: int, height: int) -> Optional[np.ndarray]:
+    """Place (w, h) rectangles in a width x height bin, or return None if they do not fit
+
+    Rectangles are placed tallest first, each at the lowest (then leftmost)
+    position on the skyline, the upper outline of everything placed so
+    far. Returns (N, 2) (x, y) positions in input order.
+    """
+    positions = np.zeros((len(sizes), 2), dtype=np.int64)
+    skyline = [[0, 0, width]]  # segments of (x, y, length), left to right
+    for i in sorted(range(len(sizes)), key=lambda i: (-sizes[i][1], -sizes[i][0])):
+        w, h = sizes[i]
+        best = None
+        for start in range(len(skyline)):
+            x = skyline[start][0]
+            if x + w > width:
+                break
+            y, end = 0, start
+            while skyline[end][0] < x + w:
+                y = max(y, skyline[end][1])
+                end += 1
+                if end == len(skyline):
+                    break
+            if y + h <= height and (best is None or (y, x) < (best[1], best[0])):
+                best = (x, y, start)
+        if best is None:
+            return None
+
+        x, y, start = best
+        positions[i] = x, y
+        # Replace the covered part of the skyline with the new top edge
+        updated = skyline[:start] + [[x, y + h, w]]
+        for segment_x, segment_y, length in skyline[start:]:
+            if segment_x + length > x + w:
+                cut = max(segment_x, x + w)
+                updated.append([cut, segment_y, segment_x + length - cut])
+        skyline = []
+        for segment in updated:
+            if skyline and skyline[-1][1] == segment[1]:
+                skyline[-1][2] += segment[2]
+            else:
+                skyline.append(segment)
+    return positions
+
+def plan_atlas(sizes: List[Tuple[int, int]], max_width: int = MAX_ATLAS_SIZE,
+               max_height: int = MAX_ATLAS_SIZE) -> Tuple[int, int, np.ndarray]:
+    """Lay out textures of the given (width, height) sizes in one skin
+
+    Every texture is first fitted to the skin budget, then all are scaled
+    by the largest common factor (found by bisection) at which
+    skyline_pack() fits them. Returns the atlas (width, height), trimmed
+    to the used area with the width rounded up to SKIN_WIDTH_MULTIPLE, and
+    (N, 4) integer (x, y, w, h) cells in input order.
+    """
+    natural = [fit_size(w, h, min(max_width, max_height)) for w, h in sizes]
+
+    def layout(scale):
+        scaled = [(max(1, int(w * scale)), max(1, int(h * scale))) for w, h in natural]
+        positions = skyline_pack(scaled, max_width, max_height)
+        return None if positions is None else np.column_stack([positions, np.array(scaled).reshape(-1, 2)])
+
+    rects = layout(1.0)
+    if rects is None:
+        low, high = 0.0, 1.0
+        rects = layout(low)
+        for _ in range(SCALE_STEPS):
+            middle = (low + high) / 2
+            candidate = layout(middle)
+            if candidate is None:
+                high = middle
+            else:
+                low, rects = middle, candidate
+        if rects is None:
+            raise ValueError(f"{len(sizes)} textures cannot be packed into {max_width}x{max_height}")
+
+    width = int((rects[:, 0] + rects[:, 2]).max(initial=1))
+    height = int((rects[:, 1] + rects[:, 3]).max(initial=1))
+    width = min(max_width, -(-width // SKIN_WIDTH_MULTIPLE) * SKIN_WIDTH_MULTIPLE)
+    return width, height, rects
+
+def remap_atlas_uvs(corner_uvs: np.ndarray, triangle_cells: np.ndarray, rects: np.ndarray,
+                    width: int, height: int) -> np.ndarray:
+    """Move every triangle's (3M, 2) corner UVs into its atlas cell
+
+    triangle_cells holds each triangle's row in rects; triangles with -1
+    keep their UVs. UVs are clamped to [0, 1] first, as a tiling texture
+    cannot repeat inside an atlas.
+    """
+    corner_uvs = np.array(corner_uvs, dtype=np.float64).reshape(-1, 3, 2)
+    triangle_cells = np.asarray(triangle_cells, dtype=np.int64)
+    placed = triangle_cells >= 0
+    rects = np.asarray(rects, dtype=np.float64).reshape(-1, 4)[triangle_cells[placed]]
+    size = np.array([width, height], dtype=np.float64)
+    corner_uvs[placed] = (rects[:, None, :2] + np.clip(corner_uvs[placed], 0.0, 1.0) * rects[:, None, 2:]) / size
+    return corner_uvs.reshape(-1, 2)
@@ -0,0 +1,253 @@
+#!/usr/bin/env python3
+"""
+Shared-palette texture quantization for the FBX to MDL Converter
+MDL skins are 8-bit palette indices. Instead of quantizing every texture to
+its own adaptive palette, one palette is built for all skins of a model (or
+of a whole batch) by median cut over subsampled pixels, and every texture
+is mapped onto it:
+
+    palette = quantizer.build_palette(paths)
+    indices = quantizer.quantize(path, palette)
+
+Pixels are mapped through a table of their distinct colors: each distinct
+color is matched against the palette once (vectorized, in chunks), and the
+pixels pick their index up from that table.
+
+TextureQuantizer caches decoded textures and index images by the texture's
+content hash, in memory and optionally on disk, so a texture shared by many
+models is decoded once and mapped once per palette; palettes are cached by
+the content of the textures they were built from.
+"""
+
+import os
+import heapq
+import hashlib
+import tempfile
+import threading
+from collections import OrderedDict
+from typing import List, Optional, Tuple
+
+import numpy as np
+
+from conversion_cache import hash_file
+
+# Palette entries available to an MDL skin
+PALETTE_SIZE = 256
+
+# Pixels sampled across all images when building a palette
+MAX_PALETTE_SAMPLES = 65536
+
+# Textures larger than this (in either dimension) are scaled down
+MAX_TEXTURE_SIZE = 256
+
+def pack_rgb(pixels: np.ndarray) -> np.ndarray:
+    """Pack (..., 3) uint8 colors into 24-bit integers"""
+    pixels = np.asarray(pixels, dtype=np.uint32)
+    return (pixels[..., 0] << 16) | (pixels[..., 1] << 8) | pixels[..., 2]
+
+def unpack_rgb(packed: np.ndarray) -> np.ndarray:
+    """Inverse of pack_rgb()"""
+    packed = np.asarray(packed, dtype=np.uint32)
+    return np.stack([packed >> 16, (packed >> 8) & 0xFF, packed & 0xFF], axis=-1).astype(np.uint8)
+
+def median_cut(pixels: np.ndarray, colors: int = PALETTE_SIZE) -> np.ndarray:
+    """Reduce (N, 3) uint8 pixels to a palette of at most `colors` colors
+
+    Boxes of the RGB cube are split at the pixel-weighted median of their
+    widest channel, largest (pixel count x channel range) first; each box
+    contributes the mean of its pixels. Pixels with at most `colors`
+    distinct colors get exactly those colors back.
+    """
+    packed, counts = np.unique(pack_rgb(np.asarray(pixels).reshape(-1, 3)), return_counts=True)
+    points = unpack_rgb(packed).astype(np.int64)
+    if len(points) <= colors:
+        return points.astype(np.uint8)
+
+    def entry(members):
+        box = points[members]
+        extent = box.max(axis=0) - box.min(axis=0)
+        return (-int(counts[members].sum()) * int(extent.max()), int(members[0]), members, int(extent.argmax()))
+
+    heap = [entry(np.arange(len(points)))]
+    done = []
+    while heap and len(heap) + len(done) < colors:
+        score, _, members, channel = heapq.heappop(heap)
+        if score == 0:
+            done.append(members)  # a single color; nothing left to split
+            continue
+        members = members[np.argsort(points[members, channel], kind='stable')]
+        weight = np.cumsum(counts[members])
+        split = int(np.clip(np.searchsorted(weight, weight[-1] / 2.0), 1, len(members) - 1))
+        heapq.heappush(heap, entry(members[:split]))
+        heapq.heappush(heap, entry(members[split:]))
+
+    boxes = done + [members for _, _, members, _ in heap]
+    palette = np.array([np.average(points[members], axis=0, weights=counts[members]) for members in boxes])
+    return np.rint(palette).astype(np.uint8)
+
+def build_palette(images: List[np.ndarray], colors: int = PALETTE_SIZE,
+                  max_samples: int = MAX_PALETTE_SAMPLES) -> np.ndarray:
+    """Build one palette shared by several (H, W, 3) uint8 images
+
+    Every image contributes an evenly strided sample of the same size, so a
+    small skin is not drowned out by a large one.
+    """
+    budget = max(1, max_samples // max(1, len(images)))
+    samples = []
+    for image in images:
+        flat = np.asarray(image, dtype=np.uint8).reshape(-1, 3)
+        samples.append(flat[::max(1, -(-len(flat) // budget))])
+    return median_cut(np.concatenate(samples) if samples else np.zeros((0, 3), dtype=np.uint8), colors)
+
+def nearest_palette_indices(colors: np.ndarray, palette: np.ndarray, chunk_size: int = 4096) -> np.ndarray:
+    """Index of the nearest palette entry (squared RGB distance) for (N, 3) colors"""
+    # |c - p|^2 = |c|^2 - 2 c.p + |p|^2, and |c|^2 does not change the argmin. All
+    # terms are integers below 2^24, so float32 matrix products are exact
+    colors = np.asarray(colors, dtype=np.float32).reshape(-1, 3)
+    palette = np.asarray(palette, dtype=np.float32).reshape(-1, 3)
+    palette_norms = (palette * palette).sum(axis=1)
+    indices = np.empty(len(colors), dtype=np.uint8)
+    for start in range(0, len(colors), chunk_size):
+        distances = palette_norms - 2.0 * (colors[start:start + chunk_size] @ palette.T)
+        indices[start:start + chunk_size] = distances.argmin(axis=1)
+    return indices
+
+def map_to_palette(image: np.ndarray, palette: np.ndarray) -> np.ndarray:
+    """Map an (H, W, 3) uint8 image to (H, W) palette indices"""
+    image = np.asarray(image, dtype=np.uint8)
+    distinct, inverse = np.unique(pack_rgb(image).ravel(), return_inverse=True)
+    table = nearest_palette_indices(unpack_rgb(distinct), palette)
+    return table[inverse].reshape(image.shape[:2])
+
+def palette_bytes(palette: np.ndarray) -> bytes:
+    """768-byte RGB palette, padded with black, as image formats expect"""
+    padded = np.zeros((PALETTE_SIZE, 3), dtype=np.uint8)
+    padded[:len(palette)] = palette
+    return padded.tobytes()
+
+def palette_digest(palette: np.ndarray) -> str:
+    """Content hash of a palette, for cache keys"""
+    return hashlib.sha256(np.ascontiguousarray(palette, dtype=np.uint8).tobytes()).hexdigest()
+
+class TextureQuantizer:
+    """Decodes textures and maps them onto palettes, caching both by content hash
+
+    Results are kept in an in-memory LRU of `memory_items` entries and,
+    with cache_dir, as .npy files that other processes (batch workers) and
+    later runs pick up. Methods may be called from several threads.
+    """
+
+    def __init__(self, max_size: int = MAX_TEXTURE_SIZE, cache_dir: Optional[str] = None,
+                 memory_items: int = 64):
+        self.max_size = max_size
+        self.cache_dir = cache_dir
+        self.memory_items = memory_items
+        self.decoded = 0
+        self.mapped = 0
+        self._memory = OrderedDict()
+        self._file_hashes = {}
+        self._lock = threading.Lock()
+        if cache_dir:
+            os.makedirs(cache_dir, exist_ok=True)
+
+    def content_hash(self, path: str) -> str:
+        """hash_file() memoized on path, size and modification time"""
+        stat = os.stat(path)
+        signature = (os.path.abspath(path), stat.st_size, stat.st_mtime_ns)
+        if signature not in self._file_hashes:
+            self._file_hashes[signature] = hash_file(path)
+        return self._file_hashes[signature]
+
+    def _cached(self, key: str) -> Optional[np.ndarray]:
+        with self._lock:
+            if key in self._memory:
+                self._memory.move_to_end(key)
+                return self._memory[key]
+        if self.cache_dir:
+            try:
+                array = np.load(os.path.join(self.cache_dir, key + '.npy'))
+            except (OSError, ValueError):
+                return None
+            self._remember(key, array)
+            return array
+        return None
+
+    def _remember(self, key: str, array: np.ndarray):
+        with self._lock:
+            self._memory[key] = array
+            while len(self._memory) > self.memory_items:
+                self._memory.popitem(last=False)
+
+    def _store(self, key: str, array: np.ndarray):
+        self._remember(key, array)
+        if self.cache_dir:
+            fd, tmp_path = tempfile.mkstemp(dir=self.cache_dir, prefix='.tmp-', suffix='.npy')
+            with os.fdopen(fd, 'wb') as f:
+                np.save(f, array)
+            os.replace(tmp_path, os.path.join(self.cache_dir, key + '.npy'))
+
+    def _size_key(self, size: Optional[Tuple[int, int]]) -> str:
+        return f"{size[0]}x{size[1]}" if size else str(self.max_size)
+
+    def load(self, path: str, size: Optional[Tuple[int, int]] = None) -> np.ndarray:
+        """Decode a texture to (H, W, 3) uint8 RGB
+
+        The texture is resized to size (width, height) when given, such as
+        its cell in a texture atlas, and otherwise scaled to fit max_size.
+        """
+        key = f"{self.content_hash(path)}-{self._size_key(size)}"
+        image = self._cached(key)
+        if image is None:
+            from fbx_to_mdl_converter import load_pil
+            Image = load_pil()
+            with Image.open(path) as img:
+                img = img.convert('RGB')
+                if size:
+                    img = img.resize(tuple(size), Image.Resampling.LANCZOS)
+                elif img.width > self.max_size or img.height > self.max_size:
+                    img.thumbnail((self.max_size, self.max_size), Image.Resampling.LANCZOS)
+                image = np.asarray(img, dtype=np.uint8)
+            with self._lock:
+                self.decoded += 1
+            self._store(key, image)
+        return image
+
+    def build_palette(self, paths: List[str], colors: int = PALETTE_SIZE,
+                      sizes: Optional[List[Tuple[int, int]]] = None) -> Optional[np.ndarray]:
+        """build_palette() over the readable textures among paths, cached by their content
+
+        sizes optionally gives each texture's size as passed to load().
+        Returns None if none of the textures can be read.
+        """
+        sizes = sizes or [None] * len(paths)
+        hashes = []
+        for path, size in zip(paths, sizes):
+            try:
+                hashes.append(f"{self.content_hash(path)}-{self._size_key(size)}")
+            except (OSError, TypeError):
+                continue
+        key = hashlib.sha256(f"{sorted(hashes)}-{colors}".encode('ascii')).hexdigest()
+        palette = self._cached('palette-' + key)
+        if palette is None:
+            images = []
+            for path, size in zip(paths, sizes):
+                try:
+                    images.append(self.load(path, size))
+                except Exception:
+                    continue
+            if not images:
+                return None
+            palette = build_palette(images, colors)
+            self._store('palette-' + key, palette)
+        return palette
+
+    def quantize(self, path: str, palette: np.ndarray, size: Optional[Tuple[int, int]] = None) -> np.ndarray:
+        """(H, W) uint8 indices of a texture, loaded as by load(), mapped onto palette"""
+        key = f"{self.content_hash(path)}-{self._size_key(size)}-{palette_digest(palette)[:16]}"
+        indices = self._cached(key)
+        if indices is None:
+            indices = map_to_palette(self.load(path, size), palette)
+            with self._lock:
+                self.mapped += 1
+            self._store(key, indices)
+        return indices
@@ -0,0 +1,310 @@
+#!/usr/bin/env python3
+"""
+Watch mode for the FBX to MDL Converter
+Keeps one converter (and the scene reader / FBX SDK manager behind it)
+alive, watches a directory tree and re-converts each FBX file when it, or
+a texture it references, is saved:
+
+    python fbx_to_mdl_converter.py --watch assets/ build/models/
+
+Outputs mirror the tree's layout below the output directory. On Linux the
+tree is watched with inotify (through ctypes, no extra dependency);
+elsewhere, or if inotify is unavailable, files are polled for changes in
+size and modification time. Bursts of events (an exporter writing a file
+in chunks, or saving several files at once) are debounced: conversions
+start once no event has arrived for the debounce interval.
+"""
+
+import os
+import io
+import sys
+import time
+import errno
+import select
+import struct
+import contextlib
+from typing import List, Dict, Any, Optional, Set, Callable
+
+DEFAULT_DEBOUNCE = 0.2  # seconds without events before converting
+DEFAULT_POLL_INTERVAL = 0.5
+
+# inotify(7) constants
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_DELETE_SELF = 0x00000400
+IN_Q_OVERFLOW = 0x00004000
+IN_ISDIR = 0x40000000
+INOTIFY_EVENT = struct.Struct('iIII')  # wd, mask, cookie, len
+INOTIFY_MASK = IN_CLOSE_WRITE | IN_MOVED_TO | IN_CREATE | IN_DELETE_SELF
+
+class InotifyWatcher:
+    """Changed files below watched directories, from Linux inotify
+
+    Raises OSError if inotify is not available. New subdirectories are
+    watched as they appear.
+    """
+
+    def __init__(self):
+        import ctypes
+        import ctypes.util
+        self._libc = ctypes.CDLL(ctypes.util.find_library('c') or 'libc.so.6', use_errno=True)
+        if not hasattr(self._libc, 'inotify_init1'):
+            raise OSError(errno.ENOSYS, "inotify is not available")
+        self._fd = self._libc.inotify_init1(os.O_NONBLOCK | os.O_CLOEXEC)
+        if self._fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init1 failed")
+        self._directories = {}  # watch descriptor -> directory
+        self.overflowed = False
+
+    def add(self, directory: str, recursive: bool = True) -> List[str]:
+        """Watch a directory (and its subdirectories); returns the files already in new subdirectories"""
+        found = []
+        for root, dirs, files in os.walk(directory) if recursive else [(directory, [], [])]:
+            wd = self._libc.inotify_add_watch(self._fd, os.fsencode(root), INOTIFY_MASK)
+            if wd < 0:
+                continue  # removed meanwhile, or out of watches; polling would be needed
+            self._directories[wd] = root
+            found.extend(os.path.join(root, name) for name in files)
+        return found
+
+    def wait(self, timeout: Optional[float]) -> Set[str]:
+        """Block up to timeout seconds (None: forever) and return the paths written meanwhile"""
+        readable, _, _ = select.select([self._fd], [], [], timeout)
+        if not readable:
+            return set()
+
+        changed = set()
+        try:
+            data = os.read(self._fd, 256 * 1024)
+        except BlockingIOError:
+            return changed
+        offset = 0
+        while offset + INOTIFY_EVENT.size <= len(data):
+            wd, mask, _, length = INOTIFY_EVENT.unpack_from(data, offset)
+            name = data[offset + INOTIFY_EVENT.size:offset + INOTIFY_EVENT.size + length].rstrip(b'\0')
+            offset += INOTIFY_EVENT.size + length
+
+            if mask & IN_Q_OVERFLOW:
+                self.overflowed = True
+                continue
+            directory = self._directories.get(wd)
+            if directory is None:
+                continue
+            if mask & IN_DELETE_SELF:
+                del self._directories[wd]
+                continue
+            path = os.path.join(directory, os.fsdecode(name))
+            if mask & IN_ISDIR:
+                if mask & (IN_CREATE | IN_MOVED_TO):
+                    changed.update(self.add(path))
+            elif mask & (IN_CLOSE_WRITE | IN_MOVED_TO):
+                changed.add(path)
+        return changed
+
+    def close(self):
+        if self._fd >= 0:
+            os.close(self._fd)
+            self._fd = -1
+
+class PollingWatcher:
+    """Changed files below watched directories, by comparing size and modification time"""
+
+    def __init__(self, interval: float = DEFAULT_POLL_INTERVAL):
+        self.interval = interval
+        self.overflowed = False
+        self._directories = {}  # directory -> recursive
+        self._snapshot = {}
+
+    def _scan(self, directories: Dict[str, bool]) -> Dict[str, tuple]:
+        snapshot = {}
+        for directory, recursive in directories.items():
+            for root, dirs, files in os.walk(directory):
+                if not recursive:
+                    dirs[:] = []
+                for name in files:
+                    path = os.path.join(root, name)
+                    try:
+                        stat = os.stat(path)
+                    except OSError:
+                        continue
+                    snapshot[path] = (stat.st_size, stat.st_mtime_ns)
+        return snapshot
+
+    def add(self, directory: str, recursive: bool = True) -> List[str]:
+        """Watch a directory (and its subdirectories); files present now are not reported as changed"""
+        if directory in self._directories and (self._directories[directory] or not recursive):
+            return []
+        self._directories[directory] = recursive
+        for path, signature in self._scan({directory: recursive}).items():
+            self._snapshot.setdefault(path, signature)
+        return []
+
+    def wait(self, timeout: Optional[float]) -> Set[str]:
+        """Poll until something changed or timeout seconds passed (None: forever)"""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            snapshot = self._scan(self._directories)
+            changed = {path for path, signature in snapshot.items() if self._snapshot.get(path) != signature}
+            self._snapshot = snapshot
+            if changed:
+                return changed
+            remaining = None if deadline is None else deadline - time.monotonic()
+            if remaining is not None and remaining <= 0:
+                return set()
+            time.sleep(self.interval if remaining is None else min(self.interval, remaining))
+
+    def close(self):
+        self._directories = {}
+
+def create_watcher(polling: bool = False, poll_interval: float = DEFAULT_POLL_INTERVAL):
+    """Return an InotifyWatcher where available, else a PollingWatcher"""
+    if not polling and sys.platform.startswith('linux'):
+        try:
+            return InotifyWatcher()
+        except OSError:
+            pass
+    return PollingWatcher(poll_interval)
+
+def watch_output_path(root: str, output_dir: str, fbx_path: str) -> str:
+    """Output MDL for an FBX below the watched root, mirroring its relative path"""
+    relative = os.path.relpath(fbx_path, root)
+    return os.path.join(output_dir, os.path.splitext(relative)[0] + '.mdl')
+
+class WatchSession:
+    """Re-convert the FBX files of a directory tree as they or their textures change
+
+    The converter is created with keep_reader, and its scene reader is
+    initialized up front, so every conversion runs on a warm FBX manager.
+    The textures each model referenced in its last conversion are tracked,
+    so saving a texture re-converts the models that use it.
+    """
+
+    def __init__(self, root: str, output_dir: str, converter_options: Optional[Dict[str, Any]] = None,
+                 create_qc: bool = False, verbose: bool = False, cache=None, watcher=None,
+                 debounce: float = DEFAULT_DEBOUNCE):
+        from fbx_to_mdl_converter import FBXToMDLConverter
+
+        self.root = os.path.abspath(root)
+        self.output_dir = output_dir
+        self.create_qc = create_qc
+        self.verbose = verbose
+        self.cache = cache
+        self.debounce = debounce
+        self.watcher = watcher or create_watcher()
+        self.converter = FBXToMDLConverter(keep_reader=True, **(converter_options or {}))
+        self.dependencies = {}  # FBX path -> texture paths
+        self.results = []
+        self.changed_at = None  # perf_counter() time the last burst of changes began
+
+    def start(self) -> List[str]:
+        """Warm up the converter and start watching; returns the FBX files that need converting"""
+        self.converter.initialize_reader()
+        from fbx_to_mdl_converter import load_pil
+        load_pil()  # Pillow is imported lazily; pay for it before the first save
+
+        self.watcher.add(self.root)
+        return self.stale_files()
+
+    def stale_files(self) -> List[str]:
+        """FBX files below the root whose output is missing or older than the FBX"""
+        stale = []
+        for root, dirs, files in sorted(os.walk(self.root)):
+            for name in sorted(files):
+                path = os.path.join(root, name)
+                if not name.lower().endswith('.fbx'):
+                    continue
+                output = watch_output_path(self.root, self.output_dir, path)
+                if not os.path.exists(output) or os.path.getmtime(output) < os.path.getmtime(path):
+                    stale.append(path)
+        return stale
+
+    def affected(self, changed: Set[str]) -> List[str]:
+        """FBX files to re-convert for a set of changed paths"""
+        fbx_paths = {path for path in changed
+                     if path.lower().endswith('.fbx') and os.path.commonpath([self.root, path]) == self.root}
+        for fbx_path, textures in self.dependencies.items():
+            if changed.intersection(textures):
+                fbx_paths.add(fbx_path)
+        return sorted(path for path in fbx_paths if os.path.isfile(path))
+
+    def convert(self, fbx_path: str, changed_at: Optional[float] = None) -> Dict[str, Any]:
+        """Convert one file on the warm converter and report it
+
+        changed_at is the perf_counter() time the change was first seen;
+        the result's 'latency' is measured from it.
+        """
+        from fbx_to_mdl_converter import convert_file
+
+        mdl_path = watch_output_path(self.root, self.output_dir, fbx_path)
+        start = time.perf_counter()
+        result = {'input': fbx_path, 'output': mdl_path, 'status': 'ok', 'error': None}
+        log = io.StringIO()
+        try:
+            with contextlib.redirect_stdout(sys.stdout if self.verbose else log):
+                result.update(convert_file(self.converter, fbx_path, mdl_path, self.create_qc, self.cache))
+                if result['cache'] == 'miss':
+                    self.cache.evict()  # keep a long-running session within --cache-size
+        except Exception as e:
+            result['status'] = 'failed'
+            result['error'] = str(e) or type(e).__name__
+        end = time.perf_counter()
+        result['seconds'] = end - start
+        result['latency'] = end - (changed_at if changed_at is not None else start)
+
+        # Watch the textures it uses, wherever they are (a cache hit does
+        # not load the scene, so the textures seen last time are kept)
+        if result.get('cache') != 'hit':
+            self.dependencies[fbx_path] = {os.path.abspath(path) for path in self.converter.texture_dependencies()}
+        textures = self.dependencies.get(fbx_path, set())
+        for directory in {os.path.dirname(path) for path in textures}:
+            if os.path.isdir(directory) and os.path.commonpath([self.root, directory]) != self.root:
+                self.watcher.add(directory, recursive=False)
+
+        if result['status'] == 'ok':
+            print(f"[ok]     {result['seconds'] * 1000:6.0f} ms ({result['latency'] * 1000:.0f} ms after the save)  "
+                  f"{fbx_path} -> {mdl_path}")
+        else:
+            print(f"[failed] {fbx_path}: {result['error']}")
+        self.results.append(result)
+        return result
+
+    def wait_for_changes(self, timeout: Optional[float] = None) -> List[str]:
+        """Wait for a burst of changes and return the FBX files it affects
+
+        Returns [] if nothing changed within timeout seconds. After the
+        first event, events keep being collected until none has arrived for
+        the debounce interval; changed_at is set to when the first arrived.
+        """
+        changed = self.watcher.wait(timeout)
+        if not changed and not self.watcher.overflowed:
+            return []
+        self.changed_at = time.perf_counter()
+        while True:
+            more = self.watcher.wait(self.debounce)
+            if not more:
+                break
+            changed |= more
+        if self.watcher.overflowed:
+            # Events were dropped: fall back to comparing outputs with inputs
+            self.watcher.overflowed = False
+            changed |= set(self.stale_files())
+        return self.affected(changed)
+
+    def run(self, should_stop: Callable[[], bool] = lambda: False, timeout: float = 1.0):
+        """Convert stale files, then re-convert changed ones until should_stop() or Ctrl+C"""
+        try:
+            for fbx_path in self.start():
+                self.convert(fbx_path)
+            print(f"Watching {self.root} for changes (Ctrl+C to stop)...")
+            while not should_stop():
+                for fbx_path in self.wait_for_changes(timeout):
+                    self.convert(fbx_path, self.changed_at)
+        except KeyboardInterrupt:
+            print("\nStopped watching")
+        finally:
+            self.close()
+
+    def close(self):
+        self.watcher.close()
+        self.converter.cleanup_reader()